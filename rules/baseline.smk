@@ -57,20 +57,22 @@ rule baseline_first_exec:
         "output/{workload}/baseline/{xp}/{query}/1.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 5
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
 
 
 rule baseline_second_exec:
@@ -80,20 +82,22 @@ rule baseline_second_exec:
         "output/{workload}/baseline/{xp}/{query}/2.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 4
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
 
 
 rule baseline_third_exec:
@@ -103,20 +107,22 @@ rule baseline_third_exec:
         "output/{workload}/baseline/{xp}/{query}/3.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 3
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
 
 
 rule baseline_fourth_exec:
@@ -126,20 +132,22 @@ rule baseline_fourth_exec:
         "output/{workload}/baseline/{xp}/{query}/4.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 2
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
 
 
 rule baseline_fifth_exec:
@@ -149,17 +157,19 @@ rule baseline_fifth_exec:
         "output/{workload}/baseline/{xp}/{query}/5.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 1
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
@@ -109,6 +109,10 @@ rule experiments_optimize:
         max_depth = (lambda wcs: config["experiments"][wcs.xp]["max_depth"]),
         beam_size = (lambda wcs: config["experiments"][wcs.xp]["beam_size"]),
         beam_extra = (lambda wcs: config["experiments"][wcs.xp]["beam_extra"]),
+        block_size = (lambda wcs: config["experiments"][wcs.xp].get("block_size", 3)),
+        time_budget = (lambda wcs: config["experiments"][wcs.xp].get("time_budget", 0.0)),
+        cost_model = (lambda wcs: get_cost_model_option(wcs)),
+        feedback = (lambda wcs: get_feedback_option(wcs)),
         relaxe_stars = (lambda wcs: config["experiments"][wcs.xp]["relaxe_stars"]),
         optimize_walk_plans = (lambda wcs: config["experiments"][wcs.xp]["optimize_walk_plans"])
     priority: 10
@@ -122,6 +126,8 @@ rule experiments_optimize:
             --max-depth {params.max_depth} \
             --beam-size {params.beam_size} \
             --beam-extra {params.beam_extra} \
+            --block-size {params.block_size} \
+            --time-budget {params.time_budget} {params.cost_model} {params.feedback} \
             --relaxe-stars {params.relaxe_stars} \
             --optimize-walk-plans {params.optimize_walk_plans} \
             --output output/{wildcards.workload}/experiments/{wildcards.xp}/{wildcards.query}")
@@ -134,20 +140,22 @@ rule experiments_first_exec:
         "output/{workload}/experiments/{xp}/{query}/1.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 5
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
 
 
 rule experiments_second_exec:
@@ -157,20 +165,22 @@ rule experiments_second_exec:
         "output/{workload}/experiments/{xp}/{query}/2.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 4
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
 
 
 rule experiments_third_exec:
@@ -180,20 +190,22 @@ rule experiments_third_exec:
         "output/{workload}/experiments/{xp}/{query}/3.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 3
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
 
 
 rule experiments_fourth_exec:
@@ -203,20 +215,22 @@ rule experiments_fourth_exec:
         "output/{workload}/experiments/{xp}/{query}/4.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 2
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
 
 
 rule experiments_fifth_exec:
@@ -226,17 +240,19 @@ rule experiments_fifth_exec:
         "output/{workload}/experiments/{xp}/{query}/5.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 1
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
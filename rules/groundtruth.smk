@@ -48,14 +48,16 @@ rule groundtruth_optimize:
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         timeout = (lambda wcs: config["experiments"][wcs.xp]["timeout"]),
         relaxe_stars = (lambda wcs: config["experiments"][wcs.xp]["relaxe_stars"]),
         optimizer = (lambda wcs: config["experiments"][wcs.xp]["optimizer"]),
         beam_size = (lambda wcs: config["experiments"][wcs.xp]["beam_size"]),
-        beam_extra = (lambda wcs: config["experiments"][wcs.xp]["beam_extra"])
+        beam_extra = (lambda wcs: config["experiments"][wcs.xp]["beam_extra"]),
+        count_store = (lambda wcs: get_count_store_option(wcs))
     priority: 10
     run:
-        shell("bash server.sh start virtuoso")
+        shell("bash server.sh start {params.server}")
         shell("mkdir -p output/{wildcards.workload}/groundtruth/{wildcards.xp}/{wildcards.query}")
         shell("python scripts/main.py groundtruth {input} {params.endpoint} \
             --url {params.url} \
@@ -64,9 +66,9 @@ rule groundtruth_optimize:
             --relaxe-stars {params.relaxe_stars} \
             --estimator {params.estimator} \
             --beam-size {params.beam_size} \
-            --beam-extra {params.beam_extra} \
+            --beam-extra {params.beam_extra} {params.count_store} \
             --output output/{wildcards.workload}/groundtruth/{wildcards.xp}/{wildcards.query}")
-        shell("bash server.sh stop virtuoso")
+        shell("bash server.sh stop {params.server}")
 
 
 rule groundtruth_first_exec:
@@ -76,20 +78,22 @@ rule groundtruth_first_exec:
         "output/{workload}/groundtruth/{xp}/{query}/1.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 5
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
 
 
 rule groundtruth_second_exec:
@@ -99,20 +103,22 @@ rule groundtruth_second_exec:
         "output/{workload}/groundtruth/{xp}/{query}/2.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 4
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
 
 
 rule groundtruth_third_exec:
@@ -122,20 +128,22 @@ rule groundtruth_third_exec:
         "output/{workload}/groundtruth/{xp}/{query}/3.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 3
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
 
 
 rule groundtruth_fourth_exec:
@@ -145,20 +153,22 @@ rule groundtruth_fourth_exec:
         "output/{workload}/groundtruth/{xp}/{query}/4.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 2
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
 
 
 rule groundtruth_fifth_exec:
@@ -168,17 +178,19 @@ rule groundtruth_fifth_exec:
         "output/{workload}/groundtruth/{xp}/{query}/5.csv"
     params:
         endpoint = (lambda wcs: config["experiments"][wcs.xp]["endpoint"]),
+        server = (lambda wcs: get_server(wcs)),
         url = (lambda wcs: get_endpoint_url(wcs)),
         graph = (lambda wcs: get_endpoint_graph(wcs)),
-        timeout = (lambda wcs: get_timeout(wcs))
+        timeout = (lambda wcs: get_timeout(wcs)),
+        stream = (lambda wcs: get_stream_option(wcs))
     threads: workflow.cores
     priority: 1
     run:
-        shell("bash server.sh start {params.endpoint}")
+        shell("bash server.sh start {params.server}")
         shell("python scripts/main.py {params.endpoint}-run {input} \
             --url {params.url} \
             --graph {params.graph} \
-            --timeout {params.timeout} \
+            --timeout {params.timeout} {params.stream} \
             --metrics {output}")
         if "restartserver" in config and config["restartserver"]:
-            shell("bash server.sh stop {params.endpoint}")
+            shell("bash server.sh stop {params.server}")
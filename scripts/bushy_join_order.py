@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+from functools import cached_property
+from typing import Dict, List, Optional, Set, Union
+
+from pattern import Pattern
+from triple_pattern import TriplePattern
+from filter import Filter
+from multiset import Multiset
+from join_order import JoinOrder
+from cost_model import CostModel
+
+
+class BushyJoinOrder():
+
+    def __init__(
+        self, left: Union[JoinOrder, BushyJoinOrder],
+        right: Union[JoinOrder, BushyJoinOrder],
+        filters: Optional[List[Union[Filter, Multiset]]] = None
+    ) -> None:
+        self._left = left
+        self._right = right
+        self._filters = filters if filters is not None else []
+        self._cardinality = 0.0
+        self._epsilon = 0.0
+        self._support = 0.0
+        self._estimation_time = 0.0
+        self._profile = {}
+
+    @property
+    def left(self) -> Union[JoinOrder, BushyJoinOrder]:
+        return self._left
+
+    @property
+    def right(self) -> Union[JoinOrder, BushyJoinOrder]:
+        return self._right
+
+    @property
+    def filters(self) -> List[Union[Filter, Multiset]]:
+        return self._filters
+
+    @property
+    def cardinality(self) -> float:
+        return self._cardinality
+
+    @cardinality.setter
+    def cardinality(self, value: float) -> None:
+        self._cardinality = value
+
+    @property
+    def epsilon(self) -> float:
+        return self._epsilon
+
+    @epsilon.setter
+    def epsilon(self, value: float) -> None:
+        self._epsilon = value
+
+    @property
+    def support(self) -> float:
+        return self._support
+
+    @support.setter
+    def support(self, support: float) -> None:
+        self._support = support
+
+    @property
+    def estimation_time(self) -> float:
+        return self._estimation_time
+
+    @estimation_time.setter
+    def estimation_time(self, time: float) -> None:
+        self._estimation_time = time
+
+    @property
+    def profile(self) -> Dict[str, float]:
+        return self._profile
+
+    @profile.setter
+    def profile(self, profile: Dict[str, float]) -> None:
+        self._profile = profile
+
+    @property
+    def cost_model(self) -> CostModel:
+        return self.left.cost_model
+
+    @property
+    def cost(self) -> float:
+        return self.cost_model.join_cost(self)
+
+    @cached_property
+    def k0(self) -> int:
+        return hash(f'({self.left.k0},{self.right.k0})')
+
+    @cached_property
+    def k1(self) -> int:
+        return self.left.k1 ^ self.right.k1
+
+    @cached_property
+    def size(self) -> int:
+        return self.left.size + self.right.size
+
+    @cached_property
+    def root(self) -> JoinOrder:
+        return self.left.root
+
+    @property
+    def bindings(self) -> Dict[str, str]:
+        return self.left.bindings
+
+    @cached_property
+    def variables(self) -> Set[str]:
+        return self.left.variables.union(self.right.variables)
+
+    def get_patterns(self) -> List[TriplePattern]:
+        return self.left.get_patterns() + self.right.get_patterns()
+
+    def get_filters(self) -> List[Filter]:
+        filters = [filter for filter in self.filters if filter.is_filter()]
+        return self.left.get_filters() + self.right.get_filters() + filters
+
+    def get_multisets(self) -> List[Multiset]:
+        multisets = [filter for filter in self.filters if filter.is_multiset()]
+        return self.left.get_multisets() + self.right.get_multisets() + multisets
+
+    def get_branches(self) -> List[JoinOrder]:
+        branches = []
+        for child in [self.left, self.right]:
+            if isinstance(child, BushyJoinOrder):
+                branches.extend(child.get_branches())
+            else:
+                branches.append(child)
+        return branches
+
+    def decompose(self) -> List[JoinOrder]:
+        return self.left.decompose() + self.right.decompose()
+
+    def stringify_patterns(self, target: str) -> List[str]:
+        patterns = []
+        for child in [self.left, self.right]:
+            variables = ' '.join(sorted(child.variables))
+            patterns.append(f'\t{{ SELECT {variables} WHERE {{')
+            for pattern in child.stringify_patterns(target):
+                patterns.append(f'\t{pattern}')
+            patterns.append('\t} }')
+        for filter in self.filters:
+            patterns.append(f'\t{filter.stringify(target)} .')
+        return patterns
+
+    def stringify_named_subqueries(self, subqueries: List[str]) -> List[str]:
+        patterns = []
+        for child in [self.left, self.right]:
+            if isinstance(child, BushyJoinOrder):
+                body = child.stringify_named_subqueries(subqueries)
+            else:
+                body = child.stringify_patterns('blazegraph')
+            name = f'%b{len(subqueries)}'
+            variables = ' '.join(sorted(child.variables))
+            body.insert(0, '\thint:SubQuery hint:optimizer "None" .')
+            body = '\n'.join([f'\t{pattern}' for pattern in body])
+            subqueries.append(
+                f'WITH {{\n\tSELECT {variables} WHERE {{\n{body}\n\t}}\n}} AS {name}')
+            patterns.append(f'\tINCLUDE {name} .')
+        for filter in self.filters:
+            patterns.append(f'\t{filter.stringify("blazegraph")} .')
+        return patterns
+
+    def stringify(self, target: str) -> str:
+        bindings = []
+        if len(self.bindings) > 0:
+            bindings.append(f'\t{Multiset([self.bindings]).stringify(target)} .')
+        if target == 'blazegraph':
+            subqueries = []
+            patterns = bindings + self.stringify_named_subqueries(subqueries)
+            patterns.insert(0, '\thint:Query hint:optimizer "None" .')
+            subqueries = '\n'.join(subqueries)
+            body = '\n'.join(patterns)
+            return f'SELECT DISTINCT *\n{subqueries}\nWHERE {{\n{body}\n}}'
+        elif target == 'local':
+            body = '\n'.join(bindings + self.stringify_patterns(target))
+            return f'SELECT DISTINCT * WHERE {{\n{body}\n}}'
+        else:
+            body = '\n'.join(bindings + self.stringify_patterns(target))
+            return f'DEFINE sql:select-option "order" SELECT DISTINCT * WHERE {{\n{body}\n}}'
+
+    def __lt__(self, other: Union[JoinOrder, BushyJoinOrder]) -> bool:
+        return self.cost < other.cost
+
+    def __eq__(self, other: Union[JoinOrder, BushyJoinOrder]) -> bool:
+        return self.k0 == other.k0
+
+    def __hash__(self) -> int:
+        return self.k0
+
+    def __contains__(self, item: Pattern) -> bool:
+        if item in self.left or item in self.right:
+            return True
+        return any([filter.id == item.id for filter in self.filters])
+
+    def __repr__(self) -> str:
+        patterns = []
+        for child in [self.left, self.right]:
+            patterns.append('\t{')
+            for pattern in repr(child).split('\n'):
+                patterns.append(f'\t\t{pattern}')
+            patterns.append('\t}')
+        for filter in self.filters:
+            patterns.append(f'\t{filter} .')
+        body = '\n'.join(patterns)
+        return f'SELECT DISTINCT * WHERE {{\n{body}\n}}'
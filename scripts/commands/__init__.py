@@ -0,0 +1,43 @@
+import importlib
+
+import click
+
+
+COMMANDS = {
+    'estimate': 'estimate',
+    'groundtruth-estimate': 'estimate',
+    'optimize': 'optimize',
+    'groundtruth-optimize': 'optimize',
+    'calibrate-cost-model': 'calibrate',
+    'run-workload': 'run_workload',
+    'optimize-workload': 'run_workload',
+    'record-feedback': 'record_feedback',
+    'replay-server': 'replay',
+    'local-run': 'local',
+    'virtuoso-run': 'execute',
+    'virtuoso-count': 'execute',
+    'virtuoso-cost': 'execute',
+    'blazegraph-run': 'execute',
+    'blazegraph-count': 'execute',
+    'load-test': 'load',
+    'workload-statistics': 'statistics',
+    'build-histograms': 'statistics',
+    'prepare-query': 'query',
+    'scan': 'query',
+    'benchmark-startup': 'benchmark'}
+
+
+def load_command(name: str) -> click.Command:
+    module = importlib.import_module(f'commands.{COMMANDS[name]}')
+    return getattr(module, name.replace('-', '_'))
+
+
+class LazyGroup(click.Group):
+
+    def list_commands(self, ctx: click.Context) -> list:
+        return sorted(COMMANDS.keys())
+
+    def get_command(self, ctx: click.Context, name: str) -> click.Command:
+        if name not in COMMANDS:
+            return None
+        return load_command(name)
@@ -0,0 +1,74 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+
+import click
+
+from spy import Spy
+from commands import COMMANDS
+from commands.common import initialize_logging
+
+
+HEAVY_MODULES = ['pandas', 'numpy', 'scipy', 'rdflib', 'SPARQLWrapper', 'hdt_python']
+
+PROBE = '''
+import sys, json, time
+start = time.time()
+from commands import load_command
+load_command(sys.argv[1])
+elapsed_time = time.time() - start
+modules = [module for module in sys.argv[2:] if module in sys.modules]
+print(json.dumps([elapsed_time, modules]))
+'''
+
+
+@click.command()
+@click.option('--command', 'names', type=click.Choice(sorted(COMMANDS.keys())), multiple=True)
+@click.option('--runs', type=click.INT, default=5)
+@click.option('--budget', type=click.FLOAT, default=0.5)
+@click.option('--verbose/--quiet', default=False)
+@click.option('--output', type=click.Path(exists=False), default=None)
+def benchmark_startup(names, runs, budget, verbose, output):
+    initialize_logging(verbose)
+    directory = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    main = os.path.join(directory, 'main.py')
+    spy = Spy()
+    over_budget = []
+    for name in names or sorted(COMMANDS.keys()):
+        startup_times = []
+        for _ in range(runs):
+            start_time = time.time()
+            subprocess.run(
+                [sys.executable, main, name, '--help'], cwd=directory,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+            startup_times.append(time.time() - start_time)
+        probe = subprocess.run(
+            [sys.executable, '-c', PROBE, name] + HEAVY_MODULES, cwd=directory,
+            capture_output=True, text=True, check=True)
+        import_time, modules = json.loads(probe.stdout)
+        startup_time = sorted(startup_times)[len(startup_times) // 2]
+        spy.report(name, 'command', name)
+        spy.report(name, 'module', COMMANDS[name])
+        spy.report(name, 'startup_time', startup_time)
+        spy.report(name, 'startup_time_min', min(startup_times))
+        spy.report(name, 'startup_time_max', max(startup_times))
+        spy.report(name, 'import_time', import_time)
+        spy.report(name, 'heavy_modules', ' '.join(modules))
+        spy.report(name, 'budget', budget)
+        spy.report(name, 'within_budget', startup_time <= budget)
+        if startup_time > budget:
+            over_budget.append(name)
+        logging.debug(f'{name}: {startup_time} seconds ({" ".join(modules) or "-"})')
+    if output is not None:
+        spy.to_csv(output)
+    logging.info('===' * 50)
+    logging.info(spy.to_string())
+    logging.info('---' * 50)
+    if len(over_budget) > 0:
+        logging.info(f'Over the {budget} seconds budget: {", ".join(over_budget)}')
+    else:
+        logging.info(f'All commands start within {budget} seconds')
+    logging.info('===' * 50)
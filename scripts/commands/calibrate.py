@@ -0,0 +1,39 @@
+import glob
+import logging
+
+import click
+import pandas
+
+from cost_model import CalibratedCostModel, OPERATORS
+from commands.common import initialize_logging
+
+
+@click.command()
+@click.argument('metrics', type=click.STRING)
+@click.argument('endpoint', type=click.Choice(['virtuoso', 'blazegraph']))
+@click.option('--verbose/--quiet', default=False)
+@click.option('--output', type=click.Path(exists=False), default=None)
+def calibrate_cost_model(metrics, endpoint, verbose, output):
+    initialize_logging(verbose)
+    df = pandas.concat([pandas.read_csv(file) for file in glob.glob(metrics)])
+    columns = [f'{operator}_cardinality' for operator in OPERATORS]
+    missing = [column for column in columns if column not in df]
+    if len(missing) > 0:
+        raise Exception(f'Metrics without operator cardinalities: {", ".join(missing)}')
+    df = df[(df['endpoint'] == endpoint) & (df['status'] == 'ok')]
+    df = df.dropna(subset=columns + ['execution_time'])
+    if len(df) == 0:
+        raise Exception(f'No successful execution found for {endpoint}')
+    features = []
+    for _, row in df.iterrows():
+        features.append({operator: row[f'{operator}_cardinality'] for operator in OPERATORS})
+    cost_model = CalibratedCostModel.fit(features, df['execution_time'].tolist())
+    if output is not None:
+        cost_model.save(output, endpoint=endpoint, num_samples=len(df))
+    logging.info('===' * 50)
+    for operator, coefficient in cost_model.coefficients.items():
+        logging.info(f'{operator}: {coefficient}')
+    logging.info(f'intercept: {cost_model.intercept}')
+    logging.info('---' * 50)
+    logging.info(f'Cost model fitted on {len(df)} executions')
+    logging.info('===' * 50)
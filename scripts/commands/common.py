@@ -0,0 +1,25 @@
+import glob
+import logging
+import os
+
+from typing import List, Optional
+
+
+def initialize_logging(verbose: bool = False, logfile: Optional[str] = None):
+    if logfile is None:
+        handlers = [logging.StreamHandler()]
+    else:
+        handlers = [logging.FileHandler(logfile)]
+    level = 'DEBUG' if verbose else 'INFO'
+    logging.basicConfig(level=level, format='', handlers=handlers)
+
+
+def list_files(path: str) -> List[str]:
+    files = list()
+    if os.path.isdir(path):
+        for filename in os.listdir(path):
+            if filename.endswith('.sparql'):
+                files.append(f'{path}/{filename}')
+    else:
+        files.extend(glob.glob(path))
+    return files
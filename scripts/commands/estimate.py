@@ -0,0 +1,72 @@
+import glob
+import logging
+import time
+
+import click
+
+import utils
+import rewrite
+
+from spy import Spy
+from endpoint import Virtuoso
+from search import DummySearch, DPSearch
+from estimators.random_walks import RandomWalksEstimator
+from estimators.void import VoidEstimator
+from hdt_connector import HDTConnector
+from commands.common import initialize_logging
+
+
+@click.command()
+@click.argument('path', type=click.STRING)
+@click.option('--graph', type=click.STRING, default='wdbench')
+@click.option('--num-walks', type=click.INT, default=10000)
+@click.option('--max-depth', type=click.INT, default=5)
+@click.option('--optimize-walk-plans', type=click.BOOL, default=True)
+@click.option('--verbose/--quiet', default=False)
+def estimate(path, graph, num_walks, max_depth, optimize_walk_plans, verbose):
+    initialize_logging(verbose)
+    connector = HDTConnector(graph)
+    estimator = RandomWalksEstimator(
+        connector, num_walks=num_walks, max_depth=max_depth,
+        relaxe_stars=False, optimize_walk_plans=optimize_walk_plans)
+    query = rewrite.rewrite(utils.parse_file(glob.glob(path)[0]))
+    join_order = DummySearch(estimator).run(query)
+    start = time.time()
+    estimator.estimate(join_order)
+    elapsed_time = time.time() - start
+    logging.info('===' * 50)
+    logging.info(f'cardinality: {join_order.cardinality} +/- {join_order.epsilon}')
+    logging.info(f'support: {join_order.support}')
+    logging.info('---' * 50)
+    logging.info(f'time: {elapsed_time} seconds')
+    logging.info('===' * 50)
+
+
+@click.command()
+@click.argument('path', type=click.STRING)
+@click.option('--url', type=click.STRING, default='http://localhost:8890/sparql')
+@click.option('--graph', type=click.STRING, default='http://example.com/wdbench')
+@click.option('--verbose/--quiet', default=False)
+@click.option('--output', type=click.Path(exists=True, dir_okay=True, file_okay=False))
+def groundtruth_estimate(
+    path, url, graph, verbose, output
+):
+    initialize_logging(verbose)
+    endpoint = Virtuoso(url, graph)
+    connector = HDTConnector(graph.split('/')[-1])
+    estimator = VoidEstimator(connector, relaxe_stars=True)
+    query = rewrite.rewrite(utils.parse_file(glob.glob(path)[0]))
+    join_order = DPSearch(estimator).run(query)
+    spy = Spy()
+    cardinality = endpoint.count(
+        join_order.stringify('virtuoso'),
+        spy,
+        force_order=True,
+        distinct=True)
+    start = time.time()
+    elapsed_time = time.time() - start
+    logging.info('===' * 50)
+    logging.info(f'cardinality: {cardinality}')
+    logging.info('---' * 50)
+    logging.info(f'time: {elapsed_time} seconds')
+    logging.info('===' * 50)
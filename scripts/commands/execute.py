@@ -0,0 +1,150 @@
+import glob
+import json
+import logging
+import time
+
+import click
+
+from spy import Spy
+from endpoint import Virtuoso, Blazegraph
+from commands.common import initialize_logging
+
+
+@click.command()
+@click.argument('path', type=click.STRING)
+@click.option('--url', type=click.STRING, default='http://localhost:8890/sparql')
+@click.option('--graph', type=click.STRING, default='http://example.com/wdbench')
+@click.option('--timeout', type=click.INT, default=0)
+@click.option('--force-order/--free-order', default=False)
+@click.option('--verbose/--quiet', default=False)
+@click.option('--results', type=click.Path(exists=False), default=None)
+@click.option('--metrics', type=click.Path(exists=False), default=None)
+@click.option('--stream/--no-stream', default=False)
+@click.option('--format', type=click.Choice(['json', 'tsv']), default='json')
+def virtuoso_run(
+    path, url, graph, force_order, timeout, verbose, results, metrics, stream, format
+):
+    initialize_logging(verbose)
+    spy = Spy()
+    virtuoso = Virtuoso(url, graph)
+    query_file = glob.glob(path)[0]
+    with open(query_file, 'r') as reader:
+        query = reader.read()
+    if stream:
+        virtuoso.stream(
+            query, spy, force_order=force_order, timeout=timeout, format=format,
+            output=results)
+    else:
+        solutions = virtuoso.execute(query, spy, force_order=force_order, timeout=timeout)
+        if solutions is not None and results is not None:
+            with open(results, 'w') as writer:
+                json.dump(solutions, writer, indent=2)
+    if metrics is not None:
+        spy.to_csv(metrics)
+    logging.info('===' * 50)
+    logging.info(spy.to_string())
+    logging.info('===' * 50)
+
+
+@click.command()
+@click.argument('path', type=click.STRING)
+@click.option('--url', type=click.STRING, default='http://localhost:8890/sparql')
+@click.option('--graph', type=click.STRING, default='http://example.com/wdbench')
+@click.option('--distinct', type=click.BOOL, default=False)
+@click.option('--force-order/--free-order', default=False)
+@click.option('--verbose/--quiet', default=False)
+def virtuoso_count(path, url, graph, distinct, force_order, verbose):
+    initialize_logging(verbose)
+    spy = Spy()
+    virtuoso = Virtuoso(url, graph)
+    query_file = glob.glob(path)[0]
+    with open(query_file, 'r') as reader:
+        query = reader.read()
+    virtuoso.count(query, spy, distinct=distinct, force_order=force_order)
+    logging.info('===' * 50)
+    logging.info(spy.to_string())
+    logging.info('===' * 50)
+
+
+@click.command()
+@click.argument('path', type=click.STRING)
+@click.option('--url', type=click.STRING, default='http://localhost:8890/sparql')
+@click.option('--graph', type=click.STRING, default='http://example.com/wdbench')
+@click.option('--distinct', type=click.BOOL, default=False)
+@click.option('--force-order/--free-order', default=False)
+@click.option('--isql', type=click.STRING, default='localhost:1111')
+@click.option('--output', type=click.Path(exists=False), default=None)
+@click.option('--verbose/--quiet', default=False)
+def virtuoso_cost(path, url, graph, distinct, force_order, isql, output, verbose):
+    initialize_logging(verbose)
+    spy = Spy()
+    virtuoso = Virtuoso(url, graph, isql=isql)
+    query_file = glob.glob(path)[0]
+    with open(query_file, 'r') as reader:
+        query = reader.read()
+    start_time = time.time()
+    cost = virtuoso.cost(query, force_order=force_order)
+    elapsed_time = time.time() - start_time
+    spy.report('', 'cost', cost)
+    spy.report('', 'optimization_time', elapsed_time)
+    if output is not None:
+        spy.to_csv(output)
+    logging.info('===' * 50)
+    logging.info(spy.to_string())
+    logging.info('===' * 50)
+
+
+@click.command()
+@click.argument('path', type=click.STRING)
+@click.option('--url', type=click.STRING, default='http://localhost:9999/sparql')
+@click.option('--graph', type=click.STRING, default='http://example.com/wdbench')
+@click.option('--timeout', type=click.INT, default=0)
+@click.option('--force-order/--free-order', default=False)
+@click.option('--verbose/--quiet', default=False)
+@click.option('--results', type=click.Path(exists=False), default=None)
+@click.option('--metrics', type=click.Path(exists=False), default=None)
+@click.option('--stream/--no-stream', default=False)
+@click.option('--format', type=click.Choice(['json', 'tsv']), default='json')
+def blazegraph_run(
+    path, url, graph, force_order, timeout, verbose, results, metrics, stream, format
+):
+    initialize_logging(verbose)
+    spy = Spy()
+    blazegraph = Blazegraph(url, graph)
+    query_file = glob.glob(path)[0]
+    with open(query_file, 'r') as reader:
+        query = reader.read()
+    if stream:
+        blazegraph.stream(
+            query, spy, force_order=force_order, timeout=timeout, format=format,
+            output=results)
+    else:
+        solutions = blazegraph.execute(query, spy, force_order=force_order, timeout=timeout)
+        if solutions is not None and results is not None:
+            with open(results, 'w') as writer:
+                json.dump(solutions, writer, indent=2)
+    if metrics is not None:
+        spy.to_csv(metrics)
+    logging.info('===' * 50)
+    logging.info(spy.to_string())
+    logging.info('===' * 50)
+
+
+@click.command()
+@click.argument('path', type=click.STRING)
+@click.option('--url', type=click.STRING, default='http://localhost:9999/sparql')
+@click.option('--graph', type=click.STRING, default='http://example.com/wdbench')
+@click.option('--distinct', type=click.BOOL, default=False)
+@click.option('--force-order/--free-order', default=False)
+@click.option('--verbose/--quiet', default=False)
+def blazegraph_count(path, url, graph, distinct, force_order, verbose):
+    initialize_logging(verbose)
+    spy = Spy()
+    blazegraph = Blazegraph(url, graph)
+    query_file = glob.glob(path)[0]
+    with open(query_file, 'r') as reader:
+        query = reader.read()
+    blazegraph.count(query, spy, distinct=distinct, force_order=force_order)
+    logging.info('===' * 50)
+    logging.info(spy.to_string())
+    logging.info('===' * 50)
@@ -0,0 +1,48 @@
+import logging
+
+import click
+
+from endpoint import Virtuoso, Blazegraph
+from load_test import LoadTest, query_name
+from commands.common import initialize_logging, list_files
+
+
+@click.command()
+@click.argument('path', type=click.STRING)
+@click.argument('endpoint', type=click.Choice(['virtuoso', 'blazegraph']))
+@click.option('--url', type=click.STRING, default='http://localhost:8890/sparql')
+@click.option('--graph', type=click.STRING, default='http://example.com/wdbench')
+@click.option('--qps', type=click.FLOAT, default=0.0)
+@click.option('--concurrency', type=click.INT, default=8)
+@click.option('--num-requests', type=click.INT, default=0)
+@click.option('--duration', type=click.FLOAT, default=0.0)
+@click.option('--timeout', type=click.INT, default=0)
+@click.option('--force-order/--free-order', default=False)
+@click.option('--stream/--no-stream', default=False)
+@click.option('--format', type=click.Choice(['json', 'tsv']), default='json')
+@click.option('--seed', type=click.INT, default=0)
+@click.option('--verbose/--quiet', default=False)
+@click.option('--metrics', type=click.Path(exists=False), default=None)
+def load_test(
+    path, endpoint, url, graph, qps, concurrency, num_requests, duration, timeout,
+    force_order, stream, format, seed, verbose, metrics
+):
+    initialize_logging(verbose)
+    if endpoint == 'virtuoso':
+        endpoint = Virtuoso(url, graph, pool_size=concurrency)
+    else:
+        endpoint = Blazegraph(url, graph, pool_size=concurrency)
+    queries = {}
+    for filename in sorted(list_files(path)):
+        with open(filename, 'r') as reader:
+            queries[query_name(filename)] = reader.read()
+    load_test = LoadTest(
+        endpoint, queries, qps=qps, concurrency=concurrency, num_requests=num_requests,
+        duration=duration, timeout=timeout, force_order=force_order, stream=stream,
+        format=format, seed=seed)
+    spy = load_test.run()
+    if metrics is not None:
+        spy.to_csv(metrics)
+    logging.info('===' * 50)
+    logging.info(spy.to_string())
+    logging.info('===' * 50)
@@ -0,0 +1,60 @@
+import os
+import glob
+import logging
+import time
+
+import click
+
+import utils
+import rewrite
+
+from spy import Spy
+from hdt_connector import HDTConnector
+from local_engine import DISTINCT, LocalEngine, flatten, load_plan
+from results import ResultConsumer
+from commands.common import initialize_logging
+
+
+@click.command()
+@click.argument('path', type=click.STRING)
+@click.option('--graph', type=click.STRING, default='wdbench')
+@click.option('--timeout', type=click.INT, default=0)
+@click.option('--distinct/--all', default=True)
+@click.option('--verbose/--quiet', default=False)
+@click.option('--results', type=click.Path(exists=False), default=None)
+@click.option('--metrics', type=click.Path(exists=False), default=None)
+def local_run(path, graph, timeout, distinct, verbose, results, metrics):
+    initialize_logging(verbose)
+    spy = Spy()
+    engine = LocalEngine(HDTConnector(graph), timeout=timeout)
+    query_file = glob.glob(path)[0]
+    with open(query_file, 'r') as reader:
+        text = reader.read()
+    distinct = distinct or DISTINCT.search(text) is not None
+    name = os.path.basename(query_file).split('.')[0]
+    query = utils.parse_query(flatten(DISTINCT.sub('SELECT ', text)), name=name)
+    plan = load_plan(rewrite.bind_values(query), text)
+    logging.debug(plan.stringify('local'))
+    variables = sorted(plan.variables.union(plan.bindings.keys()))
+    consumer = ResultConsumer(variables, output=results)
+    start_time = time.time()
+    try:
+        consumer.consume_all(engine.execute(plan, distinct=distinct, variables=variables))
+        status = 'ok'
+    except TimeoutError as error:
+        logging.error(error)
+        status = 'timeout'
+    finally:
+        consumer.close()
+    elapsed_time = time.time() - start_time
+    spy.report('', 'status', status)
+    spy.report('', 'execution_time', elapsed_time)
+    spy.report('', 'num_solutions', consumer.num_solutions)
+    spy.report('', 'fingerprint', consumer.fingerprint)
+    spy.report('', 'lookups', engine.lookups)
+    spy.report('', 'intermediates', engine.intermediates)
+    if metrics is not None:
+        spy.to_csv(metrics)
+    logging.info('===' * 50)
+    logging.info(spy.to_string())
+    logging.info('===' * 50)
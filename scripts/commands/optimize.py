@@ -0,0 +1,160 @@
+import glob
+import logging
+import time
+
+import click
+
+import utils
+import rewrite
+
+from spy import Spy
+from endpoint import Virtuoso
+from estimators.exact_count import ExactCountEstimator
+from estimators.random_walks import RandomWalksEstimator
+from estimators.virtuoso_cost import VirtuosoCostEstimator
+from hdt_connector import HDTConnector
+from plan_cache import PlanCache
+from count_store import CountStore
+from workload import build_estimator, build_cost_model, build_optimizer, optimize_query
+from commands.common import initialize_logging
+
+
+@click.command()
+@click.argument('path', type=click.STRING)
+@click.argument('target', type=click.Choice(['virtuoso', 'blazegraph', 'local']))
+@click.option('--graph', type=click.STRING, default='wdbench')
+@click.option('--estimator', type=click.Choice(['random-walks', 'void']), default='random-walks')
+@click.option('--optimizer', type=click.Choice(['greedy', 'hgreedy', 'dp', 'idp', 'bushy']), default='greedy')
+@click.option('--num-walks', type=click.INT, default=10000)
+@click.option('--max-depth', type=click.INT, default=5)
+@click.option('--relaxe-stars', type=click.BOOL, default=True)
+@click.option('--optimize-walk-plans', type=click.BOOL, default=True)
+@click.option('--rewrite-filters', type=click.BOOL, default=True)
+@click.option('--histograms', type=click.BOOL, default=True)
+@click.option('--prior-strength', type=click.FloatRange(min=0.0), default=0.0)
+@click.option('--beam-size', type=click.INT, default=1)
+@click.option('--beam-extra', type=click.INT, default=1)
+@click.option('--block-size', type=click.IntRange(min=1), default=3)
+@click.option('--time-budget', type=click.FLOAT, default=0.0)
+@click.option('--cost-model', type=click.Path(exists=True, dir_okay=False), default=None)
+@click.option('--frontier-costs', type=click.BOOL, default=False)
+@click.option('--plan-cache', type=click.Path(dir_okay=False), default=None)
+@click.option('--revalidation-walks', type=click.INT, default=100)
+@click.option('--feedback', type=click.Path(dir_okay=False), default=None)
+@click.option('--verbose/--quiet', default=False)
+@click.option('--output', type=click.Path(exists=True, dir_okay=True, file_okay=False))
+def optimize(
+    path, target, graph, estimator, optimizer, num_walks, max_depth, relaxe_stars,
+    optimize_walk_plans, rewrite_filters, histograms, prior_strength, beam_size, beam_extra,
+    block_size, time_budget, cost_model, frontier_costs, plan_cache, revalidation_walks, feedback,
+    verbose, output
+):
+    initialize_logging(verbose)
+    options = {
+        'estimator': estimator, 'optimizer': optimizer, 'num_walks': num_walks,
+        'max_depth': max_depth, 'relaxe_stars': relaxe_stars,
+        'optimize_walk_plans': optimize_walk_plans, 'beam_size': beam_size,
+        'beam_extra': beam_extra, 'block_size': block_size, 'time_budget': time_budget,
+        'cost_model': cost_model, 'frontier_costs': frontier_costs, 'feedback': feedback,
+        'histograms': histograms, 'prior_strength': prior_strength}
+    connector = HDTConnector(graph)
+    estimator = build_estimator(connector, options)
+    cost_model = build_cost_model(options)
+    optimizer = build_optimizer(estimator, cost_model, options)
+    validator = None
+    if plan_cache is not None:
+        plan_cache = PlanCache(plan_cache)
+        validator = RandomWalksEstimator(
+            connector, num_walks=revalidation_walks, max_depth=max_depth,
+            relaxe_stars=relaxe_stars, optimize_walk_plans=optimize_walk_plans)
+    query = utils.parse_file(glob.glob(path)[0])
+    if rewrite_filters:
+        query = rewrite.rewrite(query)
+    join_order, spy1, spy2 = optimize_query(
+        query, optimizer, estimator, cost_model, plan_cache=plan_cache,
+        validator=validator, relaxe_stars=relaxe_stars)
+    elapsed_time = spy1.get('', 'optimization_time')
+    if output is not None:
+        with open(f'{output}/query.sparql', 'w') as writer:
+            writer.write(join_order.stringify(target))
+        spy1.to_csv(f'{output}/metrics.csv')
+        spy2.to_csv(f'{output}/summary.csv')
+    logging.info('===' * 50)
+    logging.info(spy2.to_string())
+    logging.info('---' * 50)
+    logging.info(join_order.stringify(target))
+    logging.info('---' * 50)
+    logging.info(spy1.to_string())
+    logging.info('---' * 50)
+    logging.info(f'Query optimized in {elapsed_time} seconds')
+    logging.info('===' * 50)
+
+
+@click.command()
+@click.argument('path', type=click.STRING)
+@click.argument('target', type=click.Choice(['virtuoso', 'blazegraph', 'local']))
+@click.option('--url', type=click.STRING, default='http://localhost:8890/sparql')
+@click.option('--graph', type=click.STRING, default='http://example.com/wdbench')
+@click.option('--isql', type=click.STRING, default='localhost:1111')
+@click.option('--estimator', type=click.Choice(['exact-count', 'virtuoso-cost']), default='exact-count')
+@click.option('--timeout', type=click.INT, default=0)
+@click.option('--relaxe-stars', type=click.BOOL, default=True)
+@click.option('--rewrite-filters', type=click.BOOL, default=True)
+@click.option('--optimizer', type=click.Choice(['greedy', 'hgreedy', 'dp', 'idp', 'bushy']), default='greedy')
+@click.option('--beam-size', type=click.INT, default=1)
+@click.option('--beam-extra', type=click.INT, default=1)
+@click.option('--block-size', type=click.IntRange(min=1), default=3)
+@click.option('--time-budget', type=click.FLOAT, default=0.0)
+@click.option('--cost-model', type=click.Path(exists=True, dir_okay=False), default=None)
+@click.option('--frontier-costs', type=click.BOOL, default=False)
+@click.option('--concurrency', type=click.INT, default=8)
+@click.option('--count-store', type=click.Path(dir_okay=False), default=None)
+@click.option('--batch-size', type=click.IntRange(min=1), default=16)
+@click.option('--verbose/--quiet', default=False)
+@click.option('--output', type=click.Path(exists=True, dir_okay=True, file_okay=False))
+def groundtruth_optimize(
+    path, target, url, graph, isql, estimator, timeout, relaxe_stars, rewrite_filters,
+    optimizer, beam_size, beam_extra, block_size, time_budget, cost_model, frontier_costs,
+    concurrency, count_store, batch_size, verbose, output
+):
+    initialize_logging(verbose)
+    endpoint = Virtuoso(url, graph, pool_size=concurrency, isql=isql)
+    if count_store is not None:
+        count_store = CountStore(count_store)
+    if estimator == 'virtuoso-cost':
+        estimator = VirtuosoCostEstimator(endpoint)
+    else:
+        estimator = ExactCountEstimator(
+            endpoint, timeout=timeout, relaxe_stars=relaxe_stars, concurrency=concurrency,
+            count_store=count_store, batch_size=batch_size)
+    options = {
+        'optimizer': optimizer, 'beam_size': beam_size, 'beam_extra': beam_extra,
+        'block_size': block_size, 'time_budget': time_budget, 'cost_model': cost_model,
+        'frontier_costs': frontier_costs}
+    cost_model = build_cost_model(options)
+    optimizer = build_optimizer(estimator, cost_model, options)
+    query = utils.parse_file(glob.glob(path)[0])
+    if rewrite_filters:
+        query = rewrite.rewrite(query)
+    start = time.time()
+    join_order = optimizer.run(query)
+    elapsed_time = time.time() - start
+    spy = Spy()
+    spy.report('', 'optimization_time', elapsed_time)
+    spy.report('', 'cost', join_order.cost)
+    spy.report('', 'support', join_order.support)
+    spy.report('', 'cardinality', join_order.cardinality)
+    spy.report('', 'epsilon', join_order.epsilon)
+    for operator, value in cost_model.features(join_order).items():
+        spy.report('', f'{operator}_cardinality', value)
+    if output is not None:
+        with open(f'{output}/query.sparql', 'w') as writer:
+            writer.write(join_order.stringify(target))
+        spy.to_csv(f'{output}/metrics.csv')
+    logging.info('===' * 50)
+    logging.info(join_order.stringify(target))
+    logging.info('---' * 50)
+    logging.info(spy.to_string())
+    logging.info('---' * 50)
+    logging.info(f'Query optimized in {elapsed_time} seconds')
+    logging.info('===' * 50)
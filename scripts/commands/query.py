@@ -0,0 +1,44 @@
+import glob
+import logging
+
+import click
+
+import utils
+
+from hdt_connector import HDTConnector
+from commands.common import initialize_logging
+
+
+@click.command()
+@click.argument('path', type=click.STRING)
+@click.argument('target', type=click.Choice(['virtuoso', 'blazegraph', 'local']))
+@click.option('--verbose/--quiet', default=False)
+@click.option('--output', type=click.Path(exists=False), default=None)
+def prepare_query(path, target, verbose, output):
+    initialize_logging(verbose)
+    query = utils.parse_file(glob.glob(path)[0])
+    if output is not None:
+        with open(output, 'w') as writer:
+            writer.write(query.stringify(target))
+    logging.info('===' * 50)
+    logging.info(query.stringify(target))
+    logging.info('===' * 50)
+
+
+@click.command()
+@click.argument('subject', type=click.STRING)
+@click.argument('predicate', type=click.STRING)
+@click.argument('object', type=click.STRING)
+@click.option('--graph', type=click.STRING, default='http://example.com/wdbench')
+@click.option('--limit', type=click.INT, default=0)
+def scan(subject, predicate, object, graph, limit):
+    connector = HDTConnector(graph)
+    iterator = connector.create_iterator(subject, predicate, object)
+    offset = 0
+    while iterator.next() and (limit == 0 or offset < limit):
+        if offset > 0:
+            print('---' * 50)
+        print(f'subject: {iterator.subject()}')
+        print(f'predicate: {iterator.predicate()}')
+        print(f'object: {iterator.object()}')
+        offset = iterator.get_offset
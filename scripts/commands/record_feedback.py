@@ -0,0 +1,62 @@
+import glob
+import logging
+import os
+
+import click
+import pandas
+
+from count_store import CountStore
+from feedback import FeedbackStore
+from commands.common import initialize_logging
+
+
+@click.command()
+@click.argument('summaries', type=click.STRING)
+@click.option('--feedback', type=click.Path(dir_okay=False), required=True)
+@click.option('--count-store', type=click.Path(exists=True, dir_okay=False), default=None)
+@click.option('--graph', type=click.STRING, default='http://example.com/wdbench')
+@click.option('--verbose/--quiet', default=False)
+def record_feedback(summaries, feedback, count_store, graph, verbose):
+    initialize_logging(verbose)
+    feedback = FeedbackStore(feedback)
+    if count_store is not None:
+        count_store = CountStore(count_store)
+    num_counts, num_executions = 0, 0
+    for filename in glob.glob(summaries):
+        df = pandas.read_csv(filename)
+        if 'subplan' not in df:
+            logging.error(f'{filename}: summary without subplans, skipped')
+            continue
+        observed = {}
+        if count_store is not None:
+            for _, row in df.iterrows():
+                cached = count_store.get(graph, row['subplan'])
+                if cached is not None and cached[0] == 'ok':
+                    observed[row['subplan']] = ('count', cached[1])
+        selected = df[df['selected']]
+        final = selected[selected['num_joins'] == selected['num_joins'].max()]
+        for execution in glob.glob(f'{os.path.dirname(filename)}/[0-9]*.csv'):
+            runs = pandas.read_csv(execution)
+            runs = runs[runs['status'] == 'ok']
+            for _, row in final.iterrows():
+                if len(runs) > 0 and row['subplan'] not in observed:
+                    observed[row['subplan']] = ('execution', runs['num_solutions'].iloc[0])
+        for _, row in df.drop_duplicates('subplan').iterrows():
+            if row['subplan'] not in observed:
+                continue
+            if pandas.isna(row.get('correction', 1.0)):
+                continue
+            source, cardinality = observed[row['subplan']]
+            estimated = row['cardinality'] / row.get('correction', 1.0)
+            feedback.record(
+                row['subplan'], row['signature'], str(row['predicates']).split(' '),
+                estimated, cardinality, source=source)
+            if source == 'count':
+                num_counts += 1
+            else:
+                num_executions += 1
+    logging.info('===' * 50)
+    logging.info(f'{num_counts} exact counts and {num_executions} executions recorded')
+    for name, value in feedback.statistics().items():
+        logging.info(f'{name}: {value}')
+    logging.info('===' * 50)
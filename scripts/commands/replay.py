@@ -0,0 +1,37 @@
+import logging
+
+import click
+
+from replay_server import ReplayServer
+from commands.common import initialize_logging
+
+
+@click.command()
+@click.option('--host', type=click.STRING, default='localhost')
+@click.option('--port', type=click.INT, default=8890)
+@click.option('--mode', type=click.Choice(['replay', 'record', 'hdt']), default='replay')
+@click.option('--store', type=click.Path(dir_okay=False), default=None)
+@click.option('--upstream', type=click.STRING, default=None)
+@click.option('--graph', type=click.STRING, default=None)
+@click.option('--dialect', type=click.Choice(['virtuoso', 'blazegraph']), default='virtuoso')
+@click.option('--latency', type=click.FLOAT, default=None)
+@click.option('--latency-scale', type=click.FLOAT, default=1.0)
+@click.option('--timeout-rate', type=click.FLOAT, default=0.0)
+@click.option('--seed', type=click.INT, default=0)
+@click.option('--verbose/--quiet', default=False)
+def replay_server(
+    host, port, mode, store, upstream, graph, dialect, latency, latency_scale, timeout_rate,
+    seed, verbose
+):
+    initialize_logging(verbose)
+    if mode == 'record' and upstream is None:
+        raise click.BadParameter('--upstream is required in record mode')
+    server = ReplayServer(
+        (host, port), mode=mode, store=store, upstream=upstream, graph=graph,
+        dialect=dialect, latency=latency, latency_scale=latency_scale,
+        timeout_rate=timeout_rate, seed=seed)
+    logging.info(f'replay server ({mode}, {dialect}) listening on http://{host}:{port}/sparql')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        server.server_close()
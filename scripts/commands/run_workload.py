@@ -0,0 +1,232 @@
+import logging
+import os
+import time
+
+import click
+import yaml
+
+from typing import Any, Dict
+from concurrent.futures import ProcessPoolExecutor
+
+from spy import Spy
+from results_store import ResultsStore
+from endpoint import Virtuoso, Blazegraph
+from workload import initialize_worker, optimize_file, optimize_experiments
+from commands.common import initialize_logging, list_files
+
+
+@click.command()
+@click.argument('workload', type=click.Path(exists=True, dir_okay=True, file_okay=False))
+@click.argument('endpoint', type=click.Choice(['virtuoso', 'blazegraph']))
+@click.option('--graph', type=click.STRING, default='wdbench')
+@click.option('--url', type=click.STRING, default='http://localhost:8890/sparql')
+@click.option('--endpoint-graph', type=click.STRING, default='http://example.com/wdbench')
+@click.option('--xp', type=click.STRING, default='')
+@click.option('--estimator', type=click.Choice(['random-walks', 'void']), default='random-walks')
+@click.option('--optimizer', type=click.Choice(['greedy', 'hgreedy', 'dp', 'idp', 'bushy']), default='greedy')
+@click.option('--num-walks', type=click.INT, default=10000)
+@click.option('--max-depth', type=click.INT, default=5)
+@click.option('--relaxe-stars', type=click.BOOL, default=True)
+@click.option('--optimize-walk-plans', type=click.BOOL, default=True)
+@click.option('--rewrite-filters', type=click.BOOL, default=True)
+@click.option('--histograms', type=click.BOOL, default=True)
+@click.option('--prior-strength', type=click.FloatRange(min=0.0), default=0.0)
+@click.option('--beam-size', type=click.INT, default=1)
+@click.option('--beam-extra', type=click.INT, default=1)
+@click.option('--block-size', type=click.IntRange(min=1), default=3)
+@click.option('--time-budget', type=click.FLOAT, default=0.0)
+@click.option('--cost-model', type=click.Path(exists=True, dir_okay=False), default=None)
+@click.option('--frontier-costs', type=click.BOOL, default=False)
+@click.option('--plan-cache', type=click.Path(dir_okay=False), default=None)
+@click.option('--revalidation-walks', type=click.INT, default=100)
+@click.option('--feedback', type=click.Path(dir_okay=False), default=None)
+@click.option('--timeout', type=click.INT, default=0)
+@click.option('--force-order/--free-order', default=False)
+@click.option('--stream/--no-stream', default=False)
+@click.option('--format', type=click.Choice(['json', 'tsv']), default='json')
+@click.option('--runs', type=click.INT, default=1)
+@click.option('--workers', type=click.INT, default=1)
+@click.option('--results-db', type=click.Path(dir_okay=False), default=None)
+@click.option('--verbose/--quiet', default=False)
+@click.option('--output', type=click.Path(exists=True, dir_okay=True, file_okay=False), required=True)
+def run_workload(
+    workload, endpoint, graph, url, endpoint_graph, xp, estimator, optimizer, num_walks,
+    max_depth, relaxe_stars, optimize_walk_plans, rewrite_filters, histograms, prior_strength,
+    beam_size, beam_extra, block_size, time_budget, cost_model, frontier_costs, plan_cache,
+    revalidation_walks, feedback, timeout, force_order, stream, format, runs, workers,
+    results_db, verbose, output
+):
+    initialize_logging(verbose)
+    options = {
+        'graph': graph, 'target': endpoint, 'estimator': estimator, 'optimizer': optimizer,
+        'num_walks': num_walks, 'max_depth': max_depth, 'relaxe_stars': relaxe_stars,
+        'optimize_walk_plans': optimize_walk_plans, 'beam_size': beam_size,
+        'beam_extra': beam_extra, 'block_size': block_size, 'time_budget': time_budget,
+        'cost_model': cost_model, 'frontier_costs': frontier_costs, 'plan_cache': plan_cache,
+        'revalidation_walks': revalidation_walks, 'feedback': feedback,
+        'rewrite_filters': rewrite_filters, 'histograms': histograms,
+        'prior_strength': prior_strength}
+    workload_name = os.path.basename(os.path.normpath(workload))
+    parameters = {
+        'endpoint': endpoint, 'estimator': estimator, 'optimizer': optimizer,
+        'num_walks': num_walks, 'max_depth': max_depth, 'beam_size': beam_size,
+        'beam_extra': beam_extra, 'relaxe_stars': relaxe_stars,
+        'optimize_walk_plans': optimize_walk_plans, 'rewrite_filters': rewrite_filters,
+        'histograms': histograms}
+    if endpoint == 'virtuoso':
+        endpoint = Virtuoso(url, endpoint_graph)
+    else:
+        endpoint = Blazegraph(url, endpoint_graph)
+    store = ResultsStore(results_db) if results_db is not None else None
+    files = sorted(list_files(workload))
+    optimization_time, execution_time = 0.0, 0.0
+    start_time = time.time()
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=initialize_worker, initargs=(options,)
+    ) as executor:
+        futures = [executor.submit(optimize_file, filename) for filename in files]
+        for future in futures:
+            name, query, spy1, spy2 = future.result()
+            optimization_time += spy1.get('', 'optimization_time')
+            os.makedirs(f'{output}/{name}', exist_ok=True)
+            with open(f'{output}/{name}/query.sparql', 'w') as writer:
+                writer.write(query)
+            spy1.to_csv(f'{output}/{name}/metrics.csv')
+            spy2.to_csv(f'{output}/{name}/summary.csv')
+            if store is not None:
+                columns = {'workload': workload_name, 'xp': xp, 'query': name}
+                store.append(
+                    'summaries', f'{workload_name}/{xp}/{name}', spy2, columns | parameters)
+            for run in range(1, runs + 1):
+                spy = Spy()
+                if stream:
+                    endpoint.stream(
+                        query, spy, force_order=force_order, timeout=timeout, format=format)
+                else:
+                    endpoint.execute(query, spy, force_order=force_order, timeout=timeout)
+                execution_time += spy.get('', 'execution_time')
+                spy.to_csv(f'{output}/{name}/{run}.csv')
+                row = Spy()
+                columns = {'workload': workload_name, 'xp': xp, 'query': name, 'run': run}
+                for column, value in (columns | parameters).items():
+                    row.report('', column, value)
+                for source in [spy1, spy]:
+                    for column in source.columns:
+                        row.report('', column, source.get('', column))
+                row.to_csv(f'{output}/{name}.{run}.csv')
+                if store is not None:
+                    store.append('metrics', f'{workload_name}/{xp}/{name}.{run}', row)
+                logging.debug(
+                    f'{name} (run {run}): {spy.get("", "status")} in '
+                    f'{spy.get("", "execution_time")} seconds')
+    elapsed_time = time.time() - start_time
+    logging.info('===' * 50)
+    logging.info(f'{len(files)} queries optimized in {optimization_time} seconds')
+    logging.info(f'{len(files) * runs} executions in {execution_time} seconds')
+    logging.info(f'Workload processed in {elapsed_time} seconds')
+    logging.info('===' * 50)
+
+
+def experiment_options(config: Dict[str, Any], xp: str) -> Dict[str, Any]:
+    experiment = config['experiments'][xp]
+    return {
+        'graph': config['graphs'][experiment['workload']]['hdt'],
+        'target': experiment['endpoint'], 'estimator': experiment['estimator'],
+        'optimizer': experiment.get('optimizer', 'greedy'),
+        'num_walks': experiment.get('num_walks', 10000),
+        'max_depth': experiment.get('max_depth', 5),
+        'relaxe_stars': experiment.get('relaxe_stars', True),
+        'optimize_walk_plans': experiment.get('optimize_walk_plans', True),
+        'beam_size': experiment.get('beam_size', 1),
+        'beam_extra': experiment.get('beam_extra', 1),
+        'block_size': experiment.get('block_size', 3),
+        'time_budget': experiment.get('time_budget', 0.0),
+        'cost_model': experiment.get('cost_model', None),
+        'frontier_costs': experiment.get('frontier_costs', False),
+        'feedback': config.get('feedback', None),
+        'rewrite_filters': experiment.get('rewrite_filters', True),
+        'histograms': experiment.get('histograms', True),
+        'prior_strength': experiment.get('prior_strength', 0.0)}
+
+
+def experiment_parameters(config: Dict[str, Any], xp: str) -> Dict[str, Any]:
+    experiment = config['experiments'][xp]
+    columns = [
+        'endpoint', 'estimator', 'optimizer', 'num_walks', 'max_depth', 'beam_size',
+        'beam_extra', 'relaxe_stars', 'optimize_walk_plans']
+    return {column: experiment[column] for column in columns if column in experiment}
+
+
+@click.command()
+@click.argument('workload', type=click.Path(exists=True, dir_okay=True, file_okay=False))
+@click.argument('config', type=click.Path(exists=True, dir_okay=False, file_okay=True))
+@click.option('--xp', type=click.STRING, multiple=True)
+@click.option('--workers', type=click.INT, default=1)
+@click.option('--overwrite/--keep-existing', default=False)
+@click.option('--results-db', type=click.Path(dir_okay=False), default=None)
+@click.option('--verbose/--quiet', default=False)
+@click.option('--output', type=click.Path(exists=True, dir_okay=True, file_okay=False), default='output')
+def optimize_workload(workload, config, xp, workers, overwrite, results_db, verbose, output):
+    initialize_logging(verbose)
+    with open(config, 'r') as reader:
+        config = yaml.safe_load(reader)
+    workload_name = os.path.basename(os.path.normpath(workload))
+    if len(xp) == 0:
+        xp = [
+            name for name, experiment in config['experiments'].items()
+            if experiment['workload'] == workload_name
+            and experiment['estimator'] in ['random-walks', 'void']
+            and ('runonly' not in config or name in config['runonly'])]
+    for name in xp:
+        if config['experiments'][name]['workload'] != workload_name:
+            raise click.BadParameter(
+                f'{name} is not an experiment on {workload_name}', param_hint='--xp')
+    experiments = {name: experiment_options(config, name) for name in xp}
+    store = ResultsStore(results_db) if results_db is not None else None
+    tasks = {}
+    for filename in sorted(list_files(workload)):
+        query = os.path.basename(filename).rsplit('.', 1)[0]
+        todo = {}
+        for name, options in experiments.items():
+            directory = f'{output}/{workload_name}/experiments/{name}/{query}'
+            if overwrite or not os.path.exists(f'{directory}/summary.csv'):
+                todo[name] = options
+        if len(todo) > 0:
+            tasks[filename] = todo
+    optimization_time, num_plans, num_failures = 0.0, 0, 0
+    start_time = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=initialize_worker) as executor:
+        futures = {
+            filename: executor.submit(optimize_experiments, filename, todo)
+            for filename, todo in tasks.items()}
+        for filename, future in futures.items():
+            try:
+                results = future.result()
+            except Exception as error:
+                num_failures += 1
+                logging.error(f'{filename} failed: {error}')
+                continue
+            for name, (query, plan, spy1, spy2) in results.items():
+                directory = f'{output}/{workload_name}/experiments/{name}/{query}'
+                os.makedirs(directory, exist_ok=True)
+                with open(f'{directory}/query.sparql', 'w') as writer:
+                    writer.write(plan)
+                spy1.to_csv(f'{directory}/metrics.csv')
+                spy2.to_csv(f'{directory}/summary.csv')
+                if store is not None:
+                    columns = {'workload': workload_name, 'xp': name, 'query': query}
+                    columns |= experiment_parameters(config, name)
+                    store.append('optimizations', f'{workload_name}/{name}/{query}', spy1, columns)
+                    store.append('summaries', f'{workload_name}/{name}/{query}', spy2, columns)
+                optimization_time += spy1.get('', 'optimization_time')
+                num_plans += 1
+                logging.debug(
+                    f'{query} ({name}): optimized in '
+                    f'{spy1.get("", "optimization_time")} seconds')
+    elapsed_time = time.time() - start_time
+    logging.info('===' * 50)
+    logging.info(f'{num_plans} plans for {len(experiments)} experiments')
+    logging.info(f'{num_failures} queries failed')
+    logging.info(f'Plans optimized in {optimization_time} seconds')
+    logging.info(f'Workload processed in {elapsed_time} seconds')
+    logging.info('===' * 50)
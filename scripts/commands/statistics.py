@@ -0,0 +1,102 @@
+import asyncio
+import logging
+import os
+import time
+
+import click
+
+import utils
+
+from spy import Spy
+from endpoint import Virtuoso
+from hdt_connector import HDTConnector
+from literal_statistics import LiteralStatistics
+from commands.common import initialize_logging
+
+
+@click.command()
+@click.argument('workload', type=click.Path(exists=True, dir_okay=True, file_okay=False))
+@click.option('--url', type=click.STRING, default='http://localhost:8890/sparql')
+@click.option('--graph', type=click.STRING, default='http://example.com/wdbench')
+@click.option('--verbose/--quiet', default=False)
+@click.option('--metrics', type=click.Path(exists=False), default=None)
+@click.option('--concurrency', type=click.INT, default=8)
+def workload_statistics(workload, url, graph, verbose, metrics, concurrency):
+    initialize_logging(verbose)
+    spy = Spy()
+    virtuoso = Virtuoso(url, graph, pool_size=concurrency)
+    queries = [
+        utils.parse_file(f'{workload}/{filename}') for filename in os.listdir(workload)]
+    counts = asyncio.run(virtuoso.count_many(
+        [str(query) for query in queries], concurrency=concurrency, distinct=True))
+    for index, (query, num_solutions) in enumerate(zip(queries, counts)):
+        num_filters = len(query.filters)
+        num_triple_patterns = 0
+        num_path_patterns = 0
+        num_constants = 0
+        join_variables = set()
+        for pattern in query.patterns:
+            if pattern.more:
+                num_path_patterns += 1
+            else:
+                num_triple_patterns += 1
+            if pattern.subject[0] != '?':
+                num_constants += 1
+            if pattern.object[0] != '?':
+                num_constants += 1
+            variables = set()
+            for other in query.patterns:
+                if pattern == other:
+                    continue
+                variables.update(other.variables)
+            join_variables.update(pattern.variables.intersection(variables))
+        num_join_variables = len(join_variables)
+        spy.report(query.name, 'query', query.name)
+        spy.report(query.name, 'num_filters', num_filters)
+        spy.report(query.name, 'num_triple_patterns', num_triple_patterns)
+        spy.report(query.name, 'num_path_patterns', num_path_patterns)
+        spy.report(query.name, 'num_join_variables', num_join_variables)
+        spy.report(query.name, 'num_constants', num_constants)
+        spy.report(query.name, 'num_solutions', num_solutions)
+        if index > 0:
+            logging.debug('---' * 50)
+        logging.debug(f'query: {query.name}')
+        logging.debug(f'number of filters: {num_filters}')
+        logging.debug(f'number of triple patterns: {num_triple_patterns}')
+        logging.debug(f'number of path patterns: {num_path_patterns}')
+        logging.debug(f'number of join variables: {num_join_variables}')
+        logging.debug(f'number of constants: {num_constants}')
+        logging.debug(f'number of solutions: {num_solutions}')
+    if metrics is not None:
+        spy.to_csv(metrics)
+    print(spy.to_string())
+
+
+@click.command()
+@click.option('--graph', type=click.STRING, default='wdbench')
+@click.option('--predicate', type=click.STRING, multiple=True)
+@click.option('--num-samples', type=click.INT, default=10000)
+@click.option('--num-buckets', type=click.INT, default=64)
+@click.option('--prefix-length', type=click.INT, default=4)
+@click.option('--max-prefixes', type=click.INT, default=1000)
+@click.option('--verbose/--quiet', default=False)
+@click.option('--output', type=click.Path(exists=False, dir_okay=False), default=None)
+def build_histograms(
+    graph, predicate, num_samples, num_buckets, prefix_length, max_prefixes, verbose, output
+):
+    initialize_logging(verbose)
+    start = time.time()
+    connector = HDTConnector(graph)
+    statistics = LiteralStatistics.build(
+        connector, list(predicate), num_samples=num_samples, num_buckets=num_buckets,
+        prefix_length=prefix_length, max_prefixes=max_prefixes)
+    if output is None:
+        output = f'data/{graph}.histograms.json'
+    statistics.save(output)
+    elapsed_time = time.time() - start
+    logging.info('===' * 50)
+    logging.info(f'predicates: {len(statistics.histograms)}')
+    logging.info(f'output: {output}')
+    logging.info('---' * 50)
+    logging.info(f'time: {elapsed_time} seconds')
+    logging.info('===' * 50)
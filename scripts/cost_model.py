@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import json
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Tuple, Union, TYPE_CHECKING
+
+from selectivity import selectivity
+
+if TYPE_CHECKING:
+    from join_order import JoinOrder
+    from bushy_join_order import BushyJoinOrder
+
+
+OPERATORS = [
+    'scan', 'index_join', 'forward_closure', 'reverse_closure', 'filter', 'hash_join']
+
+
+class CostModel(ABC):
+
+    def operator(self, join_order: JoinOrder) -> str:
+        if join_order.pattern.is_filter():
+            return 'filter'
+        elif join_order.pattern.is_multiset():
+            return 'scan' if join_order.previous.pattern is None else 'filter'
+        elif join_order.pattern.is_triple() and join_order.pattern.more:
+            return 'forward_closure' if join_order.gearing == 1 else 'reverse_closure'
+        elif join_order.previous.pattern is None:
+            return 'scan'
+        return 'index_join'
+
+    def expansion(self, join_order: JoinOrder) -> JoinOrder:
+        while join_order.previous.previous is not None and self.operator(join_order) == 'filter':
+            join_order = join_order.previous
+        return join_order
+
+    def steps(self, join_order: JoinOrder) -> List[Tuple[str, float]]:
+        expansion = self.expansion(join_order)
+        cardinalities = [join_order.cardinality]
+        traversal = join_order.traversal
+        while join_order is not expansion:
+            if join_order.previous.cardinality > 0 or cardinalities[0] == 0:
+                cardinalities.insert(0, join_order.previous.cardinality)
+            else:
+                cardinalities.insert(0, cardinalities[0] / selectivity(join_order.pattern))
+            join_order = join_order.previous
+            traversal = max(traversal, join_order.traversal)
+        steps = [(self.operator(expansion), max(
+            expansion.previous.cardinality, cardinalities[0], traversal))]
+        for cardinality in cardinalities[:-1]:
+            steps.append(('filter', cardinality))
+        return steps
+
+    def features(self, plan: Union[JoinOrder, BushyJoinOrder]) -> Dict[str, float]:
+        from bushy_join_order import BushyJoinOrder
+
+        features = {operator: 0.0 for operator in OPERATORS}
+        if isinstance(plan, BushyJoinOrder):
+            for child in [plan.left, plan.right]:
+                for operator, value in self.features(child).items():
+                    features[operator] += value
+            features['hash_join'] += max(
+                plan.left.cardinality, plan.right.cardinality, plan.cardinality)
+        else:
+            join_order = plan
+            while join_order.previous is not None:
+                for operator, value in self.steps(join_order):
+                    features[operator] += value
+                join_order = self.expansion(join_order).previous
+        return features
+
+    @abstractmethod
+    def cost(self, join_order: JoinOrder) -> float:
+        pass
+
+    @abstractmethod
+    def join_cost(self, plan: BushyJoinOrder) -> float:
+        pass
+
+
+class CoutCostModel(CostModel):
+
+    def cost(self, join_order: JoinOrder) -> float:
+        if join_order.previous is None:
+            return join_order.cardinality
+        return join_order.previous.cost + max(
+            join_order.previous.cardinality, join_order.cardinality)
+
+    def join_cost(self, plan: BushyJoinOrder) -> float:
+        intermediate = max(plan.left.cardinality, plan.right.cardinality, plan.cardinality)
+        return plan.left.cost + plan.right.cost + intermediate
+
+
+class FrontierCostModel(CoutCostModel):
+
+    def cost(self, join_order: JoinOrder) -> float:
+        if join_order.previous is None:
+            return join_order.cardinality
+        steps = self.steps(join_order)
+        return self.expansion(join_order).previous.cost + sum([value for _, value in steps])
+
+
+class CalibratedCostModel(CostModel):
+
+    def __init__(self, coefficients: Dict[str, float], intercept: float = 0.0) -> None:
+        self._coefficients = coefficients
+        self._intercept = intercept
+
+    @property
+    def coefficients(self) -> Dict[str, float]:
+        return self._coefficients
+
+    @property
+    def intercept(self) -> float:
+        return self._intercept
+
+    def cost(self, join_order: JoinOrder) -> float:
+        if join_order.previous is None:
+            return self.intercept
+        cost = self.expansion(join_order).previous.cost
+        for operator, value in self.steps(join_order):
+            cost += self.coefficients.get(operator, 0.0) * value
+        return cost
+
+    def join_cost(self, plan: BushyJoinOrder) -> float:
+        intermediate = max(plan.left.cardinality, plan.right.cardinality, plan.cardinality)
+        coefficient = self.coefficients.get('hash_join', 0.0)
+        return plan.left.cost + plan.right.cost - self.intercept + coefficient * intermediate
+
+    @staticmethod
+    def fit(
+        features: List[Dict[str, float]], execution_times: List[float]
+    ) -> CalibratedCostModel:
+        import numpy as np
+        from scipy.optimize import nnls
+        A = np.array([
+            [row.get(operator, 0.0) for operator in OPERATORS] + [1.0]
+            for row in features])
+        b = np.array(execution_times)
+        x, _ = nnls(A, b)
+        coefficients = {operator: float(x[i]) for i, operator in enumerate(OPERATORS)}
+        return CalibratedCostModel(coefficients, intercept=float(x[-1]))
+
+    @staticmethod
+    def load(filename: str) -> CalibratedCostModel:
+        with open(filename, 'r') as reader:
+            config = json.load(reader)
+        return CalibratedCostModel(config['coefficients'], config['intercept'])
+
+    def save(self, filename: str, **metadata) -> None:
+        config = metadata | {'intercept': self.intercept, 'coefficients': self.coefficients}
+        with open(filename, 'w') as writer:
+            json.dump(config, writer, indent=2)
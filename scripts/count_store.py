@@ -0,0 +1,88 @@
+import re
+import time
+import sqlite3
+
+from typing import Optional, Tuple
+
+
+VARIABLE = re.compile('\\?[A-Za-z0-9_]+')
+
+
+def canonicalize(query: str) -> str:
+    head, body = query.split('{', 1)
+    body, tail = body.rsplit('}', 1)
+    lines = [' '.join(line.split()) for line in body.split('\n')]
+    lines = [line for line in lines if len(line) > 0]
+    variables = [set(VARIABLE.findall(line)) for line in lines]
+    names = {}
+    for _ in range(len(lines) + 1):
+        signatures = [
+            VARIABLE.sub(lambda match: names.get(match.group(0), '?'), line) for line in lines]
+        keys = []
+        for i in range(len(lines)):
+            neighbours = [
+                signatures[j] for j in range(len(lines))
+                if j != i and len(variables[i].intersection(variables[j])) > 0]
+            keys.append(signatures[i] + '#' + '|'.join(sorted(neighbours)))
+        renamed = {}
+        for i in sorted(range(len(lines)), key=lambda i: keys[i]):
+            for variable in VARIABLE.findall(lines[i]):
+                if variable not in renamed:
+                    renamed[variable] = f'?v{len(renamed)}'
+        if renamed == names:
+            break
+        names = renamed
+
+    def rename(match: re.Match) -> str:
+        if match.group(0) not in names:
+            names[match.group(0)] = f'?v{len(names)}'
+        return names[match.group(0)]
+
+    lines = sorted([VARIABLE.sub(rename, line) for line in lines])
+    head, tail = VARIABLE.sub(rename, head), VARIABLE.sub(rename, tail)
+    text = ' '.join(head.split()) + ' { ' + ' '.join(lines) + ' } ' + ' '.join(tail.split())
+    return text.strip()
+
+
+class CountStore():
+
+    def __init__(self, filename: str) -> None:
+        self._connection = sqlite3.connect(filename, timeout=60)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS counts ('
+            'graph TEXT NOT NULL, '
+            'query TEXT NOT NULL, '
+            'status TEXT NOT NULL, '
+            'cardinality INTEGER NOT NULL, '
+            'timeout INTEGER NOT NULL, '
+            'execution_time REAL NOT NULL, '
+            'created REAL NOT NULL, '
+            'PRIMARY KEY (graph, query))')
+        self._connection.commit()
+
+    def get(
+        self, graph: str, query: str, timeout: int = 0
+    ) -> Optional[Tuple[str, int, float]]:
+        row = self._connection.execute(
+            'SELECT status, cardinality, timeout, execution_time FROM counts '
+            'WHERE graph = ? AND query = ?', (graph, canonicalize(query))).fetchone()
+        if row is None:
+            return None
+        status, cardinality, cached_timeout, execution_time = row
+        if status == 'ok':
+            return status, cardinality, execution_time
+        elif status == 'timeout' and 0 < timeout <= cached_timeout:
+            return status, cardinality, execution_time
+        return None
+
+    def put(
+        self, graph: str, query: str, status: str, cardinality: int, timeout: int = 0,
+        execution_time: float = 0.0
+    ) -> None:
+        if status not in ['ok', 'timeout']:
+            return None
+        self._connection.execute(
+            'INSERT OR REPLACE INTO counts VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (graph, canonicalize(query), status, cardinality, timeout, execution_time,
+             time.time()))
+        self._connection.commit()
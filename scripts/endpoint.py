@@ -1,21 +1,36 @@
+import asyncio
 import logging
 import time
 import subprocess
-import tempfile
+import threading
 import re
 
 from abc import ABC, abstractmethod
-from typing import Dict
-from SPARQLWrapper import SPARQLWrapper, JSON
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
 
 from spy import Spy
+from transport import HTTPTransport, DeadlineExceeded
+from results import JSONResultReader, TSVResultReader, ResultConsumer
+
+
+ACCEPT = {
+    'json': 'application/sparql-results+json',
+    'tsv': 'text/tab-separated-values'}
+
+COUNT_ALIAS = '__count'
 
 
 class Endpoint(ABC):
 
-    def __init__(self, url: str, default_graph: str) -> None:
+    def __init__(self, url: str, default_graph: str, **kwargs) -> None:
         self._url = url
         self._default_graph = default_graph
+        self._grace = kwargs.get('grace', 1.0)
+        self._transport = HTTPTransport(
+            url, pool_size=kwargs.get('pool_size', 8),
+            max_retries=kwargs.get('max_retries', 10),
+            backoff=kwargs.get('backoff', 0.1))
 
     @property
     def url(self) -> str:
@@ -25,11 +40,110 @@ class Endpoint(ABC):
     def default_graph(self) -> str:
         return self._default_graph
 
+    @property
+    def transport(self) -> HTTPTransport:
+        return self._transport
+
+    @abstractmethod
+    def prepare(self, query: str, force_order: bool = False) -> str:
+        pass
+
     @abstractmethod
+    def deadline(self, timeout: int) -> Optional[float]:
+        pass
+
     def execute(
         self, query: str, spy: Spy, force_order: bool = False, timeout: int = 0
     ) -> Dict:
-        pass
+        query = self.prepare(query, force_order=force_order)
+
+        logging.debug('###' * 50)
+        logging.debug(query)
+        logging.debug('###' * 50 + '\n')
+
+        parameters = {
+            'query': query,
+            'default-graph-uri': self.default_graph,
+            'timeout': str(timeout)}
+        deadline = self.deadline(timeout)
+        if deadline is not None:
+            deadline += self._grace
+
+        solutions = None
+        start_time = time.time()
+        try:
+            solutions = self.transport.request(parameters, timeout=deadline)
+            status = 'ok'
+        except DeadlineExceeded as error:
+            logging.error(error)
+            status = 'timeout'
+        except Exception as error:
+            logging.error(error)
+            status = 'error'
+        elapsed_time = time.time() - start_time
+        if timeout > 0 and elapsed_time > self.deadline(timeout):
+            status = 'timeout'
+        if solutions is not None:
+            spy.report('', 'num_solutions', len(solutions['results']['bindings']))
+        else:
+            spy.report('', 'num_solutions', 0)
+        spy.report('', 'execution_time', elapsed_time)
+        spy.report('', 'status', status)
+        return solutions
+
+    def stream(
+        self, query: str, spy: Spy, force_order: bool = False, timeout: int = 0,
+        format: str = 'json', output: Optional[str] = None
+    ) -> Optional[ResultConsumer]:
+        query = self.prepare(query, force_order=force_order)
+
+        logging.debug('###' * 50)
+        logging.debug(query)
+        logging.debug('###' * 50 + '\n')
+
+        parameters = {
+            'query': query,
+            'default-graph-uri': self.default_graph,
+            'timeout': str(timeout)}
+        deadline = self.deadline(timeout)
+        if deadline is not None:
+            deadline += self._grace
+        accept = ACCEPT[format]
+
+        consumer = None
+        start_time = time.time()
+        try:
+            chunks = self.transport.stream(parameters, timeout=deadline, accept=accept)
+            try:
+                if format == 'tsv':
+                    reader = TSVResultReader(chunks)
+                else:
+                    reader = JSONResultReader(chunks)
+                consumer = ResultConsumer(reader.variables, output=output)
+                spy.report('', 'first_result_time', time.time() - start_time)
+                consumer.consume_all(reader)
+            finally:
+                chunks.close()
+                if consumer is not None:
+                    consumer.close()
+            status = 'ok'
+        except DeadlineExceeded as error:
+            logging.error(error)
+            status = 'timeout'
+        except Exception as error:
+            logging.error(error)
+            status = 'error'
+        elapsed_time = time.time() - start_time
+        if timeout > 0 and elapsed_time > self.deadline(timeout):
+            status = 'timeout'
+        if consumer is not None:
+            spy.report('', 'num_solutions', consumer.num_solutions)
+            spy.report('', 'fingerprint', consumer.fingerprint)
+        else:
+            spy.report('', 'num_solutions', 0)
+        spy.report('', 'execution_time', elapsed_time)
+        spy.report('', 'status', status)
+        return consumer
 
     def count(
         self, query: str, spy: Spy, force_order: bool = False, distinct: bool = False,
@@ -39,58 +153,189 @@ class Endpoint(ABC):
             select = 'SELECT (COUNT(DISTINCT *) AS ?count) WHERE '
         else:
             select = 'SELECT (COUNT(*) AS ?count) WHERE '
-        query = select + query.split('WHERE')[1]
+        query = select + query.split('WHERE', 1)[1]
         solutions = self.execute(query, spy, force_order=force_order, timeout=timeout)
-        num_solutions = int(solutions['results']['bindings'][0]['count']['value'])
         if spy.get('', 'status') == 'ok':
+            num_solutions = int(solutions['results']['bindings'][0]['count']['value'])
             spy.report('', 'num_solutions', num_solutions)
             return num_solutions
         return 0
 
+    def count_batch(
+        self, queries: List[str], spies: Optional[List[Spy]] = None,
+        force_order: bool = False, distinct: bool = False, timeout: int = 0
+    ) -> List[int]:
+        if spies is None:
+            spies = [Spy() for _ in queries]
+        if len(queries) == 1:
+            return [self.count(
+                queries[0], spies[0], force_order=force_order, distinct=distinct,
+                timeout=timeout)]
+        aggregate = 'COUNT(DISTINCT *)' if distinct else 'COUNT(*)'
+        subqueries = []
+        for i, query in enumerate(queries):
+            body = query.split('WHERE', 1)[1]
+            subqueries.append(f'{{ SELECT ({aggregate} AS ?{COUNT_ALIAS}{i}) WHERE {body} }}')
+        batch = 'SELECT * WHERE {\n' + '\nUNION\n'.join(subqueries) + '\n}'
+        spy = Spy()
+        solutions = self.execute(
+            batch, spy, force_order=force_order, timeout=timeout * len(queries))
+        if spy.get('', 'status') != 'ok':
+            logging.debug(f'batch of {len(queries)} counts failed, counting one by one')
+            return [
+                self.count(
+                    query, spy, force_order=force_order, distinct=distinct,
+                    timeout=timeout)
+                for query, spy in zip(queries, spies)]
+        counts = [0 for _ in queries]
+        for binding in solutions['results']['bindings']:
+            for variable, term in binding.items():
+                counts[int(variable[len(COUNT_ALIAS):])] = int(term['value'])
+        execution_time = spy.get('', 'execution_time') / len(queries)
+        for spy, num_solutions in zip(spies, counts):
+            spy.report('', 'num_solutions', num_solutions)
+            spy.report('', 'execution_time', execution_time)
+            spy.report('', 'status', 'ok')
+        return counts
+
+    async def execute_many(
+        self, queries: List[str], spies: Optional[List[Spy]] = None, concurrency: int = 8,
+        force_order: bool = False, timeout: int = 0
+    ) -> List[Dict]:
+        if spies is None:
+            spies = [Spy() for _ in queries]
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return await asyncio.gather(*[
+                loop.run_in_executor(
+                    executor, lambda q=query, s=spy: self.execute(
+                        q, s, force_order=force_order, timeout=timeout))
+                for query, spy in zip(queries, spies)])
+
+    async def count_many(
+        self, queries: List[str], spies: Optional[List[Spy]] = None, concurrency: int = 8,
+        force_order: bool = False, distinct: bool = False, timeout: int = 0
+    ) -> List[int]:
+        if spies is None:
+            spies = [Spy() for _ in queries]
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return await asyncio.gather(*[
+                loop.run_in_executor(
+                    executor, lambda q=query, s=spy: self.count(
+                        q, s, force_order=force_order, distinct=distinct, timeout=timeout))
+                for query, spy in zip(queries, spies)])
+
+    async def count_batch_many(
+        self, queries: List[str], spies: Optional[List[Spy]] = None, batch_size: int = 16,
+        concurrency: int = 8, force_order: bool = False, distinct: bool = False,
+        timeout: int = 0
+    ) -> List[int]:
+        if spies is None:
+            spies = [Spy() for _ in queries]
+        batches = []
+        for start in range(0, len(queries), batch_size):
+            batches.append((
+                queries[start:start + batch_size], spies[start:start + batch_size]))
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            counts = await asyncio.gather(*[
+                loop.run_in_executor(
+                    executor, lambda q=batch, s=batch_spies: self.count_batch(
+                        q, s, force_order=force_order, distinct=distinct, timeout=timeout))
+                for batch, batch_spies in batches])
+        return [count for batch_counts in counts for count in batch_counts]
+
 
 class Virtuoso(Endpoint):
 
-    class ISQLWrapper(object):
+    class ISQLSession(object):
 
         def __init__(self, hostname: str, username: str, password: str) -> None:
             self.hostname = hostname
             self.username = username
             self.password = password
+            self.process = None
+            self.lock = threading.Lock()
+            self.num_commands = 0
 
-        def execute_script(self, script: str) -> str:
-            cmd = ['isql', self.hostname, self.username, self.password, script]
-            process = subprocess.run(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            if process.stderr:
-                raise Exception(process.stderr)
-            return process.stdout.decode('utf-8')
+        def start(self) -> None:
+            cmd = [
+                'isql', self.hostname, self.username, self.password, 'VERBOSE=OFF',
+                'BANNER=OFF', 'PROMPT=OFF', 'ECHO=OFF', 'ERRORS=STDOUT']
+            self.process = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.STDOUT, text=True, bufsize=1)
+
+        def close(self) -> None:
+            if self.process is not None:
+                self.process.stdin.close()
+                self.process.wait()
+                self.process = None
+
+        def write(self, cmds: List[str], sentinels: List[str]) -> None:
+            try:
+                for cmd, sentinel in zip(cmds, sentinels):
+                    self.process.stdin.write(f"{cmd}\nselect '{sentinel}';\n")
+                self.process.stdin.flush()
+            except (BrokenPipeError, ValueError) as error:
+                logging.error(error)
+
+        def execute_many(self, cmds: List[str]) -> List[str]:
+            cmds = [cmd if cmd.endswith(';') else f'{cmd};' for cmd in cmds]
+            with self.lock:
+                if self.process is None or self.process.poll() is not None:
+                    self.start()
+                sentinels = []
+                for _ in cmds:
+                    sentinels.append(f'isql-sentinel-{self.num_commands}')
+                    self.num_commands += 1
+                writer = threading.Thread(target=self.write, args=(cmds, sentinels))
+                writer.start()
+                responses = []
+                try:
+                    for sentinel in sentinels:
+                        lines = []
+                        while True:
+                            line = self.process.stdout.readline()
+                            if not line:
+                                raise Exception('isql session closed unexpectedly')
+                            if sentinel in line:
+                                break
+                            lines.append(line.rstrip('\n'))
+                        responses.append('\n'.join(lines))
+                except Exception:
+                    self.process.kill()
+                    self.process = None
+                    raise
+                finally:
+                    writer.join()
+                return responses
 
         def execute_cmd(self, cmd: str) -> str:
-            if not cmd.endswith(';'):
-                cmd += ';'
-            tf_query = tempfile.NamedTemporaryFile()
-            tf_query.write(cmd.encode('utf-8'))
-            tf_query.flush()
-            result = self.execute_script(tf_query.name)
-            tf_query.close()
-            return result
+            return self.execute_many([cmd])[0]
 
         def sparql_query(self, query: str) -> str:
-            if not query.endswith(';'):
-                query += ';'
             return self.execute_cmd('SPARQL ' + query)
 
-    def __init__(self, url: str, default_graph: str) -> None:
-        super().__init__(url, default_graph)
+    def __init__(self, url: str, default_graph: str, **kwargs) -> None:
+        super().__init__(url, default_graph, **kwargs)
+        self._isql = self.ISQLSession(
+            kwargs.get('isql', 'localhost:1111'),
+            kwargs.get('username', 'dba'),
+            kwargs.get('password', 'dba'))
 
-    def execute(
-        self, query: str, spy: Spy, force_order: bool = False, timeout: int = 0
-    ) -> Dict:
+    @property
+    def isql(self) -> ISQLSession:
+        return self._isql
+
+    def prepare(self, query: str, force_order: bool = False) -> str:
         if force_order:
             query = f'DEFINE sql:select-option "order" {query}'
 
         projection = set(re.findall('\\?[A-z0-9]+', query))
         triples = query.split(' .\n')
-        if 't_direction 1' in triples[-2]:
+        if len(triples) > 1 and 't_direction 1' in triples[-2]:
             s, p, o, option = triples[-2].split(' ', 3)
             triples[-2] = f'{s} {p} ?v56 {option} .'
             triples[-2] += f'\n\tFILTER (?v56 = {o}) .'
@@ -100,93 +345,61 @@ class Virtuoso(Endpoint):
                 triples[-2] += '\n\t?v56 <http://www.wikidata.org/prop/direct/P31> ?v666'
             query = ' .\n'.join(triples)
             query = query.replace('*', ' '.join(projection))
+        return query
 
-        logging.debug('###' * 50)
-        logging.debug(query)
-        logging.debug('###' * 50 + '\n')
+    def deadline(self, timeout: int) -> Optional[float]:
+        if timeout <= 0:
+            return None
+        return timeout / 1000
 
-        sparql = SPARQLWrapper(self.url)
-        sparql.setQuery(query)
-        sparql.addDefaultGraph(self.default_graph)
-        sparql.addParameter('timeout', str(timeout))
-        sparql.setReturnFormat(JSON)
+    @staticmethod
+    def parse_cost(response: str) -> float:
+        for line in response.split('\n'):
+            line = line.strip()
+            if line.startswith('*** Error'):
+                raise Exception(line)
+            if re.fullmatch('-?[0-9]+([.,][0-9]+)?([eE][+-]?[0-9]+)?', line):
+                return float(line.replace(',', '.'))
+        raise Exception(f'Unable to parse the cost from: {response}')
 
-        solutions = None
-        start_time = time.time()
-        try:
-            tentative = 1
-            while True:
-                try:
-                    solutions = sparql.queryAndConvert()
-                    break
-                except Exception as error:
-                    logging.error(f'attempt n° {tentative}')
-                    if tentative >= 10 or "Connection refused" not in str(error):
-                        raise error
-                    tentative += 1
-            elapsed_time = time.time() - start_time
-            spy.report('', 'num_solutions', len(solutions['results']['bindings']))
-            spy.report('', 'execution_time', elapsed_time)
-            if timeout > 0 and (elapsed_time * 1000) > timeout:
-                spy.report('', 'status', 'timeout')
-            else:
-                spy.report('', 'status', 'ok')
-        except Exception as error:
-            elapsed_time = time.time() - start_time
-            logging.error(error)
-            spy.report('', 'num_solutions', 0)
-            spy.report('', 'execution_time', elapsed_time)
-            if timeout > 0 and (elapsed_time * 1000) > timeout:
-                spy.report('', 'status', 'timeout')
-            else:
-                spy.report('', 'status', 'error')
-        return solutions
+    def cost_many(
+        self, queries: List[str], force_order: bool = False
+    ) -> List[Optional[float]]:
+        cmds = []
+        for query in queries:
+            if force_order:
+                query = f'DEFINE sql:select-option "order" {query}'
+            query = query.replace("'", "\\'")
+            cmds.append(f"select explain('sparql {query}', -7);")
+        costs = []
+        for response in self.isql.execute_many(cmds):
+            try:
+                costs.append(self.parse_cost(response))
+            except Exception as error:
+                logging.error(error)
+                costs.append(None)
+        return costs
 
     def cost(self, query: str, force_order: bool = False) -> float:
-        if force_order:
-            query = f'DEFINE sql:select-option "order" {query}'
-        isql = self.ISQLWrapper('localhost:1111', 'dba', 'dba')
-        cmd = f"select explain('sparql {query}', -7);"
-        response = isql.execute_cmd(cmd)
-        return float(response.split('\n')[9].replace(',', '.'))
+        cost = self.cost_many([query], force_order=force_order)[0]
+        if cost is None:
+            raise Exception('Unable to estimate the cost of the query')
+        return cost
 
 
 class Blazegraph(Endpoint):
 
-    def __init__(self, url: str, default_graph: str) -> None:
-        super().__init__(url, default_graph)
+    def __init__(self, url: str, default_graph: str, **kwargs) -> None:
+        super().__init__(url, default_graph, **kwargs)
 
-    def execute(
-        self, query: str, spy: Spy, force_order: bool = False, timeout: int = 0
-    ) -> Dict:
+    def prepare(self, query: str, force_order: bool = False) -> str:
         if force_order:
             select, where = query.split('WHERE {')
             pragma = 'hint:Query hint:optimizer "None".'
             query = f'{select} WHERE {{\n\t{pragma} {where}'
+        return query
 
-        logging.debug('###' * 50)
-        logging.debug(query)
-        logging.debug('###' * 50 + '\n')
-
-        sparql = SPARQLWrapper(self.url)
-        sparql.setQuery(query)
-        sparql.addDefaultGraph(self.default_graph)
-        sparql.addParameter('timeout', str(timeout))
-        sparql.setReturnFormat(JSON)
-
-        solutions = None
-        start_time = time.time()
-        try:
-            solutions = sparql.queryAndConvert()
-            spy.report('', 'status', 'ok')
-            spy.report('', 'num_solutions', len(solutions['results']['bindings']))
-        except Exception as error:
-            logging.error(error)
-            spy.report('', 'status', 'error')
-            spy.report('', 'num_solutions', 0)
-        finally:
-            elapsed_time = time.time() - start_time
-            spy.report('', 'execution_time', elapsed_time)
-            if timeout > 0 and elapsed_time > timeout:
-                spy.report('', 'status', 'timeout')
-            return solutions
+    def deadline(self, timeout: int) -> Optional[float]:
+        if timeout <= 0:
+            return None
+        return float(timeout)
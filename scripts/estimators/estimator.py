@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import List
 
 from join_order import JoinOrder
 
@@ -8,3 +9,7 @@ class CardinalityEstimator(ABC):
     @abstractmethod
     def estimate(self, join_order: JoinOrder, **kwargs) -> None:
         pass
+
+    def estimate_all(self, join_orders: List[JoinOrder]) -> None:
+        for join_order in join_orders:
+            self.estimate(join_order)
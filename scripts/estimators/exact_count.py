@@ -1,49 +1,109 @@
+import asyncio
 import time
 
+from typing import List
+
 from join_order import JoinOrder
 from endpoint import Virtuoso
 from spy import Spy
 from estimators.estimator import CardinalityEstimator
 
 
+GRAPH_QUERY = 'SELECT * WHERE { ?s ?p ?o }'
+
+
+def count_query(join_order: JoinOrder, relaxe_stars: bool = True) -> str:
+    while not join_order.pattern.is_triple():
+        join_order = join_order.previous
+    if join_order.gearing == 0 or join_order.size == 1:
+        plan = join_order
+    elif not relaxe_stars:
+        plan = join_order
+    elif join_order.gearing == 1:
+        relaxed_pattern = join_order.pattern.relaxe_object()
+        plan = join_order.previous.extend(
+            relaxed_pattern, gearing=1, remember=False)
+    else:
+        relaxed_pattern = join_order.pattern.relaxe_subject()
+        plan = join_order.previous.extend(
+            relaxed_pattern, gearing=2, remember=False)
+    query = plan.stringify('virtuoso')
+    query = 'SELECT * WHERE' + query.split('WHERE', 1)[1]
+    query = query.replace(', t_direction 1', '')
+    query = query.replace(', t_direction 2', '')
+    return query
+
+
 class ExactCountEstimator(CardinalityEstimator):
 
     def __init__(self, virtuoso: Virtuoso, **kwargs) -> None:
         self._endpoint = virtuoso
         self._timeout = kwargs.get('timeout', 5000)
         self._relaxe_stars = kwargs.get('relaxe_stars', True)
+        self._concurrency = kwargs.get('concurrency', 8)
+        self._batch_size = kwargs.get('batch_size', 16)
+        self._count_store = kwargs.get('count_store', None)
+        self._graph_size = None
+
+    def count_query(self, join_order: JoinOrder) -> str:
+        return count_query(join_order, relaxe_stars=self._relaxe_stars)
+
+    def count_graph(self) -> int:
+        if self._graph_size is not None:
+            return self._graph_size
+        graph = self._endpoint.default_graph
+        if self._count_store is not None:
+            cached = self._count_store.get(graph, GRAPH_QUERY)
+            if cached is not None:
+                self._graph_size = cached[1]
+                return self._graph_size
+        spy = Spy()
+        self._graph_size = self._endpoint.count(GRAPH_QUERY, spy)
+        if self._count_store is not None:
+            self._count_store.put(
+                graph, GRAPH_QUERY, spy.get('', 'status'), self._graph_size,
+                execution_time=spy.get('', 'execution_time'))
+        return self._graph_size
 
     def estimate(self, join_order: JoinOrder) -> None:
-        timer = time.time()
-        while not join_order.pattern.is_triple():
-            join_order = join_order.previous
-        if join_order.gearing == 0 or join_order.size == 1:
-            plan = join_order
-        elif not self._relaxe_stars:
-            plan = join_order
-        elif join_order.gearing == 1:
-            relaxed_pattern = join_order.pattern.relaxe_object()
-            plan = join_order.previous.extend(
-                relaxed_pattern, gearing=1, remember=False)
+        self.estimate_all([join_order])
+
+    def estimate_all(self, join_orders: List[JoinOrder]) -> None:
+        if len(join_orders) == 0:
+            return None
+        graph = self._endpoint.default_graph
+        queries = [self.count_query(join_order) for join_order in join_orders]
+        counts = {}
+        if self._count_store is not None:
+            for query in set(queries):
+                timer = time.time()
+                cached = self._count_store.get(graph, query, timeout=self._timeout)
+                if cached is not None:
+                    status, cardinality, _ = cached
+                    counts[query] = (status, cardinality, time.time() - timer)
+        missing = list(set([query for query in queries if query not in counts]))
+        spies = [Spy() for _ in missing]
+        if self._batch_size > 1:
+            cardinalities = asyncio.run(self._endpoint.count_batch_many(
+                missing, spies, batch_size=self._batch_size, concurrency=self._concurrency,
+                timeout=self._timeout))
         else:
-            relaxed_pattern = join_order.pattern.relaxe_subject()
-            plan = join_order.previous.extend(
-                relaxed_pattern, gearing=2, remember=False)
-        query = plan.stringify('virtuoso')
-        query = 'SELECT * WHERE' + query.split('WHERE')[1]
-        query = query.replace(', t_direction 1', '')
-        query = query.replace(', t_direction 2', '')
-        try:
-            spy = Spy()
-            cardinality = self._endpoint.count(query, spy, timeout=self._timeout)
-            if spy.get('', 'status') == 'timeout':
-                cardinality = self._endpoint.count('SELECT * WHERE { ?s ?p ?o }', Spy())
-                support = 0.0
+            cardinalities = asyncio.run(self._endpoint.count_many(
+                missing, spies, concurrency=self._concurrency, timeout=self._timeout))
+        for query, cardinality, spy in zip(missing, cardinalities, spies):
+            status = spy.get('', 'status')
+            execution_time = spy.get('', 'execution_time')
+            counts[query] = (status, cardinality, execution_time)
+            if self._count_store is not None:
+                self._count_store.put(
+                    graph, query, status, cardinality, timeout=self._timeout,
+                    execution_time=execution_time)
+        for join_order, query in zip(join_orders, queries):
+            status, cardinality, estimation_time = counts[query]
+            if status != 'ok':
+                join_order.cardinality = self.count_graph()
+                join_order.support = 0.0
             else:
-                support = 1.0
-        except Exception:
-            cardinality = self._endpoint.count('SELECT * WHERE { ?s ?p ?o }', Spy())
-            support = 0.0
-        join_order.cardinality = cardinality
-        join_order.support = support
-        join_order.estimation_time = time.time() - timer
+                join_order.cardinality = cardinality
+                join_order.support = 1.0
+            join_order.estimation_time = estimation_time
@@ -0,0 +1,53 @@
+from typing import Dict, List
+
+from join_order import JoinOrder
+from feedback import FeedbackStore, describe
+from estimators.estimator import CardinalityEstimator
+
+
+class FeedbackEstimator(CardinalityEstimator):
+
+    def __init__(
+        self, estimator: CardinalityEstimator, store: FeedbackStore, **kwargs
+    ) -> None:
+        self._estimator = estimator
+        self._store = store
+        self._relaxe_stars = kwargs.get('relaxe_stars', True)
+        self._reuse_observations = kwargs.get('reuse_observations', True)
+        self._num_reused = 0
+        self._corrections = {}
+
+    @property
+    def num_reused(self) -> int:
+        return self._num_reused
+
+    @property
+    def corrections(self) -> Dict[str, float]:
+        return self._corrections
+
+    def estimate(self, join_order: JoinOrder) -> None:
+        self.estimate_all([join_order])
+
+    def estimate_all(self, join_orders: List[JoinOrder]) -> None:
+        pending = []
+        for join_order in join_orders:
+            subplan, signature, predicates = describe(
+                join_order, relaxe_stars=self._relaxe_stars)
+            observed = None
+            if self._reuse_observations:
+                observed = self._store.observed(subplan)
+            if observed is not None:
+                join_order.cardinality = observed
+                join_order.epsilon = 0.0
+                join_order.support = 1.0
+                join_order.estimation_time = 0.0
+                self._corrections.pop(subplan, None)
+                self._num_reused += 1
+            else:
+                factor = self._store.correction(signature, predicates)
+                self._corrections[subplan] = factor
+                pending.append((join_order, factor))
+        self._estimator.estimate_all([join_order for join_order, _ in pending])
+        for join_order, factor in pending:
+            join_order.cardinality = join_order.cardinality * factor
+            join_order.epsilon = join_order.epsilon * factor
@@ -1,16 +1,18 @@
+import sys
 import time
 import numpy
 import random
 
 import numpy as np
-import scipy.stats as st
 
-from typing import List, Tuple, Dict
-from functools import lru_cache
+from typing import List, Optional, Tuple, Dict
 
+from spy import PROFILER
 from query import Query
 from join_order import JoinOrder
 from hdt_connector import HDTConnector
+from filter_analysis import IdRanges, analyze
+from selectivity import selectivity, object_predicates
 from search import DPSearch, HGreedySearch
 from estimators.estimator import CardinalityEstimator
 from estimators.void import VoidEstimator
@@ -25,47 +27,133 @@ class RandomWalksEstimator(CardinalityEstimator):
         self._confidence = kwargs.get('confidence', 0.95)
         self._relaxe_stars = kwargs.get('relaxe_stars', True)
         self._optimize_walk_plans = kwargs.get('optimize_walk_plans', True)
+        self._traversal_walks = kwargs.get('traversal_walks', 100)
+        self._prior_strength = kwargs.get('prior_strength', 0.0)
+        self._statistics = None
+        if kwargs.get('histograms', True):
+            self._statistics = database.literal_statistics
         self._cache = {}
+        self._walks = {}
+        self._ranges = {}
 
     def apply(self, triple: Tuple, mu: Dict[str, str]) -> Tuple:
         s, p, o, hs, hp, ho = triple
         return (mu.get(s, s), hp, mu.get(o, o), mu.get(s, hs), hp, mu.get(o, ho))
 
-    def __filter_walks_with_ids__(
+    def analyze_filter(self, join_order: JoinOrder) -> Optional[IdRanges]:
+        key = str(join_order.pattern)
+        if key not in self._ranges:
+            self._ranges[key] = analyze(join_order.pattern, self._database)
+        return self._ranges[key]
+
+    @PROFILER.timed('filter')
+    def filter_walks(
         self, join_order: JoinOrder, X: List[Tuple[int, Dict[str, str], str]]
     ) -> List[Tuple[int, Dict[str, str], str]]:
+        mappings = [x_mu for (x_proba, x_mu, _) in X if x_proba != 0]
+        ranges = None
+        if join_order.pattern.is_filter():
+            ranges = self.analyze_filter(join_order)
+        if ranges is None:
+            results = iter(join_order.pattern.eval_all(mappings, self._database))
+        else:
+            results = iter(ranges.eval_all(join_order.pattern, mappings, self._database))
+        passed = [next(results) if x_proba != 0 else False for (x_proba, _, _) in X]
+        weight, fallback = 1.0, 0.0
+        if join_order.pattern.is_filter() and self._prior_strength > 0 and len(mappings) > 0:
+            prior = selectivity(
+                join_order.pattern, self._statistics,
+                object_predicates(join_order.get_patterns()), self._database)
+            num_passed = sum(passed)
+            rate = (num_passed + self._prior_strength * prior) / \
+                (len(mappings) + self._prior_strength)
+            if num_passed > 0:
+                weight = rate * len(mappings) / num_passed
+            else:
+                fallback = rate
+        Y = []
+        for (x_proba, x_mu, x_group), x_passed in zip(X, passed):
+            if x_passed:
+                Y.append((x_proba * weight, x_mu, x_group))
+            else:
+                Y.append((x_proba * fallback, x_mu, x_group))
+        return Y
+
+    def seed_walks(
+        self, join_order: JoinOrder, X: List[Tuple[int, Dict[str, str], str]], with_ids: bool
+    ) -> List[Tuple[int, Dict[str, str], str]]:
+        database = self._database if with_ids else None
         Y = []
         for (x_proba, x_mu, x_group) in X:
-            if x_proba == 0:
+            muc, cardinality = join_order.pattern.sample(database)
+            if x_proba == 0 or muc is None:
                 Y.append((0, x_mu, x_group))
-            elif join_order.pattern.eval(x_mu, self._database):
-                Y.append((x_proba, x_mu, x_group))
             else:
-                Y.append((0, x_mu, x_group))
+                Y.append((x_proba * cardinality, x_mu | muc, x_group))
         return Y
 
-    def __filter_walks_without_ids__(
-        self, join_order: JoinOrder, X: List[Tuple[int, Dict[str, str], str]]
+    @PROFILER.timed('restricted')
+    def restricted_walks(
+        self, join_order: JoinOrder, ranges: IdRanges
     ) -> List[Tuple[int, Dict[str, str], str]]:
+        evaluate = join_order.pattern.compile(self._database)
+        previous = join_order.previous
+        X = self.__compute_walks_with_ids__(previous.previous)
         Y = []
+        triple = previous.pattern.to_id_tuple(self._database)
+        candidates = tuple(ranges.candidates)
         for (x_proba, x_mu, x_group) in X:
             if x_proba == 0:
                 Y.append((0, x_mu, x_group))
-            elif join_order.pattern.eval(x_mu, self._database):
-                Y.append((x_proba, x_mu, x_group))
+                continue
+            _, _, _, hs, hp, ho = t = self.apply(triple, x_mu)
+            if hs != 0 and hp != 0 and ho == 0:
+                muc, cardinality = self._database.id_sample_range(t, candidates)
             else:
-                Y.append((0, x_mu, x_group))
+                muc, cardinality = self._database.id_sample(t)
+            y_mu = x_mu | muc
+            if cardinality == 0:
+                Y.append((0, y_mu, x_group))
+                continue
+            if ranges.eval(evaluate, y_mu, self._database):
+                Y.append((x_proba * cardinality, y_mu, x_group))
+            else:
+                Y.append((0, y_mu, x_group))
         return Y
 
-    @lru_cache(maxsize=None)
+    def restrict(self, join_order: JoinOrder) -> Optional[IdRanges]:
+        previous = join_order.previous
+        if not previous.pattern.is_triple() or previous.pattern.more:
+            return None
+        ranges = self.analyze_filter(join_order)
+        if ranges is None or previous.pattern.object != ranges.variable:
+            return None
+        if previous.pattern.predicate[0] == '?':
+            return None
+        return ranges
+
     def __compute_walks_with_ids__(
         self, join_order: JoinOrder
+    ) -> List[Tuple[int, Dict[str, str], str]]:
+        key = (True, join_order.k3)
+        if key not in self._walks:
+            self._walks[key] = self.__sample_walks_with_ids__(join_order)
+        return self._walks[key]
+
+    def __sample_walks_with_ids__(
+        self, join_order: JoinOrder
     ) -> List[Tuple[int, Dict[str, str], str]]:
         if join_order.previous is None:
             return [(1, {}, '') for _ in range(self._num_walks)]
-        X = self.__compute_walks_with_ids__(join_order.previous)
         if join_order.pattern.is_filter():
-            return self.__filter_walks_with_ids__(join_order, X)
+            ranges = self.restrict(join_order)
+            if ranges is not None:
+                return self.restricted_walks(join_order, ranges)
+        X = self.__compute_walks_with_ids__(join_order.previous)
+        if join_order.pattern.is_multiset() and join_order.previous.previous is None:
+            return self.seed_walks(join_order, X, True)
+        elif join_order.pattern.is_filter() or join_order.pattern.is_multiset():
+            return self.filter_walks(join_order, X)
         elif join_order.pattern.more:
             return self.__compute_closure_with_ids__(join_order, X)
         Y = []
@@ -78,15 +166,24 @@ class RandomWalksEstimator(CardinalityEstimator):
                 Y.append((x_proba * cardinality, x_mu | muc, x_group))
         return Y
 
-    @lru_cache(maxsize=None)
     def __compute_walks_without_ids__(
         self, join_order: JoinOrder
+    ) -> List[Tuple[int, Dict[str, str], str]]:
+        key = (False, join_order.k3)
+        if key not in self._walks:
+            self._walks[key] = self.__sample_walks_without_ids__(join_order)
+        return self._walks[key]
+
+    def __sample_walks_without_ids__(
+        self, join_order: JoinOrder
     ) -> List[Tuple[int, Dict[str, str], str]]:
         if join_order.previous is None:
             return [(1, {}, '') for _ in range(self._num_walks)]
         X = self.__compute_walks_without_ids__(join_order.previous)
-        if join_order.pattern.is_filter():
-            return self.__filter_walks_without_ids__(join_order, X)
+        if join_order.pattern.is_multiset() and join_order.previous.previous is None:
+            return self.seed_walks(join_order, X, False)
+        elif join_order.pattern.is_filter() or join_order.pattern.is_multiset():
+            return self.filter_walks(join_order, X)
         elif join_order.pattern.more:
             return self.__compute_closure_without_ids__(join_order, X)
         Y = []
@@ -99,22 +196,61 @@ class RandomWalksEstimator(CardinalityEstimator):
                 Y.append((x_proba * cardinality, x_mu | muc, x_group))
         return Y
 
+    def with_ids(self, walk_plan: JoinOrder) -> bool:
+        if not walk_plan.first.is_triple():
+            return True
+        _, _, _, hs, _, ho = walk_plan.first.to_tuple()
+        return hs != '' or ho != ''
+
+    def walk_bytes(self, walks: List[Tuple[int, Dict[str, str], str]]) -> int:
+        if len(walks) == 0:
+            return 0
+        walk = walks[-1]
+        size = sys.getsizeof(walk) + sys.getsizeof(walk[1]) + sys.getsizeof(walk[2])
+        return sys.getsizeof(walks) + len(walks) * size
+
+    @PROFILER.timed('walks')
     def compute_walks(
         self, join_order: JoinOrder
     ) -> List[Tuple[int, Dict[str, str], str]]:
-        _, _, _, hs, _, ho = join_order.first.to_tuple()
-        if hs == '' and ho == '':
-            return self.__compute_walks_without_ids__(join_order)
-        return self.__compute_walks_with_ids__(join_order)
+        if not self.with_ids(join_order):
+            walks = self.__compute_walks_without_ids__(join_order)
+        else:
+            walks = self.__compute_walks_with_ids__(join_order)
+        PROFILER.count('walks_started', len(walks))
+        PROFILER.count('walks_killed', sum([1 for proba, _, _ in walks if proba == 0]))
+        PROFILER.count('walk_bytes', self.walk_bytes(walks))
+        return walks
+
+    @PROFILER.timed('traversal')
+    def compute_traversal(
+        self, join_order: JoinOrder, walk_plan: JoinOrder,
+        walks: List[Tuple[int, Dict[str, str], str]]
+    ) -> float:
+        closure = join_order
+        while not closure.pattern.is_triple():
+            closure = closure.previous
+        if not closure.pattern.more or closure.gearing == 0:
+            return 0.0
+        if not self.with_ids(walk_plan):
+            traversal = self.__compute_traversal_without_ids__(closure, walks)
+        else:
+            traversal = self.__compute_traversal_with_ids__(closure, walks)
+        source = closure.pattern.subject if closure.gearing == 1 else closure.pattern.object
+        if source[0] == '?':
+            return traversal * max(1.0, closure.previous.cardinality)
+        return traversal
 
     def compute_support(
         self, walks: List[Tuple[List[int], Dict[str, str], str]]
     ) -> List[float]:
         return sum([min(1, proba) for proba, _, _ in walks]) / len(walks)
 
+    @PROFILER.timed('process_walks')
     def process_walks(
         self, walks: List[Tuple[List[int], Dict[str, str], str]]
     ) -> Tuple[List[float], List[float], List[float]]:
+        import scipy.stats as st
         groups = {}
         for (proba, mu, group) in walks:
             if group not in groups:
@@ -131,17 +267,30 @@ class RandomWalksEstimator(CardinalityEstimator):
                 h += z * se
         return m, h
 
+    @PROFILER.timed('walk_plan')
     def optimize_walk_plan(self, join_order: JoinOrder) -> JoinOrder:
-        if join_order.k1 not in self._cache:
-            query = Query('', join_order.get_patterns(), join_order.get_filters(), [])
+        filters = join_order.get_filters()
+        multisets = join_order.get_multisets()
+        key = (
+            join_order.k1, tuple(sorted([filter.id for filter in filters])),
+            tuple(sorted([multiset.id for multiset in multisets])))
+        if key in self._cache:
+            PROFILER.count('cache_hits')
+        else:
+            PROFILER.count('cache_misses')
+            query = Query('', join_order.get_patterns(), filters, multisets)
             estimator = VoidEstimator(self._database)
-            optimizer = HGreedySearch(estimator, beam_size=1, beam_extra=1)
-            self._cache[join_order.k1] = optimizer.run(query)
-        return self._cache[join_order.k1]
+            optimizer = HGreedySearch(
+                estimator, beam_size=1, beam_extra=1, seeding='always')
+            self._cache[key] = optimizer.run(query)
+        return self._cache[key]
 
+    @PROFILER.timed('estimate')
     def estimate(self, join_order: JoinOrder) -> None:
         timer = time.time()
-        if join_order.size == 1 and not join_order.pattern.more:
+        snapshot = PROFILER.snapshot()
+        if join_order.size == 1 and join_order.previous.previous is None and \
+                join_order.pattern.is_triple() and not join_order.pattern.more:
             _, _, _, hs, hp, ho = join_order.pattern.to_tuple()
             join_order.cardinality = self._database.cardinality(hs, hp, ho)
             join_order.support = 1.0
@@ -165,7 +314,9 @@ class RandomWalksEstimator(CardinalityEstimator):
             join_order.cardinality = cardinality
             join_order.epsilon = epsilon
             join_order.support = self.compute_support(walks)
+            join_order.traversal = self.compute_traversal(join_order, walk_plan, walks)
         join_order.estimation_time = time.time() - timer
+        join_order.profile = PROFILER.since(snapshot)
 
 
 class RandomWalksEstimator(RandomWalksEstimator):
@@ -173,6 +324,7 @@ class RandomWalksEstimator(RandomWalksEstimator):
     def __init__(self, database: HDTConnector, **kwargs) -> None:
         super().__init__(database, **kwargs)
 
+    @PROFILER.timed('closure')
     def __compute_closure_with_ids__(
         self, join_order: JoinOrder, X: List[Tuple[int, Dict[str, str], str]]
     ) -> List[Tuple[int, Dict[str, str], str]]:
@@ -182,7 +334,7 @@ class RandomWalksEstimator(RandomWalksEstimator):
             hs, ho = ho, hs
         lowest = 0 if join_order.pattern.zero else 1
         highest = 1
-        Y = []
+        Y, hops = [], 0
         for x_proba, x_mu, x_group in X:
             depth = random.randint(lowest, highest)
             y_group = f'{x_group}{depth}'
@@ -199,6 +351,7 @@ class RandomWalksEstimator(RandomWalksEstimator):
                     else:
                         triple = ('?node', p, path[-1][0], 0, hp, path[-1][0])
                     muc, cardinality = self._database.id_sample(self.apply(triple, {}))
+                    hops += 1
                     y_proba *= cardinality
                     if y_proba > 0:
                         if any([node == muc['?node'] for node, _ in path]):
@@ -217,8 +370,10 @@ class RandomWalksEstimator(RandomWalksEstimator):
                         Y.append((y_proba, x_mu, y_group))
                     else:
                         Y.append((0, x_mu, y_group))
+        PROFILER.count('closure_hops', hops)
         return Y
 
+    @PROFILER.timed('closure')
     def __compute_closure_without_ids__(
         self, join_order: JoinOrder, X: List[Tuple[int, Dict[str, str], str]]
     ) -> List[Tuple[int, Dict[str, str], str]]:
@@ -228,7 +383,7 @@ class RandomWalksEstimator(RandomWalksEstimator):
             hs, ho = ho, hs
         lowest = 0 if join_order.pattern.zero else 1
         highest = 1
-        Y = []
+        Y, hops = [], 0
         for x_proba, x_mu, x_group in X:
             depth = random.randint(lowest, highest)
             y_group = f'{x_group}{depth}'
@@ -245,6 +400,7 @@ class RandomWalksEstimator(RandomWalksEstimator):
                     else:
                         triple = ('?node', p, path[-1][0], '', hp, path[-1][0])
                     muc, cardinality = self._database.sample(self.apply(triple, {}))
+                    hops += 1
                     y_proba *= cardinality
                     if y_proba > 0:
                         if any([node == muc['?node'] for node, _ in path]):
@@ -263,8 +419,81 @@ class RandomWalksEstimator(RandomWalksEstimator):
                         Y.append((y_proba, x_mu, y_group))
                     else:
                         Y.append((0, x_mu, y_group))
+        PROFILER.count('closure_hops', hops)
         return Y
 
+    def __compute_traversal_with_ids__(
+        self, join_order: JoinOrder, X: List[Tuple[int, Dict[str, str], str]]
+    ) -> float:
+        s, p, o, hs, hp, ho = join_order.pattern.to_id_tuple(self._database)
+        if join_order.gearing == 2:
+            s, o = o, s
+            hs, ho = ho, hs
+        sources, weights = [], []
+        for x_proba, x_mu, _ in X:
+            source = x_mu.get(s, 0) if hs == 0 else hs
+            if x_proba > 0 and source != 0:
+                sources.append(source)
+                weights.append(x_proba)
+        if len(sources) == 0:
+            return 0.0
+        traversals, hops = [], 0
+        for source in random.choices(sources, weights=weights, k=self._traversal_walks):
+            node, num_paths, traversal = source, 1, 0
+            visited = {source}
+            for _ in range(self._max_depth):
+                if join_order.gearing == 1:
+                    triple = (node, p, '?node', node, hp, 0)
+                else:
+                    triple = ('?node', p, node, 0, hp, node)
+                muc, cardinality = self._database.id_sample(self.apply(triple, {}))
+                hops += 1
+                if cardinality == 0 or muc['?node'] in visited:
+                    break
+                num_paths *= cardinality
+                traversal += num_paths
+                node = muc['?node']
+                visited.add(node)
+            traversals.append(traversal)
+        PROFILER.count('closure_hops', hops)
+        return sum(traversals) / len(traversals)
+
+    def __compute_traversal_without_ids__(
+        self, join_order: JoinOrder, X: List[Tuple[int, Dict[str, str], str]]
+    ) -> float:
+        s, p, o, hs, hp, ho = join_order.pattern.to_tuple()
+        if join_order.gearing == 2:
+            s, o = o, s
+            hs, ho = ho, hs
+        sources, weights = [], []
+        for x_proba, x_mu, _ in X:
+            source = x_mu.get(s, '') if hs == '' else hs
+            if x_proba > 0 and source != '':
+                sources.append(source)
+                weights.append(x_proba)
+        if len(sources) == 0:
+            return 0.0
+        traversals, hops = [], 0
+        for source in random.choices(sources, weights=weights, k=self._traversal_walks):
+            node, num_paths, traversal = source, 1, 0
+            visited = {source}
+            for _ in range(self._max_depth):
+                if join_order.gearing == 1:
+                    triple = (node, p, '?node', node, hp, '')
+                else:
+                    triple = ('?node', p, node, '', hp, node)
+                muc, cardinality = self._database.sample(self.apply(triple, {}))
+                hops += 1
+                if cardinality == 0 or muc['?node'] in visited:
+                    break
+                num_paths *= cardinality
+                traversal += num_paths
+                node = muc['?node']
+                visited.add(node)
+            traversals.append(traversal)
+        PROFILER.count('closure_hops', hops)
+        return sum(traversals) / len(traversals)
+
 # class RandomWalksEstimator(RandomWalksEstimator):
 #
 #     def __init__(self, database: HDTConnector, **kwargs) -> None:
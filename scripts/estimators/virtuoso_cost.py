@@ -0,0 +1,46 @@
+import math
+import time
+import logging
+
+from typing import List
+
+from join_order import JoinOrder
+from endpoint import Virtuoso
+from estimators.estimator import CardinalityEstimator
+
+
+class VirtuosoCostEstimator(CardinalityEstimator):
+
+    def __init__(self, virtuoso: Virtuoso, **kwargs) -> None:
+        self._endpoint = virtuoso
+        self._cache = {}
+
+    def explain_query(self, join_order: JoinOrder) -> str:
+        query = join_order.stringify('virtuoso')
+        return 'SELECT * WHERE' + query.split('WHERE', 1)[1]
+
+    def estimate(self, join_order: JoinOrder) -> None:
+        self.estimate_all([join_order])
+
+    def estimate_all(self, join_orders: List[JoinOrder]) -> None:
+        timer = time.time()
+        queries = [self.explain_query(join_order) for join_order in join_orders]
+        missing = list(set([query for query in queries if query not in self._cache]))
+        if len(missing) > 0:
+            try:
+                costs = self._endpoint.cost_many(missing, force_order=True)
+            except Exception as error:
+                logging.error(error)
+                costs = [None for _ in missing]
+            for query, cost in zip(missing, costs):
+                self._cache[query] = cost
+        elapsed_time = (time.time() - timer) / max(1, len(join_orders))
+        for join_order, query in zip(join_orders, queries):
+            cost = self._cache[query]
+            if cost is None:
+                join_order.cardinality = math.inf
+                join_order.support = 0.0
+            else:
+                join_order.cardinality = cost
+                join_order.support = 1.0
+            join_order.estimation_time = elapsed_time
@@ -2,9 +2,11 @@ import time
 import numpy
 import math
 
+from spy import PROFILER
 from join_order import JoinOrder
 from hdt_connector import HDTConnector
 from estimators.estimator import CardinalityEstimator
+from selectivity import selectivity, object_predicates
 
 
 class VoidEstimator(CardinalityEstimator):
@@ -12,7 +14,11 @@ class VoidEstimator(CardinalityEstimator):
     def __init__(self, database: HDTConnector, **kwargs) -> None:
         self._database = database
         self._relaxe_stars = kwargs.get('relaxe_stars', True)
+        self._statistics = None
+        if kwargs.get('histograms', True):
+            self._statistics = database.literal_statistics
 
+    @PROFILER.timed('estimate')
     def estimate(self, join_order: JoinOrder, **kwargs) -> None:
         timer = time.time()
         if join_order.gearing == 0 or join_order.size == 1:
@@ -49,11 +55,18 @@ class VoidEstimator(CardinalityEstimator):
                 values[s].append(math.log10(self._database.cardinality(hs, hp, ho) + 1))
             elif ho == '':
                 values[o].append(math.log10(self._database.cardinality(hs, hp, ho) + 1))
+        for multiset in plan.get_multisets():
+            cardinalities.append(math.log10(multiset.size + 1))
+            for variable in multiset.variables:
+                values.setdefault(variable, []).append(math.log10(multiset.size + 1))
         c = numpy.prod(cardinalities)
         v = 1
         for variable in values:
             if len(values[variable]) > 1:
                 v *= numpy.prod(sorted(values[variable], reverse=True)[:-1])
+        predicates = object_predicates(plan.get_patterns())
+        for filter in plan.get_filters():
+            c *= selectivity(filter, self._statistics, predicates, self._database)
         join_order.cardinality = c / v
         join_order.support = 1.0
         join_order.estimation_time = time.time() - timer
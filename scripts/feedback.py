@@ -0,0 +1,112 @@
+import json
+import math
+import time
+import sqlite3
+
+from typing import Dict, List, Optional, Tuple
+
+from query import Query
+from template import QueryTemplate
+from join_order import JoinOrder
+from count_store import canonicalize
+from estimators.exact_count import count_query
+
+
+def describe(join_order: JoinOrder, relaxe_stars: bool = True) -> Tuple[str, str, List[str]]:
+    patterns = join_order.get_patterns()
+    query = Query('', patterns, join_order.get_filters(), join_order.get_multisets())
+    signature = QueryTemplate(query).key
+    while not join_order.pattern.is_triple():
+        join_order = join_order.previous
+    if join_order.gearing != 0 and join_order.size > 1:
+        signature = f'{signature}:{join_order.gearing}'
+    subplan = canonicalize(count_query(join_order, relaxe_stars=relaxe_stars))
+    predicates = sorted([pattern.predicate for pattern in patterns])
+    return subplan, signature, predicates
+
+
+class FeedbackStore():
+
+    def __init__(self, filename: str, **kwargs) -> None:
+        self._connection = sqlite3.connect(filename, timeout=60)
+        self._prior = kwargs.get('prior', 1.0)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS observations ('
+            'subplan TEXT NOT NULL, '
+            'source TEXT NOT NULL, '
+            'signature TEXT NOT NULL, '
+            'predicates TEXT NOT NULL, '
+            'estimated REAL NOT NULL, '
+            'observed REAL NOT NULL, '
+            'created REAL NOT NULL, '
+            'PRIMARY KEY (subplan, source))')
+        self._connection.commit()
+        self._observed = None
+        self._signatures = None
+        self._predicates = None
+
+    @staticmethod
+    def log_ratio(estimated: float, observed: float) -> float:
+        return math.log((observed + 1) / (max(estimated, 0.0) + 1))
+
+    def record(
+        self, subplan: str, signature: str, predicates: List[str], estimated: float,
+        observed: float, source: str = 'execution'
+    ) -> None:
+        self._connection.execute(
+            'INSERT OR REPLACE INTO observations VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (subplan, source, signature, json.dumps(predicates), estimated, observed,
+             time.time()))
+        self._connection.commit()
+        self._observed = None
+
+    def load(self) -> None:
+        self._observed, self._signatures, self._predicates = {}, {}, {}
+        rows = self._connection.execute(
+            'SELECT subplan, signature, predicates, estimated, observed '
+            'FROM observations ORDER BY created')
+        for subplan, signature, predicates, estimated, observed in rows:
+            self._observed[subplan] = observed
+            log_ratio = self.log_ratio(estimated, observed)
+            self._signatures.setdefault(signature, []).append(log_ratio)
+            predicates = json.loads(predicates)
+            for predicate in predicates:
+                self._predicates.setdefault(predicate, []).append(
+                    log_ratio / len(predicates))
+
+    def factor(self, log_ratios: List[float]) -> float:
+        return math.exp(sum(log_ratios) / (len(log_ratios) + self._prior))
+
+    def observed(self, subplan: str) -> Optional[float]:
+        if self._observed is None:
+            self.load()
+        return self._observed.get(subplan)
+
+    def signature_factor(self, signature: str) -> Optional[float]:
+        if self._signatures is None:
+            self.load()
+        if signature not in self._signatures:
+            return None
+        return self.factor(self._signatures[signature])
+
+    def predicate_factor(self, predicates: List[str]) -> float:
+        if self._predicates is None:
+            self.load()
+        factor = 1.0
+        for predicate in predicates:
+            factor *= self.factor(self._predicates.get(predicate, []))
+        return factor
+
+    def correction(self, signature: str, predicates: List[str]) -> float:
+        factor = self.signature_factor(signature)
+        if factor is None:
+            return self.predicate_factor(predicates)
+        return factor
+
+    def statistics(self) -> Dict[str, int]:
+        if self._observed is None:
+            self.load()
+        return {
+            'num_observations': sum([len(ratios) for ratios in self._signatures.values()]),
+            'num_signatures': len(self._signatures),
+            'num_predicates': len(self._predicates)}
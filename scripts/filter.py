@@ -1,13 +1,23 @@
 import re
+import operator
 
 from abc import ABC, abstractmethod
-from typing import Dict, Set, Union, List
+from typing import Any, Callable, Dict, Optional, Set, Tuple, Union, List
 from functools import cached_property
 
 from pattern import Pattern
 from hdt_connector import HDTConnector
 
 
+OPERATORS = {
+    '=': operator.eq,
+    '!=': operator.ne,
+    '<': operator.lt,
+    '>': operator.gt,
+    '<=': operator.le,
+    '>=': operator.ge}
+
+
 class Expression(ABC):
 
     @property
@@ -18,20 +28,27 @@ class Expression(ABC):
     def eval(self, mappings: Dict[str, str]) -> Union[str, int, bool]:
         pass
 
+    def compile(self, database: HDTConnector) -> Callable[[Dict[str, Any]], Any]:
+        return lambda mappings: self.eval(mappings, database)
+
 
 class BasicExpression(Expression):
 
     def __init__(self, term: str) -> None:
         self._term = term
 
+    @property
+    def term(self) -> str:
+        return self._term
+
     @property
     def variables(self) -> Set[str]:
         if self._term[0] == '?':
             return set([self._term])
         return set()
 
-    def eval(self, mappings: Dict[str, str], database: HDTConnector) -> str:
-        term = mappings.get(self._term, self._term)
+    @staticmethod
+    def decode(term: Union[str, int], database: HDTConnector) -> Union[str, int]:
         if isinstance(term, int):
             term = database.get_term(term)
         if '^^' in term:
@@ -40,6 +57,24 @@ class BasicExpression(Expression):
                 return int(term[1:-1])
         return term
 
+    def eval(self, mappings: Dict[str, str], database: HDTConnector) -> str:
+        return self.decode(mappings.get(self._term, self._term), database)
+
+    def compile(self, database: HDTConnector) -> Callable[[Dict[str, Any]], Any]:
+        if self._term[0] != '?':
+            value = self.decode(self._term, database)
+            return lambda mappings: value
+        variable = self._term
+        decoded = {}
+
+        def evaluate(mappings: Dict[str, Any]) -> Union[str, int]:
+            term = mappings.get(variable, variable)
+            if term not in decoded:
+                decoded[term] = self.decode(term, database)
+            return decoded[term]
+
+        return evaluate
+
     def __repr__(self) -> str:
         if self._term.startswith('http'):
             return f'<{self._term}>'
@@ -51,6 +86,10 @@ class STRExpression(Expression):
     def __init__(self, expr: Expression) -> None:
         self._expr = expr
 
+    @property
+    def expr(self) -> Expression:
+        return self._expr
+
     @property
     def variables(self) -> Set[str]:
         return self._expr.variables
@@ -58,6 +97,9 @@ class STRExpression(Expression):
     def eval(self, mappings: Dict[str, str], database: HDTConnector) -> str:
         return self._expr.eval(mappings, database)
 
+    def compile(self, database: HDTConnector) -> Callable[[Dict[str, Any]], Any]:
+        return self._expr.compile(database)
+
     def __repr__(self) -> str:
         return f'STR({self._expr})'
 
@@ -67,6 +109,10 @@ class NotExpression(Expression):
     def __init__(self, expr: Expression) -> None:
         self._expr = expr
 
+    @property
+    def expr(self) -> Expression:
+        return self._expr
+
     @property
     def variables(self) -> Set[str]:
         return self._expr.variables
@@ -74,6 +120,10 @@ class NotExpression(Expression):
     def eval(self, mappings: Dict[str, str], database: HDTConnector) -> bool:
         return not self._expr.eval(mappings, database)
 
+    def compile(self, database: HDTConnector) -> Callable[[Dict[str, Any]], bool]:
+        expr = self._expr.compile(database)
+        return lambda mappings: not expr(mappings)
+
     def __repr__(self) -> str:
         return f'!({self._expr})'
 
@@ -85,6 +135,18 @@ class RelationalExpression(Expression):
         self._operator = operator
         self._right = right
 
+    @property
+    def left(self) -> Expression:
+        return self._left
+
+    @property
+    def operator(self) -> str:
+        return self._operator
+
+    @property
+    def right(self) -> Expression:
+        return self._right
+
     @property
     def variables(self) -> Set[str]:
         return self._left.variables.union(self._right.variables)
@@ -94,6 +156,8 @@ class RelationalExpression(Expression):
         right = self._right.eval(mappings, database)
         if self._operator == '=':
             return left == right
+        elif self._operator == '!=':
+            return left != right
         elif self._operator == '<':
             return left < right
         elif self._operator == '>':
@@ -102,6 +166,39 @@ class RelationalExpression(Expression):
             return left <= right
         return left >= right
 
+    def resolve_constant(self, database: HDTConnector) -> Optional[Tuple[str, int]]:
+        if self._operator not in ['=', '!=']:
+            return None
+        for variable, constant in [(self._left, self._right), (self._right, self._left)]:
+            if not isinstance(variable, BasicExpression) or variable.term[0] != '?':
+                continue
+            if not isinstance(constant, BasicExpression) or constant.term[0] == '?':
+                continue
+            if not isinstance(BasicExpression.decode(constant.term, database), str):
+                continue
+            id = database.get_object_id(constant.term)
+            if id > 0 and database.get_term(id) == constant.term:
+                return variable.term, id
+        return None
+
+    def compile(self, database: HDTConnector) -> Callable[[Dict[str, Any]], bool]:
+        left = self._left.compile(database)
+        right = self._right.compile(database)
+        compare = OPERATORS[self._operator]
+        resolved = self.resolve_constant(database)
+        if resolved is None:
+            return lambda mappings: compare(left(mappings), right(mappings))
+        variable, id = resolved
+        negate = self._operator == '!='
+
+        def evaluate(mappings: Dict[str, Any]) -> bool:
+            term = mappings.get(variable, variable)
+            if isinstance(term, int):
+                return (term == id) != negate
+            return compare(left(mappings), right(mappings))
+
+        return evaluate
+
     def __repr__(self) -> str:
         return f'{self._left} {self._operator} {self._right}'
 
@@ -112,6 +209,14 @@ class RegexExpression(Expression):
         self._expr = expr
         self._pattern = pattern
 
+    @property
+    def expr(self) -> Expression:
+        return self._expr
+
+    @property
+    def pattern(self) -> str:
+        return self._pattern
+
     @property
     def variables(self) -> Set[str]:
         return self._expr.variables
@@ -120,6 +225,11 @@ class RegexExpression(Expression):
         value = self._expr.eval(mappings, database)
         return len(re.findall(self._pattern, value)) > 0
 
+    def compile(self, database: HDTConnector) -> Callable[[Dict[str, Any]], bool]:
+        expr = self._expr.compile(database)
+        regex = re.compile(self._pattern)
+        return lambda mappings: regex.search(expr(mappings)) is not None
+
     def __repr__(self) -> str:
         pattern = self._pattern
         if pattern.startswith('\\(') and pattern.endswith('\\)'):
@@ -132,6 +242,10 @@ class ConditionalOrExpression(Expression):
     def __init__(self, clauses: List[Expression]) -> None:
         self._clauses = clauses
 
+    @property
+    def clauses(self) -> List[Expression]:
+        return self._clauses
+
     @property
     def variables(self) -> Set[str]:
         vars = set()
@@ -145,6 +259,10 @@ class ConditionalOrExpression(Expression):
                 return True
         return False
 
+    def compile(self, database: HDTConnector) -> Callable[[Dict[str, Any]], bool]:
+        clauses = [clause.compile(database) for clause in self._clauses]
+        return lambda mappings: any(clause(mappings) for clause in clauses)
+
     def __repr__(self) -> str:
         return '||'.join(map(lambda clause: f'({clause})', self._clauses))
 
@@ -154,6 +272,10 @@ class ConditionalAndExpression(Expression):
     def __init__(self, clauses: List[Expression]) -> None:
         self._clauses = clauses
 
+    @property
+    def clauses(self) -> List[Expression]:
+        return self._clauses
+
     @property
     def variables(self) -> Set[str]:
         vars = set()
@@ -167,6 +289,10 @@ class ConditionalAndExpression(Expression):
                 return False
         return True
 
+    def compile(self, database: HDTConnector) -> Callable[[Dict[str, Any]], bool]:
+        clauses = [clause.compile(database) for clause in self._clauses]
+        return lambda mappings: all(clause(mappings) for clause in clauses)
+
     def __repr__(self) -> str:
         return '&&'.join(map(lambda clause: f'({clause})', self._clauses))
 
@@ -177,6 +303,14 @@ class EqExpression(Expression):
         self._left = left
         self._right = right
 
+    @property
+    def left(self) -> str:
+        return self._left
+
+    @property
+    def right(self) -> str:
+        return self._right
+
     @property
     def variables(self) -> Set[str]:
         return self._left.variables.union(self._right.variables)
@@ -210,6 +344,11 @@ class Filter(Pattern):
     def __init__(self, expression: Expression) -> None:
         super().__init__(None)
         self._expression = expression
+        self._compiled = None
+
+    @property
+    def expression(self) -> Expression:
+        return self._expression
 
     @cached_property
     def variables(self) -> Set[str]:
@@ -221,8 +360,28 @@ class Filter(Pattern):
     def is_filter(self) -> bool:
         return True
 
+    def compile(self, database: HDTConnector) -> Callable[[Dict[str, Any]], bool]:
+        if self._compiled is None or self._compiled[0] is not database:
+            self._compiled = (database, self._expression.compile(database))
+        return self._compiled[1]
+
     def eval(self, mappings: Dict[str, str], database: HDTConnector) -> bool:
-        return self._expression.eval(mappings, database)
+        return self.compile(database)(mappings)
+
+    def eval_all(self, mappings: List[Dict[str, Any]], database: HDTConnector) -> List[bool]:
+        evaluate = self.compile(database)
+        variables = sorted(self.variables)
+        keys = [tuple([mu.get(variable) for variable in variables]) for mu in mappings]
+        results = {}
+        for key, mu in zip(keys, mappings):
+            if key not in results:
+                results[key] = evaluate(mu)
+        return [results[key] for key in keys]
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state['_compiled'] = None
+        return state
 
     def stringify(self, target: str) -> str:
         return str(self)
@@ -0,0 +1,281 @@
+from __future__ import annotations
+
+import re
+
+from bisect import bisect_right
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from filter import (
+    Filter,
+    Expression,
+    BasicExpression,
+    STRExpression,
+    RelationalExpression,
+    RegexExpression,
+    ConditionalAndExpression,
+    ConditionalOrExpression)
+from hdt_connector import HDTConnector
+
+
+Ranges = List[Tuple[int, int]]
+
+FLIPPED = {'=': '=', '!=': '!=', '<': '>', '>': '<', '<=': '>=', '>=': '<='}
+REGEX_METACHARACTERS = '.^$*+?{}[]|()'
+
+
+def normalize(ranges: Ranges) -> Ranges:
+    merged = []
+    for low, high in sorted([(low, high) for low, high in ranges if low <= high]):
+        if len(merged) > 0 and low <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], high))
+        else:
+            merged.append((low, high))
+    return merged
+
+
+def union(left: Ranges, right: Ranges) -> Ranges:
+    return normalize(left + right)
+
+
+def intersection(left: Ranges, right: Ranges) -> Ranges:
+    ranges = []
+    i = j = 0
+    while i < len(left) and j < len(right):
+        low = max(left[i][0], right[j][0])
+        high = min(left[i][1], right[j][1])
+        if low <= high:
+            ranges.append((low, high))
+        if left[i][1] < right[j][1]:
+            i += 1
+        else:
+            j += 1
+    return ranges
+
+
+def difference(left: Ranges, right: Ranges) -> Ranges:
+    ranges = []
+    for low, high in left:
+        for other_low, other_high in right:
+            if other_high < low or other_low > high:
+                continue
+            if other_low > low:
+                ranges.append((low, other_low - 1))
+            low = other_high + 1
+        if low <= high:
+            ranges.append((low, high))
+    return ranges
+
+
+class IdRanges():
+
+    def __init__(self, variable: str, accepted: Ranges, undecided: Ranges) -> None:
+        self._variable = variable
+        self._accepted = normalize(accepted)
+        self._undecided = difference(normalize(undecided), self._accepted)
+        self._candidates = union(self._accepted, self._undecided)
+
+    @property
+    def variable(self) -> str:
+        return self._variable
+
+    @property
+    def accepted(self) -> Ranges:
+        return self._accepted
+
+    @property
+    def undecided(self) -> Ranges:
+        return self._undecided
+
+    @property
+    def candidates(self) -> Ranges:
+        return self._candidates
+
+    @property
+    def exact(self) -> bool:
+        return len(self._undecided) == 0
+
+    @staticmethod
+    def contains(ranges: Ranges, id: int) -> bool:
+        index = bisect_right(ranges, (id, float('inf'))) - 1
+        return index >= 0 and ranges[index][0] <= id <= ranges[index][1]
+
+    def conjunction(self, other: IdRanges) -> IdRanges:
+        return IdRanges(
+            self._variable, intersection(self._accepted, other.accepted),
+            intersection(self._candidates, other.candidates))
+
+    def disjunction(self, other: IdRanges) -> IdRanges:
+        return IdRanges(
+            self._variable, union(self._accepted, other.accepted),
+            union(self._candidates, other.candidates))
+
+    def eval(
+        self, evaluate: Callable[[Dict[str, Any]], bool], mappings: Dict[str, Any],
+        database: HDTConnector
+    ) -> bool:
+        term = mappings.get(self._variable)
+        if not isinstance(term, int) or term > database.num_objects:
+            return evaluate(mappings)
+        elif self.contains(self._accepted, term):
+            return True
+        elif self.contains(self._undecided, term):
+            return evaluate(mappings)
+        return False
+
+    def eval_all(
+        self, filter: Filter, mappings: List[Dict[str, Any]], database: HDTConnector
+    ) -> List[bool]:
+        evaluate = filter.compile(database)
+        return [self.eval(evaluate, mu, database) for mu in mappings]
+
+    def __repr__(self) -> str:
+        return f'{self._variable} in {self._accepted} (undecided: {self._undecided})'
+
+
+def term_variable(expr: Expression) -> Optional[str]:
+    if isinstance(expr, STRExpression):
+        expr = expr.expr
+    if isinstance(expr, BasicExpression) and expr.term[0] == '?':
+        return expr.term
+    return None
+
+
+def literal_block(value: str) -> Optional[str]:
+    if not value.startswith('"'):
+        return None
+    return value[:value.rindex('"') + 1]
+
+
+def prefix_upper_bound(prefix: str) -> Optional[str]:
+    if ord(prefix[-1]) == 0x10FFFF:
+        return None
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def prefix_ranges(prefix: str, database: HDTConnector) -> Ranges:
+    upper = prefix_upper_bound(prefix)
+    ranges = []
+    for first, last in database.object_sections():
+        low = database.object_lower_bound(prefix, first, last)
+        if upper is None:
+            high = last
+        else:
+            high = database.object_lower_bound(upper, first, last) - 1
+        ranges.append((low, high))
+    return normalize(ranges)
+
+
+def comparison_ranges(operator: str, value: str, database: HDTConnector) -> Ranges:
+    ranges = []
+    for first, last in database.object_sections():
+        lower = database.object_lower_bound(value, first, last)
+        upper = database.object_lower_bound(value, first, last, strict=True)
+        if operator == '=':
+            ranges.append((lower, upper - 1))
+        elif operator == '!=':
+            ranges.extend([(first, lower - 1), (upper, last)])
+        elif operator == '<':
+            ranges.append((first, lower - 1))
+        elif operator == '<=':
+            ranges.append((first, upper - 1))
+        elif operator == '>':
+            ranges.append((upper, last))
+        else:
+            ranges.append((lower, last))
+    return normalize(ranges)
+
+
+def analyze_relational(
+    expr: RelationalExpression, database: HDTConnector
+) -> Optional[IdRanges]:
+    variable, constant, operator = term_variable(expr.left), expr.right, expr.operator
+    if variable is None:
+        variable, constant, operator = term_variable(expr.right), expr.left, FLIPPED[operator]
+    if isinstance(constant, STRExpression):
+        constant = constant.expr
+    if variable is None or not isinstance(constant, BasicExpression):
+        return None
+    if constant.term[0] == '?':
+        return None
+    value = BasicExpression.decode(constant.term, database)
+    if not isinstance(value, str):
+        return None
+    ranges = comparison_ranges(operator, value, database)
+    block = literal_block(value)
+    if block is None:
+        return IdRanges(variable, ranges, [])
+    undecided = prefix_ranges(block, database)
+    return IdRanges(variable, difference(ranges, undecided), undecided)
+
+
+def parse_prefix(pattern: str) -> Tuple[Optional[str], bool]:
+    if not pattern.startswith('^') or '|' in pattern:
+        return None, False
+    prefix = []
+    i = 1
+    while i < len(pattern):
+        character = pattern[i]
+        if character == '\\' and i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+            prefix.append(pattern[i + 1])
+            i += 2
+        elif character == '\\' or character in REGEX_METACHARACTERS:
+            break
+        else:
+            prefix.append(character)
+            i += 1
+    if len(prefix) == 0:
+        return None, False
+    remainder = pattern[i:]
+    if remainder not in ['', '.*'] and re.match('[*+?{]', remainder):
+        prefix.pop()
+        remainder = 'x'
+    if len(prefix) == 0:
+        return None, False
+    return ''.join(prefix), remainder in ['', '.*']
+
+
+def analyze_regex(expr: RegexExpression, database: HDTConnector) -> Optional[IdRanges]:
+    variable = term_variable(expr.expr)
+    if variable is None:
+        return None
+    prefix, exact = parse_prefix(expr.pattern)
+    if prefix is None:
+        return None
+    ranges = prefix_ranges(prefix, database)
+    if exact and '"' not in prefix[1:]:
+        return IdRanges(variable, ranges, [])
+    return IdRanges(variable, [], ranges)
+
+
+def analyze_expression(expr: Expression, database: HDTConnector) -> Optional[IdRanges]:
+    if isinstance(expr, RelationalExpression):
+        return analyze_relational(expr, database)
+    elif isinstance(expr, RegexExpression):
+        return analyze_regex(expr, database)
+    elif isinstance(expr, ConditionalOrExpression):
+        analyses = [analyze_expression(clause, database) for clause in expr.clauses]
+        if any([analysis is None for analysis in analyses]):
+            return None
+        if len(set([analysis.variable for analysis in analyses])) > 1:
+            return None
+        result = analyses[0]
+        for analysis in analyses[1:]:
+            result = result.disjunction(analysis)
+        return result
+    elif isinstance(expr, ConditionalAndExpression):
+        analyses = [analyze_expression(clause, database) for clause in expr.clauses]
+        variables = set([analysis.variable for analysis in analyses if analysis is not None])
+        if len(variables) != 1:
+            return None
+        result = None
+        for analysis in analyses:
+            if analysis is None:
+                analysis = IdRanges(result.variable if result else variables.pop(), [], [
+                    (1, database.num_objects)])
+            result = analysis if result is None else result.conjunction(analysis)
+        return result
+    return None
+
+
+def analyze(filter: Filter, database: HDTConnector) -> Optional[IdRanges]:
+    return analyze_expression(filter.expression, database)
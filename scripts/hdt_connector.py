@@ -1,12 +1,21 @@
-from hdt_python import HDTDocument, LazyIDIterator
+from __future__ import annotations
+
 from random import randint
-from typing import Dict, Tuple
-from functools import lru_cache
+from typing import Dict, Iterator, List, Optional, Tuple, TYPE_CHECKING
+from functools import cached_property, lru_cache
+
+from spy import PROFILER
+
+if TYPE_CHECKING:
+    from hdt_python import LazyIDIterator
+    from literal_statistics import LiteralStatistics
 
 
 class HDTConnector():
 
     def __init__(self, graph: str) -> None:
+        from hdt_python import HDTDocument
+        self._graph = graph
         self._spo = HDTDocument(f'data/{graph}.hdt', True, True)
         self._pso = HDTDocument(f'data/{graph}.pso.hdt', True, True)
         self._void = HDTDocument(f'data/{graph}.void.hdt', True, True)
@@ -45,6 +54,45 @@ class HDTConnector():
             return self.get_subject(id)
         return term
 
+    @cached_property
+    def num_objects(self) -> int:
+        upper = 1
+        while self.get_object(upper) != '':
+            upper *= 2
+        lower = upper // 2
+        while lower + 1 < upper:
+            middle = (lower + upper) // 2
+            if self.get_object(middle) != '':
+                lower = middle
+            else:
+                upper = middle
+        return lower
+
+    @cached_property
+    def num_shared(self) -> int:
+        lower, upper = 0, self.num_objects + 1
+        while lower + 1 < upper:
+            middle = (lower + upper) // 2
+            if self.get_subject(middle) == self.get_object(middle):
+                lower = middle
+            else:
+                upper = middle
+        return lower
+
+    def object_sections(self) -> List[Tuple[int, int]]:
+        sections = [(1, self.num_shared), (self.num_shared + 1, self.num_objects)]
+        return [(first, last) for first, last in sections if first <= last]
+
+    def object_lower_bound(self, term: str, first: int, last: int, strict: bool = False) -> int:
+        while first <= last:
+            middle = (first + last) // 2
+            value = self.get_object(middle)
+            if value < term or (strict and value == term):
+                first = middle + 1
+            else:
+                last = middle - 1
+        return first
+
     @lru_cache(maxsize=None)
     def create_iterator(self, s: str, p: str, o: str) -> LazyIDIterator:
         if s == '' and o == '':
@@ -56,11 +104,24 @@ class HDTConnector():
             iterator.next()
         return iterator, cardinality
 
+    def search(self, s: str, p: str, o: str) -> Iterator[Tuple[str, str, str]]:
+        PROFILER.count('hdt_calls')
+        if s == '' and o == '':
+            iterator = self._pso.search_triples(p, s, o)
+            while iterator.next():
+                yield iterator.predicate(), iterator.subject(), iterator.object()
+        else:
+            iterator = self._spo.search_triples(s, p, o)
+            while iterator.next():
+                yield iterator.subject(), iterator.predicate(), iterator.object()
+
     def cardinality(self, s: str, p: str, o: str) -> int:
+        PROFILER.count('hdt_calls')
         _, cardinality = self.create_iterator(s, p, o)
         return cardinality
 
     def sample(self, triple: Tuple) -> Tuple[Dict[str, str], int]:
+        PROFILER.count('hdt_calls')
         s, p, o, hs, hp, ho = triple
         iterator, cardinality = self.create_iterator(hs, hp, ho)
         if cardinality == 0:
@@ -89,6 +150,7 @@ class HDTConnector():
         return iterator, cardinality
 
     def id_sample(self, triple: Tuple) -> Tuple[Dict[str, str], int]:
+        PROFILER.count('hdt_calls')
         s, p, o, hs, hp, ho = triple
         iterator, cardinality = self.create_id_iterator(hs, hp, ho)
         if cardinality == 0:
@@ -103,6 +165,64 @@ class HDTConnector():
             mappings[o] = iterator.object_id
         return mappings, cardinality
 
+    @lru_cache(maxsize=None)
+    def id_range_offsets(
+        self, s: int, p: int, ranges: Tuple[Tuple[int, int], ...]
+    ) -> Tuple[Tuple[Tuple[int, int], ...], int]:
+        iterator, cardinality = self.create_id_iterator(s, p, 0)
+
+        def offset(id: int) -> int:
+            lower, upper = 0, cardinality
+            while lower < upper:
+                middle = (lower + upper) // 2
+                iterator.skip(middle)
+                iterator.next()
+                if iterator.object_id < id:
+                    lower = middle + 1
+                else:
+                    upper = middle
+            return lower
+
+        offsets = []
+        for low, high in ranges:
+            start, end = offset(low), offset(high + 1)
+            if start < end:
+                offsets.append((start, end))
+        return tuple(offsets), sum([end - start for start, end in offsets])
+
+    def id_sample_range(
+        self, triple: Tuple, ranges: Tuple[Tuple[int, int], ...]
+    ) -> Tuple[Dict[str, int], int]:
+        PROFILER.count('hdt_calls')
+        s, p, o, hs, hp, ho = triple
+        if hs == 0 or hp == 0 or ho != 0:
+            raise Exception('Range sampling requires a bound subject and predicate')
+        offsets, cardinality = self.id_range_offsets(hs, hp, ranges)
+        if cardinality == 0:
+            return {}, 0
+        position = randint(0, cardinality - 1)
+        for start, end in offsets:
+            if position < end - start:
+                position += start
+                break
+            position -= end - start
+        iterator, _ = self.create_id_iterator(hs, hp, ho)
+        iterator.skip(position)
+        iterator.next()
+        return {o: iterator.object_id}, cardinality
+
+    def predicates(self) -> List[str]:
+        iterator = self._void.search_triples('', 'http://rdfs.org/ns/void#property', '')
+        predicates = set()
+        while iterator.next():
+            predicates.add(iterator.object())
+        return sorted(predicates)
+
+    @cached_property
+    def literal_statistics(self) -> Optional[LiteralStatistics]:
+        from literal_statistics import LiteralStatistics
+        return LiteralStatistics.load(f'data/{self._graph}.histograms.json')
+
     def distinct_subjects(self, p: str) -> int:
         iter1 = self._void.search_triples('', 'http://rdfs.org/ns/void#property', p)
         while iter1.next():
@@ -122,3 +242,11 @@ class HDTConnector():
                 iter2.next()
                 return int(iter2.object().split('^^')[0][1:-1])
         return 0
+
+
+for function in [
+    HDTConnector.get_subject_id, HDTConnector.get_object_id, HDTConnector.get_subject,
+    HDTConnector.get_object, HDTConnector.create_iterator, HDTConnector.create_id_iterator,
+    HDTConnector.id_range_offsets
+]:
+    PROFILER.track_cache(function)
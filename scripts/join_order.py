@@ -1,27 +1,44 @@
 from __future__ import annotations
 
 from functools import cached_property
-from typing import List, Optional, Set
+from typing import Dict, List, Optional, Set
 
 from pattern import Pattern
 from triple_pattern import TriplePattern
 from filter import Filter
+from multiset import Multiset
+from cost_model import CostModel, CoutCostModel
 
 
 class JoinOrder():
 
     def __init__(
         self, pattern: Optional[Pattern], gearing: int = 0,
-        previous: Optional[JoinOrder] = None
+        previous: Optional[JoinOrder] = None, cost_model: Optional[CostModel] = None,
+        bindings: Optional[Dict[str, str]] = None
     ) -> None:
         self._pattern = pattern
         self._gearing = gearing
         self._previous = previous
+        if cost_model is not None:
+            self._cost_model = cost_model
+        elif previous is not None:
+            self._cost_model = previous.cost_model
+        else:
+            self._cost_model = CoutCostModel()
+        if bindings is not None:
+            self._bindings = bindings
+        elif previous is not None:
+            self._bindings = previous.bindings
+        else:
+            self._bindings = {}
         self._children = []
         self._cardinality = 0.0
         self._epsilon = 0.0
         self._support = 0.0
         self._estimation_time = 0.0
+        self._profile = {}
+        self._traversal = 0.0
 
     @property
     def pattern(self) -> Optional[Pattern]:
@@ -35,6 +52,14 @@ class JoinOrder():
     def previous(self) -> Optional[JoinOrder]:
         return self._previous
 
+    @property
+    def cost_model(self) -> CostModel:
+        return self._cost_model
+
+    @property
+    def bindings(self) -> Dict[str, str]:
+        return self._bindings
+
     @property
     def children(self) -> List[JoinOrder]:
         return self._children
@@ -71,11 +96,25 @@ class JoinOrder():
     def estimation_time(self, time: float) -> None:
         self._estimation_time = time
 
+    @property
+    def profile(self) -> Dict[str, float]:
+        return self._profile
+
+    @profile.setter
+    def profile(self, profile: Dict[str, float]) -> None:
+        self._profile = profile
+
+    @property
+    def traversal(self) -> float:
+        return self._traversal
+
+    @traversal.setter
+    def traversal(self, value: float) -> None:
+        self._traversal = value
+
     @property
     def cost(self) -> float:
-        if self.previous is None:
-            return self._cardinality
-        return self.previous.cost + max(self.previous.cardinality, self.cardinality)
+        return self.cost_model.cost(self)
 
     @cached_property
     def k0(self) -> int:
@@ -97,6 +136,12 @@ class JoinOrder():
             return self.pattern.id ^ self.previous.k2
         return self.previous.k2
 
+    @cached_property
+    def k3(self) -> int:
+        if self.previous is None:
+            return 0
+        return hash((self.previous.k3, self.pattern.id, self.gearing))
+
     @cached_property
     def size(self) -> int:
         if self.previous is None:
@@ -121,7 +166,7 @@ class JoinOrder():
     def variables(self) -> Set[str]:
         if self.previous is None:
             return set()
-        elif self.pattern.is_triple():
+        elif self.pattern.is_triple() or self.pattern.is_multiset():
             return self.previous.variables.union(self.pattern.variables)
         return self.previous.variables
 
@@ -139,9 +184,16 @@ class JoinOrder():
             return self.previous.get_filters() + [self.pattern]
         return self.previous.get_filters()
 
+    def get_multisets(self) -> List[Multiset]:
+        if self.previous is None:
+            return []
+        elif self.pattern.is_multiset():
+            return self.previous.get_multisets() + [self.pattern]
+        return self.previous.get_multisets()
+
     def compatible(self, pattern: Pattern) -> bool:
         if isinstance(pattern, TriplePattern):
-            if self.size == 0:
+            if self.previous is None:
                 return True
             return len(self.variables.intersection(pattern.variables)) > 0
         return self.variables.issuperset(pattern.variables)
@@ -159,7 +211,7 @@ class JoinOrder():
             return []
         return self.previous.decompose() + [self]
 
-    def stringify(self, target: str) -> str:
+    def stringify_patterns(self, target: str) -> List[str]:
         patterns = []
         for join_order in self.decompose():
             pattern = join_order.pattern.stringify(target)
@@ -170,6 +222,9 @@ class JoinOrder():
                         patterns.append('\thint:Prior hint:gearing "forward" .')
                     else:
                         patterns.append('\thint:Prior hint:gearing "reverse" .')
+                elif target == 'local':
+                    gearing = 'forward' if join_order.gearing == 1 else 'reverse'
+                    patterns.append(f'\t{pattern} .  # gearing {gearing}')
                 elif join_order.gearing == 1:
                     if join_order.pattern.object[0] != '?':
                         if len(join_order.children) == 0:
@@ -196,10 +251,19 @@ class JoinOrder():
                         patterns.append(f'\t{pattern[:-1]}, t_direction 2) .')
             else:
                 patterns.append(f'\t{pattern} .')
+        return patterns
+
+    def stringify(self, target: str) -> str:
+        patterns = self.stringify_patterns(target)
+        if len(self.bindings) > 0:
+            patterns.insert(0, f'\t{Multiset([self.bindings]).stringify(target)} .')
         if target == 'blazegraph':
             patterns.insert(0, '\thint:Query hint:optimizer "None" .')
             body = '\n'.join(patterns)
             return f'SELECT DISTINCT * WHERE {{\n{body}\n}}'
+        elif target == 'local':
+            body = '\n'.join(patterns)
+            return f'SELECT DISTINCT * WHERE {{\n{body}\n}}'
         else:
             body = '\n'.join(patterns)
             return f'DEFINE sql:select-option "order" SELECT DISTINCT * WHERE {{\n{body}\n}}'
@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import os
+import json
+import logging
+
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, List, Optional, Union
+
+from hdt_connector import HDTConnector
+from filter import BasicExpression, Expression, RelationalExpression, RegexExpression
+from filter_analysis import FLIPPED, term_variable, parse_prefix, prefix_upper_bound
+
+
+def equi_depth(values: List[Union[str, int]], num_buckets: int) -> List[Union[str, int]]:
+    values = sorted(values)
+    if len(values) == 0:
+        return []
+    num_buckets = min(num_buckets, len(values))
+    return [values[(len(values) - 1) * i // num_buckets] for i in range(num_buckets + 1)]
+
+
+def string_position(text: str, start: int) -> int:
+    position = 0
+    for index in range(start, start + 4):
+        position = position * 256 + (min(ord(text[index]), 255) if index < len(text) else 0)
+    return position
+
+
+def interpolate(low: Union[str, int], high: Union[str, int], value: Union[str, int]) -> float:
+    if isinstance(value, int):
+        return (value - low) / (high - low)
+    start = 0
+    while start < min(len(low), len(high)) and low[start] == high[start]:
+        start += 1
+    low, high = string_position(low, start), string_position(high, start)
+    return min(1.0, max(0.0, (string_position(value, start) - low) / max(1, high - low)))
+
+
+def below(bounds: List[Union[str, int]], value: Union[str, int], inclusive: bool) -> float:
+    if inclusive:
+        position = bisect_right(bounds, value)
+    else:
+        position = bisect_left(bounds, value)
+    if position == 0:
+        return 0.0
+    elif position == len(bounds):
+        return 1.0
+    low, high = bounds[position - 1], bounds[position]
+    offset = interpolate(low, high, value) if high > low else 0.5
+    return (position - 1 + offset) / (len(bounds) - 1)
+
+
+class LiteralStatistics():
+
+    def __init__(self, histograms: Dict[str, Dict[str, Any]]) -> None:
+        self._histograms = histograms
+
+    @property
+    def histograms(self) -> Dict[str, Dict[str, Any]]:
+        return self._histograms
+
+    @staticmethod
+    def build_histogram(
+        database: HDTConnector, predicate: str, **kwargs
+    ) -> Optional[Dict[str, Any]]:
+        num_samples = kwargs.get('num_samples', 10000)
+        num_buckets = kwargs.get('num_buckets', 64)
+        prefix_length = kwargs.get('prefix_length', 4)
+        max_prefixes = kwargs.get('max_prefixes', 1000)
+        triple = ('?s', predicate, '?o', '', predicate, '')
+        cardinality = database.cardinality('', predicate, '')
+        if cardinality == 0:
+            return None
+        numbers, strings, prefixes = [], [], {}
+        for _ in range(min(num_samples, cardinality)):
+            mappings, _ = database.sample(triple)
+            value = BasicExpression.decode(mappings['?o'], database)
+            if isinstance(value, int):
+                numbers.append(value)
+                continue
+            strings.append(value)
+            for length in range(1, min(prefix_length, len(value)) + 1):
+                prefixes[value[:length]] = prefixes.get(value[:length], 0) + 1
+        samples = len(numbers) + len(strings)
+        frequent = sorted(prefixes.items(), key=lambda item: item[1], reverse=True)
+        return {
+            'cardinality': cardinality,
+            'distinct': max(1, database.distinct_objects(predicate)),
+            'samples': samples,
+            'numeric': {
+                'fraction': len(numbers) / samples,
+                'bounds': equi_depth(numbers, num_buckets)},
+            'strings': {
+                'fraction': len(strings) / samples,
+                'bounds': equi_depth(strings, num_buckets)},
+            'prefix_length': prefix_length,
+            'prefixes': {
+                prefix: count / samples for prefix, count in frequent[:max_prefixes]}}
+
+    @staticmethod
+    def build(
+        database: HDTConnector, predicates: Optional[List[str]] = None, **kwargs
+    ) -> LiteralStatistics:
+        if predicates is None or len(predicates) == 0:
+            predicates = database.predicates()
+        histograms = {}
+        for index, predicate in enumerate(predicates):
+            histogram = LiteralStatistics.build_histogram(database, predicate, **kwargs)
+            if histogram is not None:
+                histograms[predicate] = histogram
+            logging.debug(f'{index + 1}/{len(predicates)} histograms: {predicate}')
+        return LiteralStatistics(histograms)
+
+    @staticmethod
+    def load(path: str) -> Optional[LiteralStatistics]:
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as reader:
+            return LiteralStatistics(json.load(reader))
+
+    def save(self, path: str) -> None:
+        with open(path, 'w') as writer:
+            json.dump(self._histograms, writer)
+
+    def comparison_selectivity(
+        self, predicate: str, operator: str, value: Union[str, int]
+    ) -> float:
+        histogram = self._histograms[predicate]
+        if operator == '=':
+            return 1.0 / histogram['distinct']
+        elif operator == '!=':
+            return 1.0 - 1.0 / histogram['distinct']
+        domain = histogram['numeric' if isinstance(value, int) else 'strings']
+        if len(domain['bounds']) == 0:
+            return 0.0
+        if operator == '<':
+            fraction = below(domain['bounds'], value, False)
+        elif operator == '<=':
+            fraction = below(domain['bounds'], value, True)
+        elif operator == '>':
+            fraction = 1.0 - below(domain['bounds'], value, True)
+        else:
+            fraction = 1.0 - below(domain['bounds'], value, False)
+        return domain['fraction'] * fraction
+
+    def prefix_selectivity(self, predicate: str, prefix: str) -> float:
+        histogram = self._histograms[predicate]
+        length = histogram['prefix_length']
+        default = 0.5 / max(1, histogram['samples'])
+        frequency = histogram['prefixes'].get(prefix[:length], default)
+        if len(prefix) <= length:
+            return frequency
+        bounds = histogram['strings']['bounds']
+        upper = prefix_upper_bound(prefix)
+        if len(bounds) == 0:
+            return frequency
+        fraction = 1.0 if upper is None else below(bounds, upper, False)
+        fraction -= below(bounds, prefix, False)
+        return min(frequency, max(default, histogram['strings']['fraction'] * fraction))
+
+    def estimate(
+        self, expression: Expression, predicates: Dict[str, str], database: HDTConnector
+    ) -> Optional[float]:
+        if isinstance(expression, RelationalExpression):
+            variable, constant = term_variable(expression.left), expression.right
+            operator = expression.operator
+            if variable is None:
+                variable, constant = term_variable(expression.right), expression.left
+                operator = FLIPPED[operator]
+            if variable not in predicates or predicates[variable] not in self._histograms:
+                return None
+            if not isinstance(constant, BasicExpression) or constant.term[0] == '?':
+                return None
+            value = BasicExpression.decode(constant.term, database)
+            return self.comparison_selectivity(predicates[variable], operator, value)
+        elif isinstance(expression, RegexExpression):
+            variable = term_variable(expression.expr)
+            if variable not in predicates or predicates[variable] not in self._histograms:
+                return None
+            prefix, _ = parse_prefix(expression.pattern)
+            if prefix is None:
+                return None
+            return self.prefix_selectivity(predicates[variable], prefix)
+        return None
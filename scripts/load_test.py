@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import math
+import os
+import random
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple
+
+from spy import Spy
+from endpoint import Endpoint
+
+
+def query_name(filename: str) -> str:
+    name = os.path.basename(filename).rsplit('.', 1)[0]
+    if name == 'query':
+        return os.path.basename(os.path.dirname(os.path.abspath(filename)))
+    return name
+
+
+def percentile(values: List[float], q: float) -> float:
+    if len(values) == 0:
+        return math.nan
+    values = sorted(values)
+    rank = q / 100 * (len(values) - 1)
+    lower = math.floor(rank)
+    upper = math.ceil(rank)
+    return values[lower] + (values[upper] - values[lower]) * (rank - lower)
+
+
+class LoadTest():
+
+    def __init__(self, endpoint: Endpoint, queries: Dict[str, str], **kwargs) -> None:
+        self._endpoint = endpoint
+        self._queries = queries
+        self._qps = kwargs.get('qps', 0.0)
+        self._concurrency = kwargs.get('concurrency', 8)
+        self._num_requests = kwargs.get('num_requests', 0)
+        self._duration = kwargs.get('duration', 0.0)
+        self._timeout = kwargs.get('timeout', 0)
+        self._force_order = kwargs.get('force_order', False)
+        self._stream = kwargs.get('stream', False)
+        self._format = kwargs.get('format', 'json')
+        self._random = random.Random(kwargs.get('seed', 0))
+        self._samples = []
+        self._elapsed_time = 0.0
+
+    @property
+    def samples(self) -> List[Tuple[str, str, float, float, int]]:
+        return self._samples
+
+    @property
+    def elapsed_time(self) -> float:
+        return self._elapsed_time
+
+    def schedule(self) -> List[str]:
+        names = sorted(self._queries.keys())
+        if self._num_requests > 0:
+            num_requests = self._num_requests
+        elif self._qps > 0 and self._duration > 0:
+            num_requests = math.ceil(self._qps * self._duration)
+        else:
+            num_requests = len(names)
+        schedule = []
+        while len(schedule) < num_requests:
+            self._random.shuffle(names)
+            schedule.extend(names)
+        return schedule[:num_requests]
+
+    def send(self, name: str, scheduled_time: float) -> Tuple[str, str, float, float, int]:
+        spy = Spy()
+        start_time = time.time()
+        if self._stream:
+            self._endpoint.stream(
+                self._queries[name], spy, force_order=self._force_order,
+                timeout=self._timeout, format=self._format)
+        else:
+            self._endpoint.execute(
+                self._queries[name], spy, force_order=self._force_order,
+                timeout=self._timeout)
+        end_time = time.time()
+        service_time = end_time - start_time
+        latency = end_time - min(scheduled_time, start_time)
+        return (
+            name, spy.get('', 'status'), latency, service_time,
+            spy.get_default('', 'num_solutions', 0))
+
+    async def run_open_loop(
+        self, schedule: List[str], executor: ThreadPoolExecutor
+    ) -> List[Tuple[str, str, float, float, int]]:
+        loop = asyncio.get_running_loop()
+        start_time = time.time()
+        scheduled_time = start_time
+        futures = []
+        for name in schedule:
+            scheduled_time += self._random.expovariate(self._qps)
+            delay = scheduled_time - time.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            futures.append(loop.run_in_executor(
+                executor, self.send, name, scheduled_time))
+        return await asyncio.gather(*futures)
+
+    async def run_closed_loop(
+        self, schedule: List[str], executor: ThreadPoolExecutor
+    ) -> List[Tuple[str, str, float, float, int]]:
+        loop = asyncio.get_running_loop()
+        pending = list(reversed(schedule))
+        deadline = None
+        if self._duration > 0:
+            deadline = time.time() + self._duration
+        samples = []
+
+        async def worker() -> None:
+            while len(pending) > 0:
+                if deadline is not None and time.time() >= deadline:
+                    return None
+                name = pending.pop()
+                samples.append(await loop.run_in_executor(
+                    executor, self.send, name, time.time()))
+
+        await asyncio.gather(*[worker() for _ in range(self._concurrency)])
+        return samples
+
+    async def run_async(self) -> None:
+        schedule = self.schedule()
+        logging.info(
+            f'sending {len(schedule)} requests over {len(self._queries)} queries '
+            f'(qps: {self._qps or "unbounded"}, concurrency: {self._concurrency})')
+        start_time = time.time()
+        with ThreadPoolExecutor(max_workers=self._concurrency) as executor:
+            if self._qps > 0:
+                self._samples = await self.run_open_loop(schedule, executor)
+            else:
+                self._samples = await self.run_closed_loop(schedule, executor)
+        self._elapsed_time = time.time() - start_time
+
+    def run(self) -> Spy:
+        asyncio.run(self.run_async())
+        return self.report()
+
+    def summarize(
+        self, spy: Spy, row: str, samples: List[Tuple[str, str, float, float, int]]
+    ) -> None:
+        latencies = [sample[2] for sample in samples]
+        service_times = [sample[3] for sample in samples]
+        statuses = [sample[1] for sample in samples]
+        num_requests = len(samples)
+        num_ok = statuses.count('ok')
+        num_timeouts = statuses.count('timeout')
+        num_errors = statuses.count('error')
+        spy.report(row, 'query', row)
+        spy.report(row, 'num_requests', num_requests)
+        spy.report(row, 'num_ok', num_ok)
+        spy.report(row, 'num_timeouts', num_timeouts)
+        spy.report(row, 'num_errors', num_errors)
+        spy.report(row, 'timeout_rate', num_timeouts / max(1, num_requests))
+        spy.report(row, 'error_rate', num_errors / max(1, num_requests))
+        spy.report(row, 'throughput', num_ok / max(self._elapsed_time, 1e-9))
+        spy.report(row, 'num_solutions', sum([sample[4] for sample in samples]))
+        spy.report(row, 'latency_mean', sum(latencies) / max(1, num_requests))
+        spy.report(row, 'latency_p50', percentile(latencies, 50))
+        spy.report(row, 'latency_p95', percentile(latencies, 95))
+        spy.report(row, 'latency_p99', percentile(latencies, 99))
+        spy.report(row, 'latency_max', max(latencies, default=math.nan))
+        spy.report(row, 'service_time_p50', percentile(service_times, 50))
+        spy.report(row, 'service_time_p99', percentile(service_times, 99))
+        spy.report(row, 'target_qps', self._qps)
+        spy.report(row, 'achieved_qps', num_requests / max(self._elapsed_time, 1e-9))
+        spy.report(row, 'concurrency', self._concurrency)
+        spy.report(row, 'timeout', self._timeout)
+        spy.report(row, 'elapsed_time', self._elapsed_time)
+
+    def report(self) -> Spy:
+        spy = Spy()
+        for name in sorted(self._queries.keys()):
+            samples = [sample for sample in self._samples if sample[0] == name]
+            if len(samples) > 0:
+                self.summarize(spy, name, samples)
+        self.summarize(spy, 'all', self._samples)
+        return spy
@@ -0,0 +1,320 @@
+import re
+import time
+
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from query import Query
+from join_order import JoinOrder
+from bushy_join_order import BushyJoinOrder
+from search import FixedSearch
+from triple_pattern import TriplePattern
+from filter import Filter
+from multiset import Multiset
+from hdt_connector import HDTConnector
+
+
+def format_term(term: str) -> str:
+    if term.startswith('"') or term.startswith('_:'):
+        return term
+    return f'<{term}>'
+
+
+DISTINCT = re.compile('SELECT\\s+DISTINCT\\s+')
+SUBQUERY = re.compile('^\\s*{\\s*SELECT\\s[^{]*WHERE\\s*{\\s*$')
+SUBQUERY_END = re.compile('^\\s*}\\s*}\\s*$')
+
+
+def flatten(text: str) -> str:
+    lines = text.split('\n')
+    return '\n'.join([
+        line for line in lines if not SUBQUERY.match(line) and not SUBQUERY_END.match(line)])
+
+
+def parse_blocks(lines: Iterator[str]) -> List[Union[str, List]]:
+    block = []
+    for line in lines:
+        if SUBQUERY.match(line):
+            block.append(parse_blocks(lines))
+        elif SUBQUERY_END.match(line):
+            return block
+        else:
+            block.append(line)
+    return block
+
+
+def load_order(query: Query, lines: List[str]) -> Tuple[List[int], List[Optional[int]]]:
+    order, gearings = [], []
+    for line in lines:
+        pattern, _, comment = line.partition('#')
+        pattern = pattern.strip()
+        if pattern.endswith('.'):
+            pattern = pattern[:-1].strip()
+        for index, candidate in enumerate(query.patterns):
+            if index not in order and str(candidate) == pattern:
+                order.append(index)
+                if 'gearing reverse' in comment:
+                    gearings.append(2)
+                elif 'gearing forward' in comment:
+                    gearings.append(1)
+                else:
+                    gearings.append(None)
+                break
+    return order, gearings
+
+
+def load_branch(query: Query, block: List[Union[str, List]]) -> Union[JoinOrder, BushyJoinOrder]:
+    branches = [item for item in block if isinstance(item, list)]
+    if len(branches) == 0:
+        order, gearings = load_order(query, block)
+        return FixedSearch(None, order=order, gearings=gearings).run(query)
+    elif len(branches) != 2:
+        raise Exception(f'Bushy plans must join two branches, found {len(branches)}')
+    left, right = [load_branch(query, branch) for branch in branches]
+    filters = []
+    variables = left.variables.union(right.variables)
+    for filter in query.filters + query.multisets:
+        if filter in left or filter in right:
+            continue
+        if variables.issuperset(filter.variables):
+            filters.append(filter)
+    return BushyJoinOrder(left, right, filters=filters)
+
+
+def load_plan(query: Query, text: str) -> Union[JoinOrder, BushyJoinOrder]:
+    block = parse_blocks(iter(text.split('\n')))
+    if any([isinstance(item, list) for item in block]):
+        plan = load_branch(query, block)
+        if plan.size != query.size:
+            raise Exception(f'The plan covers {plan.size} of {query.size} triple patterns')
+        return plan
+    order, gearings = load_order(query, block)
+    for index in range(query.size):
+        if index not in order:
+            order.append(index)
+            gearings.append(None)
+    return FixedSearch(None, order=order, gearings=gearings).run(query)
+
+
+class LocalEngine():
+
+    def __init__(self, database: HDTConnector, **kwargs) -> None:
+        self._database = database
+        self._timeout = kwargs.get('timeout', 0)
+        self._deadline = None
+        self._lookups = 0
+        self._intermediates = 0
+        self._adjacency = {}
+
+    @property
+    def lookups(self) -> int:
+        return self._lookups
+
+    @property
+    def intermediates(self) -> int:
+        return self._intermediates
+
+    def tick(self) -> None:
+        self._intermediates += 1
+        if self._deadline is not None and time.time() > self._deadline:
+            raise TimeoutError(f'local execution exceeded {self._timeout}ms')
+
+    def search(self, s: str, p: str, o: str) -> Iterator[tuple]:
+        self._lookups += 1
+        return self._database.search(s, p, o)
+
+    def scan(
+        self, pattern: TriplePattern, solutions: Iterator[Dict[str, str]]
+    ) -> Iterator[Dict[str, str]]:
+        for mu in solutions:
+            terms = [mu.get(term, term) for term in pattern.to_tuple()[:3]]
+            bound = ['' if term[0] == '?' else term for term in terms]
+            for triple in self.search(*bound):
+                mapping = dict(mu)
+                for term, value in zip(terms, triple):
+                    if term[0] == '?' and mapping.setdefault(term, value) != value:
+                        break
+                else:
+                    self.tick()
+                    yield mapping
+
+    def adjacency(self, predicate: str) -> Tuple[Dict[str, List[str]], Dict[str, List[str]]]:
+        if predicate not in self._adjacency:
+            successors, predecessors = {}, {}
+            for s, _, o in self.search('', predicate, ''):
+                successors.setdefault(s, []).append(o)
+                predecessors.setdefault(o, []).append(s)
+            self._adjacency[predicate] = (successors, predecessors)
+        return self._adjacency[predicate]
+
+    def neighbours(self, node: str, predicate: str, forward: bool) -> Iterator[str]:
+        if predicate in self._adjacency:
+            successors, predecessors = self._adjacency[predicate]
+            yield from (successors if forward else predecessors).get(node, [])
+        elif forward:
+            for _, _, o in self.search(node, predicate, ''):
+                yield o
+        else:
+            for s, _, _ in self.search('', predicate, node):
+                yield s
+
+    def traverse(
+        self, source: str, predicate: str, forward: bool, zero: bool
+    ) -> Iterator[str]:
+        visited = set()
+        if zero:
+            visited.add(source)
+            self.tick()
+            yield source
+        frontier = [source]
+        while len(frontier) > 0:
+            next_frontier = []
+            for node in frontier:
+                for neighbour in self.neighbours(node, predicate, forward):
+                    if neighbour not in visited:
+                        visited.add(neighbour)
+                        next_frontier.append(neighbour)
+                        self.tick()
+                        yield neighbour
+            frontier = next_frontier
+
+    def reachable(
+        self, source: str, target: str, predicate: str, forward: bool, zero: bool
+    ) -> bool:
+        if zero and source == target:
+            return True
+        forward_visited, backward_visited = set([source]), set([target])
+        forward_frontier, backward_frontier = [source], [target]
+        while len(forward_frontier) > 0 and len(backward_frontier) > 0:
+            if len(forward_frontier) <= len(backward_frontier):
+                frontier, visited, others = forward_frontier, forward_visited, backward_visited
+                direction = forward
+            else:
+                frontier, visited, others = backward_frontier, backward_visited, forward_visited
+                direction = not forward
+            next_frontier = []
+            for node in frontier:
+                for neighbour in self.neighbours(node, predicate, direction):
+                    if neighbour in others:
+                        return True
+                    if neighbour not in visited:
+                        visited.add(neighbour)
+                        next_frontier.append(neighbour)
+                        self.tick()
+            if direction == forward:
+                forward_frontier = next_frontier
+            else:
+                backward_frontier = next_frontier
+        return False
+
+    def sources(self, predicate: str, forward: bool) -> List[str]:
+        successors, predecessors = self.adjacency(predicate)
+        return list(successors.keys() if forward else predecessors.keys())
+
+    def closure(
+        self, join_order: JoinOrder, solutions: Iterator[Dict[str, str]]
+    ) -> Iterator[Dict[str, str]]:
+        pattern = join_order.pattern
+        forward = join_order.gearing != 2
+        start, end = (pattern.subject, pattern.object) if forward else \
+            (pattern.object, pattern.subject)
+        for mu in solutions:
+            source = mu.get(start, start)
+            target = mu.get(end, end)
+            if source[0] == '?':
+                candidates = self.sources(pattern.predicate, forward)
+            else:
+                candidates = [source]
+            for node in candidates:
+                mapping = dict(mu)
+                if source[0] == '?':
+                    mapping[source] = node
+                if start == end:
+                    if self.reachable(node, node, pattern.predicate, forward, pattern.zero):
+                        self.tick()
+                        yield mapping
+                elif target[0] != '?':
+                    if self.reachable(node, target, pattern.predicate, forward, pattern.zero):
+                        self.tick()
+                        yield mapping
+                else:
+                    for reached in self.traverse(node, pattern.predicate, forward, pattern.zero):
+                        yield mapping | {target: reached}
+
+    def filter(
+        self, filter: Filter, solutions: Iterator[Dict[str, str]]
+    ) -> Iterator[Dict[str, str]]:
+        evaluate = filter.compile(self._database)
+        for mu in solutions:
+            if evaluate(mu):
+                yield mu
+
+    def values(
+        self, multiset: Multiset, solutions: Iterator[Dict[str, str]]
+    ) -> Iterator[Dict[str, str]]:
+        evaluate = multiset.compile(self._database)
+        for mu in solutions:
+            if multiset.variables.issubset(mu.keys()):
+                if evaluate(mu):
+                    yield mu
+                continue
+            for row in multiset.omega:
+                if all([mu.get(variable, value) == value for variable, value in row.items()]):
+                    self.tick()
+                    yield mu | row
+
+    def hash_join(
+        self, left: Union[JoinOrder, BushyJoinOrder], right: Union[JoinOrder, BushyJoinOrder]
+    ) -> Iterator[Dict[str, str]]:
+        shared = sorted(left.variables.intersection(right.variables))
+        table = {}
+        for mu in self.evaluate(right):
+            table.setdefault(tuple([mu.get(v) for v in shared]), []).append(mu)
+        for mu in self.evaluate(left):
+            for other in table.get(tuple([mu.get(v) for v in shared]), []):
+                self.tick()
+                yield mu | other
+
+    def evaluate(
+        self, plan: Union[JoinOrder, BushyJoinOrder]
+    ) -> Iterator[Dict[str, str]]:
+        if isinstance(plan, BushyJoinOrder):
+            solutions = self.hash_join(plan.left, plan.right)
+            for filter in plan.filters:
+                if filter.is_multiset():
+                    solutions = self.values(filter, solutions)
+                else:
+                    solutions = self.filter(filter, solutions)
+            return solutions
+        solutions = iter([dict(plan.bindings)])
+        for join_order in plan.decompose():
+            if join_order.pattern.is_filter():
+                solutions = self.filter(join_order.pattern, solutions)
+            elif join_order.pattern.is_multiset():
+                solutions = self.values(join_order.pattern, solutions)
+            elif join_order.pattern.more:
+                solutions = self.closure(join_order, solutions)
+            else:
+                solutions = self.scan(join_order.pattern, solutions)
+        return solutions
+
+    def execute(
+        self, plan: Union[JoinOrder, BushyJoinOrder], distinct: bool = True,
+        variables: Optional[List[str]] = None
+    ) -> Iterator[Dict[str, str]]:
+        self._lookups = 0
+        self._intermediates = 0
+        if self._timeout > 0:
+            self._deadline = time.time() + self._timeout / 1000
+        else:
+            self._deadline = None
+        if variables is None:
+            variables = sorted(plan.variables.union(plan.bindings.keys()))
+        seen = set()
+        for mu in self.evaluate(plan):
+            solution = {v: format_term(mu[v]) if v in mu else '' for v in variables}
+            if distinct:
+                key = tuple(solution.values())
+                if key in seen:
+                    continue
+                seen.add(key)
+            yield solution
@@ -1,6 +1,11 @@
-from typing import List, Dict
+from __future__ import annotations
+
+from random import randint
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+from functools import cached_property
 
 from pattern import Pattern
+from hdt_connector import HDTConnector
 from filter import (
     Filter,
     BasicExpression,
@@ -14,6 +19,23 @@ class Multiset(Pattern):
     def __init__(self, omega: List[Dict[str, str]]) -> None:
         super().__init__(None)
         self._omega = omega
+        self._compiled = None
+        self._id_rows = None
+
+    @property
+    def omega(self) -> List[Dict[str, str]]:
+        return self._omega
+
+    @property
+    def size(self) -> int:
+        return len(self._omega)
+
+    @cached_property
+    def variables(self) -> Set[str]:
+        variables = set()
+        for mappings in self._omega:
+            variables.update(mappings.keys())
+        return variables
 
     def is_triple(self) -> bool:
         return False
@@ -21,6 +43,94 @@ class Multiset(Pattern):
     def is_filter(self) -> bool:
         return False
 
+    def is_multiset(self) -> bool:
+        return True
+
+    @staticmethod
+    def resolve(term: str, database: HDTConnector) -> int:
+        if not isinstance(BasicExpression.decode(term, database), str):
+            return 0
+        id = database.get_term_id(term)
+        if id > 0 and database.get_term(id) == term:
+            return id
+        return 0
+
+    def id_rows(self, database: HDTConnector) -> List[Optional[Dict[str, int]]]:
+        if self._id_rows is None or self._id_rows[0] is not database:
+            rows = []
+            for mappings in self._omega:
+                row = {
+                    variable: self.resolve(term, database) for variable, term in mappings.items()}
+                rows.append(row if all([id > 0 for id in row.values()]) else None)
+            self._id_rows = (database, rows)
+        return self._id_rows[1]
+
+    def sample(
+        self, database: Optional[HDTConnector] = None
+    ) -> Tuple[Optional[Dict[str, Any]], int]:
+        if self.size == 0:
+            return None, 0
+        if database is None:
+            return self._omega[randint(0, self.size - 1)], self.size
+        return self.id_rows(database)[randint(0, self.size - 1)], self.size
+
+    def build(self, database: HDTConnector) -> Callable[[Dict[str, Any]], bool]:
+        variables = sorted(self.variables)
+        terms, partial = set(), []
+        for mappings in self._omega:
+            row = {variable: BasicExpression.decode(term, database)
+                   for variable, term in mappings.items()}
+            if len(row) == len(variables):
+                terms.add(tuple([row[variable] for variable in variables]))
+            else:
+                partial.append(row)
+        ids = set()
+        for row in self.id_rows(database):
+            if row is not None and len(row) == len(variables):
+                ids.add(tuple([row[variable] for variable in variables]))
+        exact = len(ids) == self.size
+        decoded = {}
+
+        def decode(term: Any) -> Any:
+            if term not in decoded:
+                decoded[term] = BasicExpression.decode(term, database)
+            return decoded[term]
+
+        def evaluate(mappings: Dict[str, Any]) -> bool:
+            key = tuple([mappings.get(variable, variable) for variable in variables])
+            if all([isinstance(term, int) for term in key]):
+                if key in ids:
+                    return True
+                elif exact:
+                    return False
+            values = tuple([decode(term) for term in key])
+            if values in terms:
+                return True
+            return any([
+                all([values[variables.index(variable)] == value
+                     for variable, value in row.items()])
+                for row in partial])
+
+        return evaluate
+
+    def compile(self, database: HDTConnector) -> Callable[[Dict[str, Any]], bool]:
+        if self._compiled is None or self._compiled[0] is not database:
+            self._compiled = (database, self.build(database))
+        return self._compiled[1]
+
+    def eval(self, mappings: Dict[str, Any], database: HDTConnector) -> bool:
+        return self.compile(database)(mappings)
+
+    def eval_all(self, mappings: List[Dict[str, Any]], database: HDTConnector) -> List[bool]:
+        evaluate = self.compile(database)
+        variables = sorted(self.variables)
+        keys = [tuple([mu.get(variable) for variable in variables]) for mu in mappings]
+        results = {}
+        for key, mu in zip(keys, mappings):
+            if key not in results:
+                results[key] = evaluate(mu)
+        return [results[key] for key in keys]
+
     def to_filter(self) -> Filter:
         disjunctive_clauses = []
         for mappings in self._omega:
@@ -38,10 +148,21 @@ class Multiset(Pattern):
             return Filter(ConditionalOrExpression(disjunctive_clauses))
         return Filter(disjunctive_clauses[0])
 
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state['_compiled'] = None
+        state['_id_rows'] = None
+        return state
+
+    def stringify(self, target: str) -> str:
+        return str(self)
+
     def __repr__(self) -> str:
-        variables = ' '.join(list(self._omega[0].keys()))
-        values = []
+        variables = sorted(self.variables)
+        rows = []
         for mappings in self._omega:
-            values.extend([f'({v})' for v in list(mappings.values())])
-        values = ' '.join(values)
-        return f'VALUES ({variables}) {{ {values} }}'
+            values = [
+                repr(BasicExpression(mappings[variable])) if variable in mappings else 'UNDEF'
+                for variable in variables]
+            rows.append(f'({" ".join(values)})')
+        return f'VALUES ({" ".join(variables)}) {{ {" ".join(rows)} }}'
@@ -22,6 +22,9 @@ class Pattern(ABC):
     def is_filter(self) -> bool:
         pass
 
+    def is_multiset(self) -> bool:
+        return False
+
     def __eq__(self, other: Pattern) -> bool:
         return self.id == other.id
 
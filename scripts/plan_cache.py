@@ -0,0 +1,67 @@
+import json
+import logging
+import sqlite3
+
+from typing import Optional, Union
+
+from query import Query
+from template import QueryTemplate
+from join_order import JoinOrder
+from bushy_join_order import BushyJoinOrder
+from cost_model import CostModel, CoutCostModel
+from search import FixedSearch
+from estimators.estimator import CardinalityEstimator
+
+
+class PlanCache():
+
+    def __init__(self, filename: str, **kwargs) -> None:
+        self._connection = sqlite3.connect(filename, timeout=60)
+        self._tolerance = kwargs.get('tolerance', 10.0)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS plans ('
+            'template TEXT PRIMARY KEY, '
+            'positions TEXT NOT NULL, '
+            'gearings TEXT NOT NULL, '
+            'cost REAL NOT NULL, '
+            'cardinality REAL NOT NULL)')
+        self._connection.commit()
+
+    def lookup(
+        self, query: Query, estimator: CardinalityEstimator,
+        cost_model: Optional[CostModel] = None
+    ) -> Optional[JoinOrder]:
+        template = QueryTemplate(query)
+        row = self._connection.execute(
+            'SELECT positions, gearings, cost FROM plans WHERE template = ?',
+            (template.key,)).fetchone()
+        if row is None:
+            logging.debug(f'plan cache miss: {template.key}')
+            return None
+        positions, gearings, cached_cost = json.loads(row[0]), json.loads(row[1]), row[2]
+        order = [template.order[position] for position in positions]
+        optimizer = FixedSearch(
+            estimator, order=order, gearings=gearings,
+            cost_model=cost_model if cost_model is not None else CoutCostModel())
+        join_order = optimizer.run(query)
+        if join_order.cost > self._tolerance * max(cached_cost, 1.0):
+            logging.debug(
+                f'plan cache stale: {template.key} ({join_order.cost} > {cached_cost})')
+            return None
+        logging.debug(f'plan cache hit: {template.key}')
+        return join_order
+
+    def store(self, query: Query, join_order: Union[JoinOrder, BushyJoinOrder]) -> None:
+        if isinstance(join_order, BushyJoinOrder):
+            return None
+        template = QueryTemplate(query)
+        positions, gearings = [], []
+        for node in join_order.decompose():
+            if node.pattern.is_triple():
+                positions.append(template.position(node.pattern))
+                gearings.append(node.gearing)
+        self._connection.execute(
+            'INSERT OR REPLACE INTO plans VALUES (?, ?, ?, ?, ?)',
+            (template.key, json.dumps(positions), json.dumps(gearings),
+             join_order.cost, join_order.cardinality))
+        self._connection.commit()
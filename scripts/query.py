@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from typing import List
+from typing import Dict, List, Optional
 
 from triple_pattern import TriplePattern
 from filter import Filter
@@ -11,12 +11,13 @@ class Query():
 
     def __init__(
         self, name: str, patterns: List[TriplePattern], filters: List[Filter],
-        multisets: List[Multiset]
+        multisets: List[Multiset], bindings: Optional[Dict[str, str]] = None
     ) -> None:
         self._name = name
         self._patterns = patterns
         self._filters = filters
         self._multisets = multisets
+        self._bindings = bindings if bindings is not None else {}
 
     @property
     def name(self) -> str:
@@ -34,24 +35,36 @@ class Query():
     def multisets(self) -> List[Multiset]:
         return self._multisets
 
+    @property
+    def bindings(self) -> Dict[str, str]:
+        return self._bindings
+
     @property
     def size(self) -> int:
         return len(self.patterns)
 
     def stringify(self, target: str) -> str:
         patterns = []
+        if len(self.bindings) > 0:
+            patterns.append('\t' + Multiset([self.bindings]).stringify(target) + ' .')
         for pattern in self.patterns:
             patterns.append('\t' + pattern.stringify(target) + ' .')
         for filter in self.filters:
             patterns.append('\t' + filter.stringify(target) + ' .')
+        for multiset in self.multisets:
+            patterns.append('\t' + multiset.stringify(target) + ' .')
         body = '\n'.join(patterns)
         return f'SELECT DISTINCT * WHERE {{\n{body}\n}}'
 
     def __repr__(self) -> str:
         patterns = []
+        if len(self.bindings) > 0:
+            patterns.append(f'\t{Multiset([self.bindings])} .')
         for pattern in self.patterns:
             patterns.append(f'\t{pattern} .')
         for filter in self.filters:
             patterns.append(f'\t{filter} .')
+        for multiset in self.multisets:
+            patterns.append(f'\t{multiset} .')
         body = '\n'.join(patterns)
         return f'SELECT DISTINCT * WHERE {{\n{body}\n}}'
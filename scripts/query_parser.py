@@ -0,0 +1,503 @@
+import re
+import os
+import pickle
+import hashlib
+
+from functools import cmp_to_key
+from decimal import Decimal, InvalidOperation
+from typing import List, Optional, Tuple, Union
+from uuid import uuid4
+
+from query import Query
+from triple_pattern import TriplePattern
+from filter import (
+    Filter,
+    Expression,
+    BasicExpression,
+    STRExpression,
+    RelationalExpression,
+    RegexExpression,
+    NotExpression,
+    ConditionalAndExpression,
+    ConditionalOrExpression)
+from multiset import Multiset
+
+
+VERSION = 3
+CACHE_DIRECTORY = os.path.join('.cache', 'queries')
+
+RDF_TYPE = 'http://www.w3.org/1999/02/22-rdf-syntax-ns#type'
+XSD = 'http://www.w3.org/2001/XMLSchema#'
+NUMERIC_DATATYPES = set([f'{XSD}{datatype}' for datatype in [
+    'integer', 'decimal', 'double', 'float', 'int', 'long', 'short', 'byte',
+    'nonNegativeInteger', 'nonPositiveInteger', 'positiveInteger', 'negativeInteger',
+    'unsignedInt', 'unsignedLong', 'unsignedShort', 'unsignedByte']])
+
+TOKENS = re.compile('|'.join([
+    '(?P<SKIP>\\s+|#[^\\n]*)',
+    '(?P<IRI><[^<>"{}|^`\\\\\\s]*>)',
+    '(?P<LONG_STRING>"""|\'\'\')',
+    '(?P<STRING>"(?:[^"\\\\\\n\\r]|\\\\.)*"|\'(?:[^\'\\\\\\n\\r]|\\\\.)*\')',
+    '(?P<LANG>@[A-Za-z]+(?:-[A-Za-z0-9]+)*)',
+    '(?P<VAR>[?$][A-Za-z0-9_]+)',
+    '(?P<PNAME>(?:[A-Za-z](?:[\\w.-]*[\\w-])?)?:(?:[\\w:%-](?:[\\w.:%-]*[\\w:%-])?)?)',
+    '(?P<NUMBER>[0-9]*\\.[0-9]+(?:[eE][+-]?[0-9]+)?|[0-9]+\\.?[0-9]*[eE][+-]?[0-9]+|[0-9]+)',
+    '(?P<NAME>[A-Za-z_][A-Za-z0-9_]*)',
+    '(?P<BNODE>_:|\\[)',
+    '(?P<PUNCT>\\^\\^|&&|\\|\\||!=|<=|>=|[{}().;,*+/^|?!=<>-])']))
+
+ESCAPES = {
+    't': '\t', 'n': '\n', 'r': '\r', 'b': '\b', 'f': '\f', '"': '"', "'": "'",
+    '\\': '\\'}
+
+
+class UnsupportedQuery(Exception):
+    pass
+
+
+def tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = TOKENS.match(text, position)
+        if match is None:
+            raise UnsupportedQuery(f'Unexpected character: {text[position]}')
+        kind = match.lastgroup
+        if kind == 'LONG_STRING' or kind == 'BNODE':
+            raise UnsupportedQuery(f'Unsupported token: {match.group(0)}')
+        elif kind != 'SKIP':
+            tokens.append((kind, match.group(0)))
+        position = match.end()
+    tokens.append(('EOF', ''))
+    return tokens
+
+
+def unescape(text: str) -> str:
+    if '\\u' in text or '\\U' in text:
+        raise UnsupportedQuery('Unicode escapes are not supported')
+    try:
+        return re.sub('\\\\(.)', lambda match: ESCAPES[match.group(1)], text)
+    except KeyError as error:
+        raise UnsupportedQuery(f'Invalid escape sequence: {error}')
+
+
+def literal(value: str, language: Optional[str] = None, datatype: Optional[str] = None) -> str:
+    if '\n' in value:
+        raise UnsupportedQuery('Multi-line literals are not supported')
+    value = value.replace('\\', '\\\\').replace('"', '\\"').replace('\r', '\\r')
+    if language is not None:
+        return f'"{value}"@{language}'
+    elif datatype is not None:
+        return f'"{value}"^^<{datatype}>'
+    return f'"{value}"'
+
+
+def split_literal(term: str) -> Tuple[str, str, Optional[str]]:
+    value, _, suffix = term[1:].rpartition('"')
+    value = value.replace('\\r', '\r').replace('\\"', '"').replace('\\\\', '\\')
+    if suffix.startswith('@'):
+        return value, suffix[1:], None
+    elif suffix.startswith('^^'):
+        return value, '', suffix[3:-1]
+    return value, '', None
+
+
+def numeric_value(value: str, datatype: Optional[str]) -> Optional[Decimal]:
+    if datatype not in NUMERIC_DATATYPES:
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        return None
+
+
+def literal_greater(left: str, right: str) -> bool:
+    left_value, left_language, left_datatype = split_literal(left)
+    right_value, right_language, right_datatype = split_literal(right)
+    left_number = numeric_value(left_value, left_datatype)
+    right_number = numeric_value(right_value, right_datatype)
+    if left_number is not None and right_number is not None:
+        return left_number > right_number
+    left_coalesced = left_datatype or f'{XSD}string'
+    right_coalesced = right_datatype or f'{XSD}string'
+    if left_coalesced != right_coalesced:
+        return left_coalesced > right_coalesced
+    if left_language != right_language:
+        return left_language > right_language
+    if left_value != right_value:
+        return left_value > right_value
+    if left_datatype != right_datatype:
+        return right_datatype is None
+    return False
+
+
+def term_rank(term: Union[str, List[Tuple[str, str]]]) -> int:
+    if isinstance(term, list):
+        return 0
+    elif term[0] == '?':
+        return 1
+    elif term[0] != '"':
+        return 2
+    return 3
+
+
+def term_less(left: Union[str, List[Tuple[str, str]]], right: Union[str, List[Tuple[str, str]]]) -> bool:
+    left_rank, right_rank = term_rank(left), term_rank(right)
+    if left_rank != right_rank:
+        return left_rank < right_rank
+    elif left_rank == 0:
+        return path_repr(left) < path_repr(right)
+    elif left_rank == 3:
+        return literal_greater(right, left)
+    return left < right
+
+
+def compare_triples(left: Tuple[Tuple, Tuple], right: Tuple[Tuple, Tuple]) -> int:
+    if left[0] != right[0]:
+        return -1 if left[0] < right[0] else 1
+    for left_term, right_term in zip(left[1], right[1]):
+        if left_term != right_term:
+            return -1 if term_less(left_term, right_term) else 1
+    return 0
+
+
+def path_repr(path: List[Tuple[str, str]]) -> str:
+    elements = [f'Path({iri}{mod})' if mod != '' else iri for iri, mod in path]
+    if len(elements) == 1:
+        return elements[0]
+    return f'Path({" / ".join(elements)})'
+
+
+def reorder(triples: List[Tuple]) -> List[Tuple]:
+    counts = {}
+    for triple in triples:
+        for term in triple:
+            if isinstance(term, str) and term[0] == '?':
+                counts[term] = counts.get(term, 0) + 1
+    known = set()
+
+    def key(triple: Tuple) -> Tuple:
+        unbound = len([
+            term for term in triple
+            if isinstance(term, str) and term[0] == '?' and term not in known])
+        weight = -sum([
+            counts.get(term, 0) for term in triple if isinstance(term, str)])
+        return (unbound, weight, triple[2][0] != '"')
+
+    triples = [(None, triple) for triple in triples]
+    i = 0
+    while i < len(triples):
+        triples[i:] = sorted(
+            [(key(triple), triple) for _, triple in triples[i:]],
+            key=cmp_to_key(compare_triples))
+        top = triples[i][0][0]
+        j = 0
+        while i + j < len(triples) and triples[i + j][0][0] == top:
+            for term in triples[i + j][1]:
+                if isinstance(term, str) and term[0] == '?':
+                    known.add(term)
+            j += 1
+        i += 1
+    return [triple for _, triple in triples]
+
+
+class Parser():
+
+    def __init__(self, text: str) -> None:
+        self._tokens = tokenize(text)
+        self._position = 0
+        self._prefixes = {}
+        self._blocks = []
+        self._filters = []
+        self._multisets = []
+
+    def peek(self, offset: int = 0) -> Tuple[str, str]:
+        return self._tokens[self._position + offset]
+
+    def next(self) -> Tuple[str, str]:
+        token = self._tokens[self._position]
+        self._position += 1
+        return token
+
+    def accept(self, value: str) -> bool:
+        kind, token = self.peek()
+        if kind in ['PUNCT', 'NAME'] and token.upper() == value:
+            self._position += 1
+            return True
+        return False
+
+    def expect(self, value: str) -> None:
+        if not self.accept(value):
+            raise UnsupportedQuery(f'Expected {value}, found {self.peek()[1]}')
+
+    def iri(self, token: Tuple[str, str]) -> str:
+        kind, value = token
+        if kind == 'IRI':
+            return value[1:-1]
+        prefix, _, local = value.partition(':')
+        if prefix not in self._prefixes:
+            raise UnsupportedQuery(f'Unknown prefix: {prefix}')
+        return self._prefixes[prefix] + local
+
+    def term(self) -> str:
+        kind, value = self.next()
+        if kind == 'VAR':
+            return f'?{value[1:]}'
+        elif kind in ['IRI', 'PNAME']:
+            return self.iri((kind, value))
+        elif kind == 'STRING':
+            value = unescape(value[1:-1])
+            if self.peek()[0] == 'LANG':
+                return literal(value, language=self.next()[1][1:])
+            elif self.accept('^^'):
+                token = self.next()
+                if token[0] not in ['IRI', 'PNAME']:
+                    raise UnsupportedQuery(f'Invalid datatype: {token[1]}')
+                return literal(value, datatype=self.iri(token))
+            return literal(value)
+        elif kind == 'NUMBER' or (kind == 'PUNCT' and value in '+-'):
+            sign = ''
+            if kind == 'PUNCT':
+                sign = '-' if value == '-' else ''
+                kind, value = self.next()
+                if kind != 'NUMBER':
+                    raise UnsupportedQuery(f'Unexpected token: {value}')
+            if 'e' in value.lower():
+                raise UnsupportedQuery('Double literals are not supported')
+            elif '.' in value:
+                return literal(str(Decimal(sign + value)), datatype=f'{XSD}decimal')
+            return literal(str(int(sign + value)), datatype=f'{XSD}integer')
+        raise UnsupportedQuery(f'Unexpected token: {value}')
+
+    def verb(self) -> Union[str, List[Tuple[str, str]]]:
+        kind, value = self.peek()
+        if kind == 'NAME' and value == 'a':
+            self.next()
+            return RDF_TYPE
+        elif kind == 'VAR':
+            return self.term()
+        path = []
+        while True:
+            token = self.next()
+            if token[0] not in ['IRI', 'PNAME']:
+                raise UnsupportedQuery(f'Unsupported property path: {token[1]}')
+            mod = ''
+            if self.peek() in [('PUNCT', '*'), ('PUNCT', '+')]:
+                mod = self.next()[1]
+            elif self.peek() == ('PUNCT', '?'):
+                raise UnsupportedQuery('Unsupported property path: ?')
+            path.append((self.iri(token), mod))
+            if not self.accept('/'):
+                break
+        if self.peek() in [('PUNCT', '|'), ('PUNCT', '^')]:
+            raise UnsupportedQuery(f'Unsupported property path: {self.peek()[1]}')
+        if len(path) == 1 and path[0][1] == '':
+            return path[0][0]
+        return path
+
+    def triples(self, block: List[Tuple]) -> None:
+        subject = self.term()
+        while True:
+            predicate = self.verb()
+            while True:
+                block.append((subject, predicate, self.term()))
+                if not self.accept(','):
+                    break
+            if not self.accept(';'):
+                break
+            if self.peek() in [('PUNCT', '.'), ('PUNCT', '}')]:
+                break
+
+    def primary(self) -> Expression:
+        kind, value = self.peek()
+        if self.accept('('):
+            expression = self.expression()
+            self.expect(')')
+            return expression
+        elif kind == 'NAME' and value.upper() == 'REGEX':
+            self.next()
+            self.expect('(')
+            argument = self.expression()
+            self.expect(',')
+            kind, pattern = self.next()
+            if kind != 'STRING':
+                raise UnsupportedQuery('Regular expressions must be string literals')
+            if self.accept(','):
+                self.next()
+            self.expect(')')
+            return RegexExpression(argument, unescape(pattern[1:-1]))
+        elif kind == 'NAME' and value.upper() == 'STR':
+            self.next()
+            self.expect('(')
+            argument = self.expression()
+            self.expect(')')
+            return STRExpression(argument)
+        elif kind == 'NAME':
+            raise UnsupportedQuery(f'Unsupported function: {value}')
+        elif kind == 'PUNCT' and value in ['+', '-']:
+            raise UnsupportedQuery(f'Unsupported unary operator: {value}')
+        return BasicExpression(self.term())
+
+    def unary(self) -> Expression:
+        if self.accept('!'):
+            return NotExpression(self.unary())
+        return self.primary()
+
+    def relational(self) -> Expression:
+        left = self.unary()
+        kind, value = self.peek()
+        if kind == 'PUNCT' and value in ['=', '!=', '<', '>', '<=', '>=']:
+            self.next()
+            return RelationalExpression(left, value, self.unary())
+        elif kind == 'NAME' and value.upper() in ['IN', 'NOT']:
+            raise UnsupportedQuery(f'Unsupported operator: {value}')
+        return left
+
+    def conjunction(self) -> Expression:
+        clauses = [self.relational()]
+        while self.accept('&&'):
+            clauses.append(self.relational())
+        if len(clauses) > 1:
+            return ConditionalAndExpression(clauses)
+        return clauses[0]
+
+    def expression(self) -> Expression:
+        clauses = [self.conjunction()]
+        while self.accept('||'):
+            clauses.append(self.conjunction())
+        if len(clauses) > 1:
+            return ConditionalOrExpression(clauses)
+        return clauses[0]
+
+    def values(self) -> None:
+        variables = []
+        if self.accept('('):
+            while not self.accept(')'):
+                variables.append(self.term())
+            rows = []
+            self.expect('{')
+            while not self.accept('}'):
+                self.expect('(')
+                row = []
+                while not self.accept(')'):
+                    row.append(self.value())
+                rows.append(row)
+        else:
+            variables.append(self.term())
+            rows = []
+            self.expect('{')
+            while not self.accept('}'):
+                rows.append([self.value()])
+        omega = []
+        for row in rows:
+            omega.append({variable: value for variable, value in zip(variables, row)})
+        self._multisets.append(Multiset(omega))
+
+    def value(self) -> str:
+        if self.peek()[0] == 'NAME' and self.peek()[1].upper() == 'UNDEF':
+            raise UnsupportedQuery('UNDEF values are not supported')
+        value = self.term()
+        if value[0] == '?':
+            raise UnsupportedQuery('Variables are not allowed in VALUES')
+        return value
+
+    def group(self) -> None:
+        self.expect('{')
+        block = []
+        while not self.accept('}'):
+            kind, value = self.peek()
+            if self.accept('.'):
+                continue
+            elif kind == 'NAME' and value.upper() == 'FILTER':
+                self.next()
+                self._filters.append(self.primary())
+            elif kind == 'NAME' and value.upper() == 'VALUES':
+                self.next()
+                self._blocks.append(block)
+                block = []
+                self.values()
+            elif kind == 'NAME' and value != 'a':
+                raise UnsupportedQuery(f'Unsupported keyword: {value}')
+            elif kind == 'PUNCT' and value == '{':
+                raise UnsupportedQuery('Nested groups are not supported')
+            else:
+                self.triples(block)
+        self._blocks.append(block)
+
+    def parse(self, name: str = '') -> Query:
+        while True:
+            if self.accept('PREFIX'):
+                kind, prefix = self.next()
+                kind, iri = self.next()
+                if kind != 'IRI' or not prefix.endswith(':'):
+                    raise UnsupportedQuery('Invalid prefix declaration')
+                self._prefixes[prefix[:-1]] = iri[1:-1]
+            elif self.peek()[0] == 'NAME' and self.peek()[1].upper() == 'BASE':
+                raise UnsupportedQuery('BASE declarations are not supported')
+            else:
+                break
+        self.expect('SELECT')
+        if self.accept('*') is False:
+            if self.peek()[0] != 'VAR':
+                raise UnsupportedQuery(f'Unsupported projection: {self.peek()[1]}')
+            while self.peek()[0] == 'VAR':
+                self.next()
+        self.accept('WHERE')
+        self.group()
+        if self.accept('VALUES'):
+            self.values()
+        if self.peek()[0] != 'EOF':
+            raise UnsupportedQuery(f'Unsupported solution modifier: {self.peek()[1]}')
+        return self.build(name)
+
+    def build(self, name: str) -> Query:
+        patterns = []
+        for block in self._blocks:
+            for subject, predicate, object in reorder(block):
+                if isinstance(predicate, str):
+                    patterns.append(TriplePattern(subject, predicate, object))
+                    continue
+                for index, (iri, mod) in enumerate(predicate):
+                    if index < len(predicate) - 1:
+                        target = f'?c{uuid4().int % 1000}'
+                    else:
+                        target = object
+                    patterns.append(TriplePattern(
+                        subject, iri, target, zero=mod == '*', more=mod != ''))
+                    subject = target
+        filters = []
+        if len(self._filters) == 1 and isinstance(self._filters[0], ConditionalAndExpression):
+            filters.extend([Filter(clause) for clause in self._filters[0]._clauses])
+        else:
+            filters.extend([Filter(expression) for expression in self._filters])
+        return Query(name, patterns, filters, self._multisets)
+
+
+def parse(text: str, name: str = '') -> Query:
+    return Parser(text).parse(name=name)
+
+
+def cache_filename(text: str) -> str:
+    digest = hashlib.sha1(f'{VERSION}\n{text}'.encode('utf-8')).hexdigest()
+    return os.path.join(CACHE_DIRECTORY, f'{digest}.pickle')
+
+
+def load_cached(text: str, name: str = '') -> Optional[Query]:
+    try:
+        with open(cache_filename(text), 'rb') as reader:
+            query = pickle.load(reader)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return None
+    return Query(name, query.patterns, query.filters, query.multisets)
+
+
+def store_cached(text: str, query: Query) -> None:
+    filename = cache_filename(text)
+    try:
+        os.makedirs(CACHE_DIRECTORY, exist_ok=True)
+        temporary = f'{filename}.{os.getpid()}.tmp'
+        with open(temporary, 'wb') as writer:
+            pickle.dump(query, writer)
+        os.replace(temporary, filename)
+    except OSError:
+        pass
@@ -0,0 +1,278 @@
+import re
+import json
+import time
+import random
+import sqlite3
+import hashlib
+import logging
+import threading
+
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import utils
+import rewrite
+
+from hdt_connector import HDTConnector
+from local_engine import DISTINCT, LocalEngine, flatten, load_plan
+from transport import HTTPTransport
+
+
+XSD_INTEGER = 'http://www.w3.org/2001/XMLSchema#integer'
+TRANSITIVE = re.compile(
+    '^(\\s*)(\\S+) (\\S+) (\\S+) OPTION\\s*\\(TRANSITIVE, t_distinct, t_min\\((\\d)\\)'
+    '(?:, t_direction (\\d))?\\)\\s*\\.?\\s*$')
+COUNT = re.compile('\\(COUNT\\((DISTINCT )?\\*\\) AS \\?(\\w+)\\)\\s*WHERE\\s*{')
+PROJECTION = re.compile('SELECT\\s+(DISTINCT\\s+)?(.*?)\\s*WHERE', re.DOTALL)
+
+
+def translate(query: str) -> str:
+    query = re.sub('DEFINE sql:select-option "order"\\s*', '', query)
+    query = re.sub('IRI\\((\\?\\w+)\\)', '\\1', query)
+    lines = []
+    for line in query.split('\n'):
+        match = TRANSITIVE.match(line)
+        if 'hint:Prior hint:gearing' in line and len(lines) > 0:
+            gearing = 'forward' if '"forward"' in line else 'reverse'
+            lines[-1] = f'{lines[-1]}  # gearing {gearing}'
+        elif 'hint:' in line:
+            continue
+        elif match is not None:
+            indent, s, p, o, t_min, t_direction = match.groups()
+            mod = '*' if t_min == '0' else '+'
+            line = f'{indent}{s} {p}{mod} {o} .'
+            if t_direction is not None:
+                gearing = 'forward' if t_direction == '1' else 'reverse'
+                line = f'{line}  # gearing {gearing}'
+            lines.append(line)
+        else:
+            lines.append(line)
+    return '\n'.join(lines)
+
+
+def extract_group(query: str, start: int) -> str:
+    depth = 0
+    for position in range(start, len(query)):
+        if query[position] == '{':
+            depth += 1
+        elif query[position] == '}':
+            depth -= 1
+            if depth == 0:
+                return query[start:position + 1]
+    raise Exception('Unbalanced braces in the query')
+
+
+def to_json_term(term: str) -> Optional[Dict[str, str]]:
+    if term == '':
+        return None
+    elif term.startswith('<'):
+        return {'type': 'uri', 'value': term[1:-1]}
+    elif term.startswith('_:'):
+        return {'type': 'bnode', 'value': term[2:]}
+    value, _, suffix = term[1:].rpartition('"')
+    literal = {'type': 'literal', 'value': value.replace('\\"', '"')}
+    if suffix.startswith('@'):
+        literal['xml:lang'] = suffix[1:]
+    elif suffix.startswith('^^'):
+        literal['datatype'] = suffix[3:-1]
+    return literal
+
+
+class ReplayStore():
+
+    def __init__(self, filename: str) -> None:
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(filename, timeout=60, check_same_thread=False)
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS recordings ('
+            'key TEXT PRIMARY KEY, '
+            'query TEXT NOT NULL, '
+            'content_type TEXT NOT NULL, '
+            'body BLOB NOT NULL, '
+            'latency REAL NOT NULL)')
+        self._connection.commit()
+
+    @staticmethod
+    def key(graph: str, accept: str, query: str) -> str:
+        text = f'{graph}\n{accept}\n{" ".join(query.split())}'
+        return hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[str, bytes, float]]:
+        with self._lock:
+            return self._connection.execute(
+                'SELECT content_type, body, latency FROM recordings WHERE key = ?',
+                (key,)).fetchone()
+
+    def put(
+        self, key: str, query: str, content_type: str, body: bytes, latency: float
+    ) -> None:
+        with self._lock:
+            self._connection.execute(
+                'INSERT OR REPLACE INTO recordings VALUES (?, ?, ?, ?, ?)',
+                (key, query, content_type, body, latency))
+            self._connection.commit()
+
+
+class ReplayServer(ThreadingHTTPServer):
+
+    def __init__(self, address: Tuple[str, int], **kwargs) -> None:
+        super().__init__(address, ReplayRequestHandler)
+        self.mode = kwargs.get('mode', 'replay')
+        self.dialect = kwargs.get('dialect', 'virtuoso')
+        self.latency = kwargs.get('latency', None)
+        self.latency_scale = kwargs.get('latency_scale', 1.0)
+        self.timeout_rate = kwargs.get('timeout_rate', 0.0)
+        self.random = random.Random(kwargs.get('seed', 0))
+        self.store = None
+        if kwargs.get('store', None) is not None:
+            self.store = ReplayStore(kwargs['store'])
+        self.upstream = None
+        if kwargs.get('upstream', None) is not None:
+            self.upstream = HTTPTransport(kwargs['upstream'])
+        self.database = None
+        if kwargs.get('graph', None) is not None:
+            self.database = HDTConnector(kwargs['graph'])
+        self.lock = threading.Lock()
+
+    def timeout_seconds(self, timeout: int) -> float:
+        if self.dialect == 'virtuoso':
+            return timeout / 1000
+        return float(timeout)
+
+    def evaluate(self, query: str) -> Tuple[List[str], List[Dict[str, str]]]:
+        if self.database is None:
+            raise Exception('No HDT graph to evaluate the query')
+        with self.lock:
+            engine = LocalEngine(self.database)
+            counts = list(COUNT.finditer(query))
+            if len(counts) > 0:
+                variables, solutions = [], []
+                for match in counts:
+                    group = extract_group(query, match.end() - 1)
+                    text = translate(f'SELECT * WHERE {group}')
+                    plan = load_plan(rewrite.bind_values(utils.parse_query(text)), text)
+                    count = sum(1 for _ in engine.execute(
+                        plan, distinct=match.group(1) is not None))
+                    variables.append(match.group(2))
+                    solutions.append({match.group(2): f'"{count}"^^<{XSD_INTEGER}>'})
+                return variables, solutions
+            text = translate(query)
+            parsed = utils.parse_query(flatten(DISTINCT.sub('SELECT ', text)))
+            plan = load_plan(rewrite.bind_values(parsed), text)
+            distinct, projection = PROJECTION.search(text).groups()
+            if projection.strip() == '*':
+                variables = sorted(plan.variables.union(plan.bindings.keys()))
+            else:
+                variables = projection.split()
+            solutions = list(engine.execute(
+                plan, distinct=distinct is not None, variables=variables))
+            return [v[1:] for v in variables], [
+                {v[1:]: value for v, value in solution.items()} for solution in solutions]
+
+    def serialize(
+        self, variables: List[str], solutions: List[Dict[str, str]], accept: str
+    ) -> Tuple[str, bytes]:
+        if 'tab-separated-values' in accept:
+            lines = ['\t'.join([f'?{v}' for v in variables])]
+            for solution in solutions:
+                lines.append('\t'.join([solution.get(v, '') for v in variables]))
+            return 'text/tab-separated-values', ('\n'.join(lines) + '\n').encode('utf-8')
+        bindings = []
+        for solution in solutions:
+            binding = {}
+            for variable, value in solution.items():
+                term = to_json_term(value)
+                if term is not None:
+                    binding[variable] = term
+            bindings.append(binding)
+        results = {'head': {'vars': variables}, 'results': {'bindings': bindings}}
+        return 'application/sparql-results+json', json.dumps(results).encode('utf-8')
+
+    def answer(
+        self, parameters: Dict[str, str], accept: str
+    ) -> Tuple[str, bytes, float]:
+        query = parameters['query']
+        graph = parameters.get('default-graph-uri', '')
+        key = ReplayStore.key(graph, accept, query)
+        if self.store is not None and self.mode != 'record':
+            recording = self.store.get(key)
+            if recording is not None:
+                return recording
+        if self.mode == 'record' and self.upstream is not None:
+            start_time = time.time()
+            body = b''.join(self.upstream.stream(parameters, accept=accept))
+            latency = time.time() - start_time
+            content_type = 'application/sparql-results+json'
+            if 'tab-separated-values' in accept:
+                content_type = 'text/tab-separated-values'
+            if self.store is not None:
+                self.store.put(key, query, content_type, body, latency)
+            return content_type, body, 0.0
+        start_time = time.time()
+        variables, solutions = self.evaluate(query)
+        content_type, body = self.serialize(variables, solutions, accept)
+        latency = time.time() - start_time
+        if self.store is not None and self.mode == 'hdt':
+            self.store.put(key, query, content_type, body, latency)
+        return content_type, body, 0.0
+
+
+class ReplayRequestHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format: str, *args) -> None:
+        logging.debug(format % args)
+
+    def respond(
+        self, status: int, content_type: str, body: bytes, headers: Dict[str, str] = {}
+    ) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for header, value in headers.items():
+            self.send_header(header, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def handle_query(self, parameters: Dict[str, List[str]]) -> None:
+        parameters = {name: values[0] for name, values in parameters.items()}
+        if 'query' not in parameters:
+            self.respond(400, 'text/plain', b'Missing query parameter')
+            return None
+        accept = self.headers.get('Accept', 'application/sparql-results+json')
+        timeout = self.server.timeout_seconds(int(parameters.get('timeout', '0') or 0))
+        start_time = time.time()
+        try:
+            content_type, body, latency = self.server.answer(parameters, accept)
+        except Exception as error:
+            logging.error(error)
+            self.respond(500, 'text/plain', str(error).encode('utf-8'))
+            return None
+        if self.server.latency is not None:
+            latency = self.server.latency
+        latency = latency * self.server.latency_scale
+        injected = self.server.random.random() < self.server.timeout_rate
+        if timeout > 0 and (injected or latency > timeout):
+            time.sleep(max(0.0, timeout - (time.time() - start_time)) + 0.01)
+            if self.server.dialect == 'virtuoso':
+                _, body = self.server.serialize([], [], accept)
+                self.respond(200, content_type, body, headers={'X-SQL-State': 'S1TAT'})
+            else:
+                self.respond(500, 'text/plain', b'java.util.concurrent.TimeoutException')
+            return None
+        time.sleep(max(0.0, latency - (time.time() - start_time)))
+        self.respond(200, content_type, body)
+
+    def do_GET(self) -> None:
+        self.handle_query(parse_qs(urlsplit(self.path).query))
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get('Content-Length', 0))
+        content = self.rfile.read(length).decode('utf-8')
+        if self.headers.get('Content-Type', '').startswith('application/sparql-query'):
+            self.handle_query(
+                parse_qs(urlsplit(self.path).query) | {'query': [content]})
+        else:
+            self.handle_query(parse_qs(content))
@@ -0,0 +1,160 @@
+import codecs
+import gzip
+import json
+import hashlib
+
+from typing import Dict, Iterable, Iterator, List, Optional
+
+
+def format_term(term: Optional[Dict]) -> str:
+    if term is None:
+        return ''
+    elif term['type'] == 'uri':
+        return f'<{term["value"]}>'
+    elif term['type'] == 'bnode':
+        return f'_:{term["value"]}'
+    value = json.dumps(term['value'], ensure_ascii=False)
+    if 'xml:lang' in term:
+        return f'{value}@{term["xml:lang"]}'
+    elif 'datatype' in term:
+        return f'{value}^^<{term["datatype"]}>'
+    return value
+
+
+class JSONResultReader():
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._charset = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._position = 0
+        self._variables = None
+
+    @property
+    def variables(self) -> List[str]:
+        if self._variables is None:
+            self.seek('"vars"')
+            self.seek(':')
+            self._variables = self.decode()
+        return self._variables
+
+    def fill(self) -> bool:
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        self._buffer = self._buffer[self._position:] + self._charset.decode(chunk)
+        self._position = 0
+        return True
+
+    def seek(self, token: str) -> None:
+        while True:
+            index = self._buffer.find(token, self._position)
+            if index >= 0:
+                self._position = index + len(token)
+                return None
+            self._position = max(self._position, len(self._buffer) - len(token))
+            if not self.fill():
+                raise Exception(f'Malformed SPARQL JSON results: {token} not found')
+
+    def skip(self, separators: str) -> str:
+        while True:
+            while self._position < len(self._buffer):
+                character = self._buffer[self._position]
+                if character not in separators:
+                    return character
+                self._position += 1
+            if not self.fill():
+                return ''
+
+    def decode(self) -> Dict:
+        self.skip(' \t\r\n')
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._position)
+                if end == len(self._buffer) and self.fill():
+                    continue
+                self._position = end
+                return value
+            except json.JSONDecodeError:
+                if not self.fill():
+                    raise
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        variables = self.variables
+        self.seek('"bindings"')
+        self.seek('[')
+        while True:
+            character = self.skip(' \t\r\n,')
+            if character == ']' or character == '':
+                break
+            binding = self.decode()
+            yield {variable: format_term(binding.get(variable)) for variable in variables}
+
+
+class TSVResultReader():
+
+    def __init__(self, chunks: Iterable[bytes]) -> None:
+        self._lines = self.split(chunks)
+        self._variables = None
+
+    @property
+    def variables(self) -> List[str]:
+        if self._variables is None:
+            header = next(self._lines, '')
+            self._variables = [variable.lstrip('?$') for variable in header.split('\t')]
+        return self._variables
+
+    def split(self, chunks: Iterable[bytes]) -> Iterator[str]:
+        buffer = b''
+        for chunk in chunks:
+            buffer += chunk
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                yield line.rstrip(b'\r').decode('utf-8')
+        if len(buffer) > 0:
+            yield buffer.rstrip(b'\r').decode('utf-8')
+
+    def __iter__(self) -> Iterator[Dict[str, str]]:
+        variables = self.variables
+        for line in self._lines:
+            if len(line) == 0:
+                continue
+            yield dict(zip(variables, line.split('\t')))
+
+
+class ResultConsumer():
+
+    def __init__(self, variables: List[str], output: Optional[str] = None) -> None:
+        self._variables = sorted(variables)
+        self._num_solutions = 0
+        self._checksum = 0
+        self._writer = None
+        if output is not None:
+            self._writer = gzip.open(output, 'wt', encoding='utf-8')
+            self._writer.write('\t'.join([f'?{v.lstrip("?")}' for v in self._variables]) + '\n')
+
+    @property
+    def num_solutions(self) -> int:
+        return self._num_solutions
+
+    @property
+    def fingerprint(self) -> str:
+        return f'{self._checksum:016x}'
+
+    def consume(self, solution: Dict[str, str]) -> None:
+        row = '\t'.join([solution.get(variable, '') for variable in self._variables])
+        digest = hashlib.blake2b(row.encode('utf-8'), digest_size=8).digest()
+        self._checksum = (self._checksum + int.from_bytes(digest, 'big')) % 2**64
+        self._num_solutions += 1
+        if self._writer is not None:
+            self._writer.write(row + '\n')
+
+    def consume_all(self, solutions: Iterable[Dict[str, str]]) -> None:
+        for solution in solutions:
+            self.consume(solution)
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import os
+import csv
+import sqlite3
+
+from typing import Any, Dict, Iterable, List, Optional, TYPE_CHECKING
+
+from spy import Spy
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
+
+
+TYPES = {bool: 'INTEGER', int: 'INTEGER', float: 'REAL', str: 'TEXT'}
+
+
+def parse_value(text: str) -> Any:
+    if text == '':
+        return None
+    elif text in ['True', 'False']:
+        return text == 'True'
+    for cast in [int, float]:
+        try:
+            return cast(text)
+        except ValueError:
+            pass
+    return text
+
+
+class ResultsStore():
+
+    def __init__(self, path: str) -> None:
+        self._path = path
+        self._connection = sqlite3.connect(path, timeout=60.0)
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute(
+            'CREATE TABLE IF NOT EXISTS sources ('
+            'name TEXT, source TEXT, mtime REAL, size INTEGER, PRIMARY KEY (name, source))')
+        self._columns = {}
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    def tables(self) -> List[str]:
+        cursor = self._connection.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name != 'sources'")
+        return sorted([name for (name,) in cursor])
+
+    def columns(self, name: str) -> List[str]:
+        if name not in self._columns:
+            cursor = self._connection.execute(f'PRAGMA table_info("{name}")')
+            self._columns[name] = [column for (_, column, _, _, _, _) in cursor]
+        return self._columns[name]
+
+    def prepare(self, name: str, rows: List[Dict[str, Any]]) -> None:
+        if len(self.columns(name)) == 0:
+            self._connection.execute(
+                f'CREATE TABLE IF NOT EXISTS "{name}" ('
+                'source TEXT, position INTEGER, PRIMARY KEY (source, position))')
+            self._columns.pop(name)
+        columns = set(self.columns(name))
+        for row in rows:
+            for column, value in row.items():
+                if column in columns or value is None:
+                    continue
+                kind = TYPES.get(type(value), 'TEXT')
+                self._connection.execute(f'ALTER TABLE "{name}" ADD COLUMN "{column}" {kind}')
+                columns.add(column)
+        self._columns.pop(name)
+
+    def replace(
+        self, name: str, source: str, rows: List[Dict[str, Any]],
+        mtime: Optional[float] = None, size: Optional[int] = None
+    ) -> None:
+        with self._connection:
+            self.prepare(name, rows)
+            self._connection.execute(f'DELETE FROM "{name}" WHERE source = ?', (source,))
+            for position, row in enumerate(rows):
+                columns = ['source', 'position'] + list(row.keys())
+                names = ', '.join([f'"{column}"' for column in columns])
+                marks = ', '.join(['?'] * len(columns))
+                self._connection.execute(
+                    f'INSERT INTO "{name}" ({names}) VALUES ({marks})',
+                    [source, position] + list(row.values()))
+            self._connection.execute(
+                'INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)', (name, source, mtime, size))
+
+    def append(
+        self, name: str, source: str, spy: Spy, columns: Optional[Dict[str, Any]] = None
+    ) -> None:
+        rows = []
+        for values in spy.to_rows():
+            row = dict(columns) if columns is not None else {}
+            for column, value in zip(spy.columns, values):
+                row.setdefault(column, value)
+            rows.append(row)
+        self.replace(name, source, rows)
+
+    def is_fresh(self, name: str, filename: str) -> bool:
+        stat = os.stat(filename)
+        cursor = self._connection.execute(
+            'SELECT mtime, size FROM sources WHERE name = ? AND source = ?', (name, filename))
+        return cursor.fetchone() == (stat.st_mtime, stat.st_size)
+
+    def ingest(
+        self, name: str, filename: str, columns: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        if self.is_fresh(name, filename):
+            return False
+        stat = os.stat(filename)
+        rows = []
+        with open(filename, 'r', newline='') as reader:
+            for values in csv.DictReader(reader):
+                row = dict(columns) if columns is not None else {}
+                for column, value in values.items():
+                    row.setdefault(column, parse_value(value))
+                rows.append(row)
+        self.replace(name, filename, rows, mtime=stat.st_mtime, size=stat.st_size)
+        return True
+
+    def ingest_all(self, name: str, filenames: Iterable[str]) -> int:
+        filenames = set(filenames)
+        num_ingested = sum([int(self.ingest(name, filename)) for filename in sorted(filenames)])
+        cursor = self._connection.execute(
+            'SELECT source FROM sources WHERE name = ? AND mtime IS NOT NULL', (name,))
+        with self._connection:
+            for (source,) in cursor.fetchall():
+                if source not in filenames:
+                    self._connection.execute(f'DELETE FROM "{name}" WHERE source = ?', (source,))
+                    self._connection.execute(
+                        'DELETE FROM sources WHERE name = ? AND source = ?', (name, source))
+        return num_ingested
+
+    def select(self, name: str) -> Spy:
+        spy = Spy()
+        columns = [column for column in self.columns(name) if column not in ['source', 'position']]
+        names = ', '.join([f'"{column}"' for column in columns])
+        cursor = self._connection.execute(
+            f'SELECT source, position, {names} FROM "{name}" ORDER BY source, position')
+        for source, position, *values in cursor:
+            for column, value in zip(columns, values):
+                if value is not None:
+                    spy.report(f'{source}#{position}', column, value)
+        return spy
+
+    def to_dataframe(self, name: str) -> DataFrame:
+        from pandas import read_sql_query
+        dataframe = read_sql_query(f'SELECT * FROM "{name}"', self._connection)
+        return dataframe.drop(columns=['source', 'position'])
+
+    def to_csv(self, name: str, filename: str) -> None:
+        self.select(name).to_csv(filename)
+
+    def close(self) -> None:
+        self._connection.close()
@@ -0,0 +1,107 @@
+from typing import Dict, List, Optional, Tuple
+
+from query import Query
+from triple_pattern import TriplePattern
+from filter import Filter, BasicExpression, RelationalExpression, EqExpression
+
+
+def is_iri(term: str) -> bool:
+    return term[0] not in ['?', '"'] and not term.startswith('_:')
+
+
+def pinned_constant(filter: Filter) -> Optional[Tuple[str, str]]:
+    expression = filter.expression
+    if isinstance(expression, EqExpression):
+        left, right = expression.left, expression.right
+    elif isinstance(expression, RelationalExpression) and expression.operator == '=':
+        if not isinstance(expression.left, BasicExpression):
+            return None
+        if not isinstance(expression.right, BasicExpression):
+            return None
+        left, right = expression.left.term, expression.right.term
+    else:
+        return None
+    if left[0] != '?':
+        left, right = right, left
+    if left[0] != '?' or not is_iri(right):
+        return None
+    return left, right
+
+
+def substitute(pattern: TriplePattern, bindings: Dict[str, str]) -> TriplePattern:
+    terms = [bindings.get(term, term) for term in [
+        pattern.subject, pattern.predicate, pattern.object]]
+    if terms == [pattern.subject, pattern.predicate, pattern.object]:
+        return pattern
+    return TriplePattern(*terms, zero=pattern.zero, more=pattern.more)
+
+
+def components(patterns: List[TriplePattern]) -> int:
+    groups = []
+    for pattern in patterns:
+        group, others = set(pattern.variables), []
+        for other in groups:
+            if len(group.intersection(other)) > 0:
+                group.update(other)
+            else:
+                others.append(other)
+        groups = others + [group]
+    return len(groups)
+
+
+def pushable(query: Query, bindings: Dict[str, str]) -> bool:
+    patterns = [substitute(pattern, bindings) for pattern in query.patterns]
+    if any([len(pattern.variables) == 0 for pattern in patterns]):
+        return False
+    return components(patterns) <= components(query.patterns)
+
+
+def push_constants(query: Query) -> Query:
+    candidates = {}
+    for filter in query.filters:
+        pinned = pinned_constant(filter)
+        if pinned is not None:
+            candidates.setdefault(pinned[0], []).append((filter, pinned[1]))
+    variables = set()
+    for pattern in query.patterns:
+        variables.update(pattern.variables)
+    bindings, residuals = {}, []
+    for variable, pins in candidates.items():
+        if len(pins) > 1 or variable not in variables or variable in query.bindings:
+            continue
+        filter, term = pins[0]
+        others = [other for other in query.filters if other is not filter] + query.multisets
+        if any([variable in other.variables for other in others]):
+            continue
+        if pushable(query, bindings | {variable: term}):
+            bindings[variable] = term
+    if len(bindings) == 0:
+        return query
+    pushed = set(bindings.keys())
+    for filter in query.filters:
+        pinned = pinned_constant(filter)
+        if pinned is None or pinned[0] not in pushed:
+            residuals.append(filter)
+    patterns = [substitute(pattern, bindings) for pattern in query.patterns]
+    return Query(
+        query.name, patterns, residuals, query.multisets, query.bindings | bindings)
+
+
+def bind_values(query: Query) -> Query:
+    variables = set()
+    for pattern in query.patterns + query.filters:
+        variables.update(pattern.variables)
+    bindings, multisets = {}, []
+    for multiset in query.multisets:
+        if multiset.size == 1 and len(variables.intersection(multiset.variables)) == 0:
+            bindings.update(multiset.omega[0])
+        else:
+            multisets.append(multiset)
+    if len(bindings) == 0:
+        return query
+    return Query(query.name, query.patterns, query.filters, multisets, query.bindings | bindings)
+
+
+def rewrite(query: Query) -> Query:
+    return push_constants(bind_values(query))
+
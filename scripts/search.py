@@ -1,20 +1,42 @@
+import time
 import logging
 
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Dict, List, Optional, Union
 
 from query import Query
 from join_order import JoinOrder
+from bushy_join_order import BushyJoinOrder
+from cost_model import CoutCostModel
 from estimators.estimator import CardinalityEstimator
+from selectivity import selectivity
 
 
 class SearchAlgorithm(ABC):
 
     def __init__(self, estimator: CardinalityEstimator, **kwargs) -> None:
         self._estimator = estimator
+        self._cost_model = kwargs.get('cost_model', CoutCostModel())
+        self._seeding = kwargs.get('seeding', 'auto')
+
+    def start(self, query: Query) -> JoinOrder:
+        return JoinOrder(None, cost_model=self._cost_model, bindings=query.bindings)
+
+    def seed(self, query: Query, join_order: JoinOrder) -> List[JoinOrder]:
+        seeds = []
+        if join_order.previous is None:
+            for multiset in query.multisets:
+                seed = join_order.extend(multiset)
+                seed.cardinality = multiset.size
+                seeds.append(seed)
+        return seeds
 
     def expand(self, query: Query, join_order: JoinOrder) -> List[JoinOrder]:
         candidates = []
+        for seed in self.seed(query, join_order):
+            candidates.extend(self.expand(query, seed))
+        if len(candidates) > 0 and self._seeding == 'always':
+            return candidates
         for pattern in query.patterns:
             if join_order.previous is None:
                 if not pattern.more:
@@ -33,8 +55,9 @@ class SearchAlgorithm(ABC):
                         candidates.append(candidate)
                 else:
                     candidates.append(join_order.extend(pattern))
+        filters = sorted(query.filters + query.multisets, key=selectivity)
         for i in range(len(candidates)):
-            for filter in query.filters:
+            for filter in filters:
                 if filter not in candidates[i] and candidates[i].compatible(filter):
                     candidates[i] = candidates[i].extend(filter)
         return candidates
@@ -52,14 +75,16 @@ class DPSearch(SearchAlgorithm):
     def next_round(
         self, query: Query, old_plans: List[JoinOrder]
     ) -> List[JoinOrder]:
-        new_plans = {}
+        candidates = []
         for old_plan in old_plans.values():
-            for new_plan in self.expand(query, old_plan):
-                self._estimator.estimate(new_plan)
-                if new_plan.k1 not in new_plans:
-                    new_plans[new_plan.k1] = new_plan
-                elif new_plan < new_plans[new_plan.k1]:
-                    new_plans[new_plan.k1] = new_plan
+            candidates.extend(self.expand(query, old_plan))
+        self._estimator.estimate_all(candidates)
+        new_plans = {}
+        for new_plan in candidates:
+            if new_plan.k1 not in new_plans:
+                new_plans[new_plan.k1] = new_plan
+            elif new_plan < new_plans[new_plan.k1]:
+                new_plans[new_plan.k1] = new_plan
         if logging.getLogger().getEffectiveLevel() == 10:
             logging.debug('(1) ' + '///' * 50)
             for i, new_plan in enumerate(new_plans.values()):
@@ -73,7 +98,7 @@ class DPSearch(SearchAlgorithm):
         return new_plans
 
     def run(self, query: Query) -> JoinOrder:
-        plans = {0: JoinOrder(None)}
+        plans = {0: self.start(query)}
         round = 0
         while round < query.size:
             plans = self.next_round(query, plans)
@@ -109,7 +134,7 @@ class GreedySearch(DPSearch):
         return new_beam
 
     def run(self, query: Query) -> JoinOrder:
-        beam = {0: JoinOrder(None)}
+        beam = {0: self.start(query)}
         round = 0
         while round < query.size:
             beam = self.next_round(query, beam)
@@ -120,7 +145,7 @@ class GreedySearch(DPSearch):
 class HGreedySearch(DPSearch):
 
     def __init__(self, estimator: CardinalityEstimator, **kwargs) -> None:
-        super().__init__(estimator)
+        super().__init__(estimator, **kwargs)
         self._beam_size = kwargs.get('beam_size', 5)
         self._beam_extra = kwargs.get('beam_extra', 1)
 
@@ -158,7 +183,7 @@ class HGreedySearch(DPSearch):
         return new_beam
 
     def run(self, query: Query) -> JoinOrder:
-        beam = {0: JoinOrder(None)}
+        beam = {0: self.start(query)}
         round = 0
         while round < query.size:
             beam = self.next_round(query, beam)
@@ -166,13 +191,140 @@ class HGreedySearch(DPSearch):
         return beam.popitem()[1]
 
 
+class IDPSearch(DPSearch):
+
+    def __init__(self, estimator: CardinalityEstimator, **kwargs) -> None:
+        super().__init__(estimator, **kwargs)
+        self._block_size = kwargs.get('block_size', 3)
+        if self._block_size < 1:
+            raise ValueError(f'block size must be at least 1, got {self._block_size}')
+        self._time_budget = kwargs.get('time_budget', 0.0)
+
+    def collapse(self, plans: Dict[int, JoinOrder]) -> Dict[int, JoinOrder]:
+        best_plan = min(plans.values())
+        if logging.getLogger().getEffectiveLevel() == 10:
+            logging.debug('(3) ' + '///' * 50)
+            logging.debug(f'collapsed plan: {best_plan}')
+            logging.debug(f'cost: {best_plan.cost}')
+            logging.debug(f'support: {best_plan.support * 100:.2f}%')
+            logging.debug('(3) ' + '///' * 50 + '\n')
+        return {best_plan.k1: best_plan}
+
+    def run(self, query: Query) -> JoinOrder:
+        start = time.time()
+        plans = {0: self.start(query)}
+        round = 0
+        while round < query.size:
+            plans = self.next_round(query, plans)
+            round += 1
+            elapsed_time = time.time() - start
+            if self._time_budget > 0 and elapsed_time > self._time_budget:
+                plans = self.collapse(plans)
+            elif round % self._block_size == 0:
+                plans = self.collapse(plans)
+        return min(plans.values())
+
+
+class BushySearch(DPSearch):
+
+    def __init__(self, estimator: CardinalityEstimator, **kwargs) -> None:
+        super().__init__(estimator, **kwargs)
+
+    def join(
+        self, query: Query, left: Union[JoinOrder, BushyJoinOrder],
+        right: Union[JoinOrder, BushyJoinOrder], union: JoinOrder
+    ) -> Optional[BushyJoinOrder]:
+        if len(left.variables.intersection(right.variables)) == 0:
+            return None
+        filters = []
+        variables = left.variables.union(right.variables)
+        for filter in query.filters + query.multisets:
+            if filter in left or filter in right:
+                continue
+            if variables.issuperset(filter.variables):
+                filters.append(filter)
+        plan = BushyJoinOrder(left, right, filters=filters)
+        plan.cardinality = union.cardinality
+        plan.epsilon = union.epsilon
+        plan.support = min(left.support, right.support, union.support)
+        return plan
+
+    def run(self, query: Query) -> Union[JoinOrder, BushyJoinOrder]:
+        plans = {0: self.start(query)}
+        left_deep_plans = {}
+        round = 0
+        while round < query.size:
+            plans = self.next_round(query, plans)
+            left_deep_plans.update(plans)
+            round += 1
+        best_plans = dict(left_deep_plans)
+        patterns = {}
+        sizes = {}
+        for k1, plan in left_deep_plans.items():
+            patterns[k1] = set([pattern.id for pattern in plan.get_patterns()])
+            sizes.setdefault(plan.size, []).append(k1)
+        for size in range(2, query.size + 1):
+            for left_size in range(1, size):
+                for left_k1 in sizes.get(left_size, []):
+                    for right_k1 in sizes.get(size - left_size, []):
+                        if len(patterns[left_k1].intersection(patterns[right_k1])) > 0:
+                            continue
+                        union = left_deep_plans.get(left_k1 ^ right_k1)
+                        if union is None:
+                            continue
+                        plan = self.join(
+                            query, best_plans[left_k1], best_plans[right_k1], union)
+                        if plan is not None and plan < best_plans[union.k1]:
+                            best_plans[union.k1] = plan
+        best_plan = best_plans[plans.popitem()[1].k1]
+        if logging.getLogger().getEffectiveLevel() == 10:
+            logging.debug('(4) ' + '///' * 50)
+            logging.debug(f'plan: {best_plan}')
+            logging.debug(f'cost: {best_plan.cost}')
+            logging.debug('(4) ' + '///' * 50 + '\n')
+        return best_plan
+
+
+class FixedSearch(SearchAlgorithm):
+
+    def __init__(self, estimator: Optional[CardinalityEstimator], **kwargs) -> None:
+        super().__init__(estimator, **kwargs)
+        self._order = kwargs.get('order', None)
+        self._gearings = kwargs.get('gearings', None)
+
+    def run(self, query: Query) -> JoinOrder:
+        order = self._order
+        if order is None:
+            order = list(range(query.size))
+        gearings = self._gearings
+        if gearings is None:
+            gearings = [None for _ in order]
+        join_order = self.start(query)
+        for index, gearing in zip(order, gearings):
+            pattern = query.patterns[index]
+            if gearing is None and not pattern.more:
+                gearing = 0
+            elif gearing is None:
+                if pattern.subject[0] != '?' or pattern.subject in join_order.variables:
+                    gearing = 1
+                else:
+                    gearing = 2
+            join_order = join_order.extend(pattern, gearing=gearing)
+            for filter in query.filters + query.multisets:
+                if filter not in join_order and join_order.compatible(filter):
+                    join_order = join_order.extend(filter)
+            if self._estimator is not None:
+                self._estimator.estimate(join_order)
+        return join_order
+
+
 class DummySearch(SearchAlgorithm):
 
     def __init__(self, estimator: CardinalityEstimator, **kwargs) -> None:
         super().__init__(estimator, **kwargs)
 
     def run(self, query: Query) -> JoinOrder:
-        join_order = JoinOrder(None)
+        join_order = self.start(query)
         while join_order.size < query.size:
             join_order = self.expand(query, join_order)[0]
         return join_order
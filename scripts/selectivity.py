@@ -0,0 +1,76 @@
+from typing import Dict, List, Optional, Union
+
+from filter import (
+    Expression,
+    Filter,
+    NotExpression,
+    RelationalExpression,
+    RegexExpression,
+    EqExpression,
+    ConditionalAndExpression,
+    ConditionalOrExpression)
+from multiset import Multiset
+from triple_pattern import TriplePattern
+from hdt_connector import HDTConnector
+from literal_statistics import LiteralStatistics
+
+
+EQUALITY = 0.005
+INEQUALITY = 1 / 3
+REGEX = 0.1
+DEFAULT = 0.5
+
+
+def object_predicates(patterns: List[TriplePattern]) -> Dict[str, str]:
+    predicates = {}
+    for pattern in patterns:
+        if pattern.more or pattern.predicate[0] == '?' or pattern.object[0] != '?':
+            continue
+        predicates.setdefault(pattern.object, pattern.predicate)
+    return predicates
+
+
+def expression_selectivity(
+    expression: Expression,
+    statistics: Optional[LiteralStatistics] = None,
+    predicates: Optional[Dict[str, str]] = None,
+    database: Optional[HDTConnector] = None
+) -> float:
+    if statistics is not None and predicates is not None:
+        estimate = statistics.estimate(expression, predicates, database)
+        if estimate is not None:
+            return estimate
+    if isinstance(expression, EqExpression):
+        return EQUALITY
+    elif isinstance(expression, RelationalExpression):
+        if expression.operator == '=':
+            return EQUALITY
+        elif expression.operator == '!=':
+            return 1.0 - EQUALITY
+        return INEQUALITY
+    elif isinstance(expression, RegexExpression):
+        return REGEX
+    elif isinstance(expression, NotExpression):
+        return 1.0 - expression_selectivity(expression.expr, statistics, predicates, database)
+    elif isinstance(expression, ConditionalAndExpression):
+        selectivity = 1.0
+        for clause in expression.clauses:
+            selectivity *= expression_selectivity(clause, statistics, predicates, database)
+        return selectivity
+    elif isinstance(expression, ConditionalOrExpression):
+        rejected = 1.0
+        for clause in expression.clauses:
+            rejected *= 1.0 - expression_selectivity(clause, statistics, predicates, database)
+        return 1.0 - rejected
+    return DEFAULT
+
+
+def selectivity(
+    pattern: Union[Filter, Multiset],
+    statistics: Optional[LiteralStatistics] = None,
+    predicates: Optional[Dict[str, str]] = None,
+    database: Optional[HDTConnector] = None
+) -> float:
+    if pattern.is_multiset():
+        return min(1.0, pattern.size * EQUALITY ** len(pattern.variables))
+    return expression_selectivity(pattern.expression, statistics, predicates, database)
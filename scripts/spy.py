@@ -1,5 +1,15 @@
-from pandas import DataFrame
-from typing import Any
+from __future__ import annotations
+
+import csv
+import math
+import time
+
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from pandas import DataFrame
 
 
 class Spy():
@@ -8,6 +18,10 @@ class Spy():
         self._rows = {}
         self._columns = set()
 
+    @property
+    def columns(self) -> List[str]:
+        return list(sorted(self._columns))
+
     def has(self, row: str, column: str) -> bool:
         if row not in self._rows or column not in self._rows[row]:
             return False
@@ -26,13 +40,109 @@ class Spy():
             return default
         return self.get(row, column)
 
+    def to_rows(self) -> List[List[Any]]:
+        columns = self.columns
+        return [[row.get(column) for column in columns] for row in self._rows.values()]
+
     def to_dataframe(self) -> DataFrame:
-        columns = list(sorted(self._columns))
-        rows = []
-        for row in self._rows.values():
-            rows.append([value for _, value in sorted(row.items())])
-        return DataFrame(rows, columns=columns)
+        from pandas import DataFrame
+        return DataFrame(self.to_rows(), columns=self.columns)
+
+    @staticmethod
+    def format(value: Any) -> str:
+        if value is None or (isinstance(value, float) and math.isnan(value)):
+            return ''
+        return str(value)
+
+    def report_profile(self, row: str, profile: Dict[str, float]) -> None:
+        for name, value in profile.items():
+            self.report(row, f'profile_{name}', value)
 
     def to_csv(self, filename: str) -> None:
-        df = self.to_dataframe()
-        df.to_csv(filename, index=False)
+        with open(filename, 'w', newline='') as writer:
+            csv_writer = csv.writer(writer, lineterminator='\n')
+            csv_writer.writerow(self.columns)
+            for row in self.to_rows():
+                csv_writer.writerow([self.format(value) for value in row])
+
+    def to_string(self) -> str:
+        rows = [[''] + self.columns]
+        for index, row in zip(self._rows.keys(), self.to_rows()):
+            rows.append([str(index)] + [
+                'NaN' if value is None else str(value) for value in row])
+        widths = [max([len(row[i]) for row in rows]) for i in range(len(rows[0]))]
+        lines = []
+        for row in rows:
+            lines.append('  '.join([
+                value.ljust(width) if i == 0 else value.rjust(width)
+                for i, (value, width) in enumerate(zip(row, widths))]).rstrip())
+        return '\n'.join(lines)
+
+    def __str__(self) -> str:
+        return self.to_string()
+
+
+class Profiler():
+
+    def __init__(self) -> None:
+        self._counters = {}
+        self._timers = {}
+        self._scopes = []
+        self._caches = []
+
+    @property
+    def counters(self) -> Dict[str, float]:
+        return self._counters
+
+    @property
+    def timers(self) -> Dict[str, float]:
+        return self._timers
+
+    def count(self, name: str, value: float = 1) -> None:
+        self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def scope(self, name: str) -> Iterator[None]:
+        if name in self._scopes:
+            yield
+            return
+        self._scopes.append(name)
+        path = '.'.join(self._scopes)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._timers[path] = self._timers.get(path, 0.0) + time.perf_counter() - start
+            self._scopes.pop()
+
+    def timed(self, name: str) -> Callable[[Callable], Callable]:
+        def decorator(function: Callable) -> Callable:
+            @wraps(function)
+            def wrapper(*args, **kwargs) -> Any:
+                with self.scope(name):
+                    return function(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def track_cache(self, function: Callable) -> None:
+        self._caches.append(function)
+
+    def snapshot(self) -> Dict[str, float]:
+        snapshot = dict(self._counters)
+        for path, elapsed in self._timers.items():
+            snapshot[f'time_{path}'] = elapsed
+        for function in self._caches:
+            info = function.cache_info()
+            snapshot['cache_hits'] = snapshot.get('cache_hits', 0) + info.hits
+            snapshot['cache_misses'] = snapshot.get('cache_misses', 0) + info.misses
+        return snapshot
+
+    def since(self, snapshot: Dict[str, float]) -> Dict[str, float]:
+        delta = {}
+        for name, value in self.snapshot().items():
+            if value != snapshot.get(name, 0):
+                delta[name] = value - snapshot.get(name, 0)
+        return delta
+
+
+PROFILER = Profiler()
@@ -0,0 +1,91 @@
+import re
+import hashlib
+
+from functools import cached_property
+from typing import Dict, List
+
+from query import Query
+from triple_pattern import TriplePattern
+
+
+TERM = re.compile(
+    '\\?[A-Za-z0-9_]+|<[^<>\\s]+>|'
+    '"(?:[^"\\\\]|\\\\.)*"(?:\\^\\^<[^<>\\s]+>|@[A-Za-z0-9-]+)?|'
+    "'(?:[^'\\\\]|\\\\.)*'")
+
+class QueryTemplate():
+
+    def __init__(self, query: Query) -> None:
+        self._query = query
+        self._names = {}
+        self._order = list(range(query.size))
+        self.canonicalize()
+
+    @property
+    def query(self) -> Query:
+        return self._query
+
+    @property
+    def names(self) -> Dict[str, str]:
+        return self._names
+
+    @property
+    def order(self) -> List[int]:
+        return self._order
+
+    def rename(self, term: str) -> str:
+        if term[0] == '?':
+            return self.names.get(term, '?')
+        return '$'
+
+    def signature(self, pattern: TriplePattern) -> str:
+        mod = ''
+        if pattern.more:
+            mod = '*' if pattern.zero else '+'
+        subject = self.rename(pattern.subject)
+        object = self.rename(pattern.object)
+        return f'{subject} <{pattern.predicate}>{mod} {object}'
+
+    def neighbourhood(self, pattern: TriplePattern) -> str:
+        signatures = []
+        for other in self.query.patterns:
+            if other != pattern and len(other.variables.intersection(pattern.variables)) > 0:
+                signatures.append(self.signature(other))
+        return '|'.join(sorted(signatures))
+
+    def canonicalize(self) -> None:
+        for _ in range(self.query.size + 1):
+            keys = []
+            for pattern in self.query.patterns:
+                keys.append(f'{self.signature(pattern)}#{self.neighbourhood(pattern)}')
+            order = sorted(range(self.query.size), key=lambda index: keys[index])
+            names = {}
+            for index in order:
+                pattern = self.query.patterns[index]
+                for term in [pattern.subject, pattern.object]:
+                    if term[0] == '?' and term not in names:
+                        names[term] = f'?t{len(names)}'
+            self._order = order
+            if names == self._names:
+                break
+            self._names = names
+
+    def position(self, pattern: TriplePattern) -> int:
+        for position, index in enumerate(self.order):
+            if self.query.patterns[index].id == pattern.id:
+                return position
+        raise Exception(f'Pattern not in the query: {pattern}')
+
+    @cached_property
+    def key(self) -> str:
+        lines = [self.signature(self.query.patterns[index]) for index in self.order]
+        filters = []
+        for filter in self.query.filters + self.query.multisets:
+            filters.append(TERM.sub(lambda match: self.rename(match.group(0)), str(filter)))
+        lines.extend(sorted(filters))
+        return hashlib.sha1('\n'.join(lines).encode('utf-8')).hexdigest()
+
+    def __repr__(self) -> str:
+        lines = [f'\t{self.signature(self.query.patterns[index])} .' for index in self.order]
+        body = '\n'.join(lines)
+        return f'SELECT DISTINCT * WHERE {{\n{body}\n}}'
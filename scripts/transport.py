@@ -0,0 +1,139 @@
+import json
+import logging
+import queue
+import socket
+import time
+import http.client
+
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import urlencode, urlsplit
+
+
+RETRYABLE_ERRORS = (
+    ConnectionRefusedError, ConnectionResetError, BrokenPipeError,
+    http.client.RemoteDisconnected)
+
+
+class DeadlineExceeded(TimeoutError):
+    pass
+
+
+class HTTPTransport():
+
+    def __init__(self, url: str, **kwargs) -> None:
+        components = urlsplit(url)
+        self._scheme = components.scheme
+        self._hostname = components.hostname
+        self._port = components.port
+        self._path = components.path or '/'
+        self._pool_size = kwargs.get('pool_size', 8)
+        self._max_retries = kwargs.get('max_retries', 10)
+        self._backoff = kwargs.get('backoff', 0.1)
+        self._max_backoff = kwargs.get('max_backoff', 10.0)
+        self._pool = queue.LifoQueue(maxsize=self._pool_size)
+
+    @property
+    def pool_size(self) -> int:
+        return self._pool_size
+
+    def connect(self) -> http.client.HTTPConnection:
+        if self._scheme == 'https':
+            return http.client.HTTPSConnection(self._hostname, self._port)
+        return http.client.HTTPConnection(self._hostname, self._port)
+
+    def acquire(self) -> http.client.HTTPConnection:
+        try:
+            return self._pool.get_nowait()
+        except queue.Empty:
+            return self.connect()
+
+    def release(self, connection: http.client.HTTPConnection) -> None:
+        try:
+            self._pool.put_nowait(connection)
+        except queue.Full:
+            connection.close()
+
+    def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+    def remaining(self, deadline: Optional[float]) -> Optional[float]:
+        if deadline is None:
+            return None
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            raise DeadlineExceeded('client-side deadline exceeded')
+        return remaining
+
+    def open(
+        self, parameters: Dict[str, str], deadline: Optional[float], accept: str
+    ) -> Tuple[http.client.HTTPConnection, socket.socket, http.client.HTTPResponse]:
+        body = urlencode(parameters)
+        headers = {
+            'Content-Type': 'application/x-www-form-urlencoded',
+            'Accept': accept,
+            'Connection': 'keep-alive'}
+        connection = self.acquire()
+        try:
+            connection.timeout = self.remaining(deadline)
+            connection.request('POST', self._path, body=body, headers=headers)
+            sock = connection.sock
+            sock.settimeout(self.remaining(deadline))
+            response = connection.getresponse()
+            if response.status >= 400:
+                message = response.read().decode('utf-8', errors='replace')[:500]
+                connection.close()
+                if response.status == 503:
+                    raise ConnectionRefusedError(f'{response.status} {response.reason}')
+                raise Exception(f'{response.status} {response.reason}: {message}')
+        except BaseException:
+            connection.close()
+            raise
+        return connection, sock, response
+
+    def open_with_retries(
+        self, parameters: Dict[str, str], deadline: Optional[float], accept: str
+    ) -> Tuple[http.client.HTTPConnection, socket.socket, http.client.HTTPResponse]:
+        attempt = 1
+        while True:
+            try:
+                return self.open(parameters, deadline, accept)
+            except RETRYABLE_ERRORS as error:
+                if attempt >= self._max_retries:
+                    raise error
+                delay = min(self._backoff * 2 ** (attempt - 1), self._max_backoff)
+                if deadline is not None and time.time() + delay >= deadline:
+                    raise DeadlineExceeded('client-side deadline exceeded') from error
+                logging.error(f'attempt n° {attempt}: {error} (retrying in {delay:.2f}s)')
+                time.sleep(delay)
+                attempt += 1
+
+    def stream(
+        self, parameters: Dict[str, str], timeout: Optional[float] = None,
+        accept: str = 'application/sparql-results+json', chunk_size: int = 65536
+    ) -> Iterator[bytes]:
+        deadline = time.time() + timeout if timeout is not None else None
+        try:
+            connection, sock, response = self.open_with_retries(parameters, deadline, accept)
+            completed = False
+            try:
+                while True:
+                    sock.settimeout(self.remaining(deadline))
+                    chunk = response.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
+                completed = True
+            finally:
+                if completed and not response.will_close:
+                    self.release(connection)
+                else:
+                    response.close()
+                    connection.close()
+        except socket.timeout as error:
+            raise DeadlineExceeded('client-side deadline exceeded') from error
+
+    def request(
+        self, parameters: Dict[str, str], timeout: Optional[float] = None
+    ) -> Dict:
+        return json.loads(b''.join(self.stream(parameters, timeout=timeout)))
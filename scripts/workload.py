@@ -0,0 +1,205 @@
+import os
+import time
+import logging
+
+from typing import Any, Dict, Optional, Tuple
+
+import utils
+import rewrite
+
+from spy import Spy, PROFILER
+from query import Query
+from join_order import JoinOrder
+from cost_model import CostModel, CoutCostModel, FrontierCostModel, CalibratedCostModel
+from search import (
+    SearchAlgorithm, GreedySearch, HGreedySearch, DPSearch, IDPSearch, BushySearch)
+from estimators.estimator import CardinalityEstimator
+from estimators.random_walks import RandomWalksEstimator
+from estimators.void import VoidEstimator
+from estimators.feedback import FeedbackEstimator
+from hdt_connector import HDTConnector
+from plan_cache import PlanCache
+from feedback import FeedbackStore, describe
+
+
+STATE = {}
+
+
+def build_estimator(
+    connector: HDTConnector, options: Dict[str, Any]
+) -> CardinalityEstimator:
+    if options.get('estimator', 'random-walks') == 'random-walks':
+        estimator = RandomWalksEstimator(
+            connector, num_walks=options.get('num_walks', 10000),
+            max_depth=options.get('max_depth', 5),
+            relaxe_stars=options.get('relaxe_stars', True),
+            optimize_walk_plans=options.get('optimize_walk_plans', True),
+            histograms=options.get('histograms', True),
+            prior_strength=options.get('prior_strength', 0.0))
+    else:
+        estimator = VoidEstimator(connector, histograms=options.get('histograms', True))
+    if options.get('feedback', None) is not None:
+        estimator = FeedbackEstimator(
+            estimator, FeedbackStore(options['feedback']),
+            relaxe_stars=options.get('relaxe_stars', True))
+    return estimator
+
+
+def build_cost_model(options: Dict[str, Any]) -> CostModel:
+    if options.get('cost_model', None) is not None:
+        return CalibratedCostModel.load(options['cost_model'])
+    elif options.get('frontier_costs', False):
+        return FrontierCostModel()
+    return CoutCostModel()
+
+
+def build_optimizer(
+    estimator: CardinalityEstimator, cost_model: CostModel, options: Dict[str, Any]
+) -> SearchAlgorithm:
+    optimizer = options.get('optimizer', 'greedy')
+    if optimizer == 'greedy':
+        return GreedySearch(
+            estimator, beam_size=options.get('beam_size', 1), cost_model=cost_model)
+    elif optimizer == 'hgreedy':
+        return HGreedySearch(
+            estimator, beam_size=options.get('beam_size', 1),
+            beam_extra=options.get('beam_extra', 1), cost_model=cost_model)
+    elif optimizer == 'idp':
+        return IDPSearch(
+            estimator, block_size=options.get('block_size', 3),
+            time_budget=options.get('time_budget', 0.0), cost_model=cost_model)
+    elif optimizer == 'bushy':
+        return BushySearch(estimator, cost_model=cost_model)
+    return DPSearch(estimator, cost_model=cost_model)
+
+
+def summarize(
+    join_order: JoinOrder, relaxe_stars: bool = True,
+    corrections: Optional[Dict[str, float]] = None
+) -> Spy:
+    spy = Spy()
+    fifo = join_order.root.children
+    while len(fifo) > 0:
+        node = fifo.pop(0)
+        fifo.extend(node.children)
+        if node.size == 0:
+            continue
+        spy.report(node.k0, 'num_joins', node.size - 1)
+        spy.report(node.k0, 'cardinality', node.cardinality)
+        spy.report(node.k0, 'epsilon', node.epsilon)
+        spy.report(node.k0, 'cost', node.cost)
+        spy.report(node.k0, 'support', node.support)
+        spy.report(node.k0, 'traversal', node.traversal)
+        spy.report(node.k0, 'estimation_time', node.estimation_time)
+        spy.report_profile(node.k0, node.profile)
+        spy.report(node.k0, 'selected', False)
+        subplan, signature, predicates = describe(node, relaxe_stars=relaxe_stars)
+        spy.report(node.k0, 'subplan', subplan)
+        spy.report(node.k0, 'signature', signature)
+        spy.report(node.k0, 'predicates', ' '.join(predicates))
+        if corrections is not None:
+            spy.report(node.k0, 'correction', corrections.get(subplan, float('nan')))
+    for node in join_order.decompose():
+        if node.size > 0:
+            spy.report(node.k0, 'selected', True)
+    return spy
+
+
+def optimize_query(
+    query: Query, optimizer: SearchAlgorithm, estimator: CardinalityEstimator,
+    cost_model: CostModel, **kwargs
+) -> Tuple[JoinOrder, Spy, Spy]:
+    plan_cache = kwargs.get('plan_cache', None)
+    start = time.time()
+    snapshot = PROFILER.snapshot()
+    join_order = None
+    with PROFILER.scope('optimize'):
+        if plan_cache is not None:
+            join_order = plan_cache.lookup(query, kwargs['validator'], cost_model=cost_model)
+        plan_cache_hit = join_order is not None
+        if not plan_cache_hit:
+            join_order = optimizer.run(query)
+            if plan_cache is not None:
+                plan_cache.store(query, join_order)
+    elapsed_time = time.time() - start
+    profile = PROFILER.since(snapshot)
+    spy1 = Spy()
+    spy1.report('', 'optimization_time', elapsed_time)
+    spy1.report('', 'plan_cache_hit', int(plan_cache_hit))
+    spy1.report('', 'cost', join_order.cost)
+    spy1.report('', 'support', join_order.support)
+    spy1.report('', 'cardinality', join_order.cardinality)
+    spy1.report('', 'epsilon', join_order.epsilon)
+    for operator, value in cost_model.features(join_order).items():
+        spy1.report('', f'{operator}_cardinality', value)
+    spy1.report_profile('', profile)
+    corrections = None
+    if isinstance(estimator, FeedbackEstimator):
+        spy1.report('', 'feedback_reused', estimator.num_reused)
+        corrections = estimator.corrections
+    spy2 = summarize(
+        join_order, relaxe_stars=kwargs.get('relaxe_stars', True), corrections=corrections)
+    return join_order, spy1, spy2
+
+
+def initialize_worker(options: Optional[Dict[str, Any]] = None) -> None:
+    STATE['options'] = options
+    STATE['connectors'] = {}
+    STATE['cost_models'] = {}
+    STATE['plan_caches'] = {}
+
+
+def get_connector(graph: str) -> HDTConnector:
+    if graph not in STATE['connectors']:
+        STATE['connectors'][graph] = HDTConnector(graph)
+    return STATE['connectors'][graph]
+
+
+def get_cost_model(options: Dict[str, Any]) -> CostModel:
+    key = (options.get('cost_model', None), options.get('frontier_costs', False))
+    if key not in STATE['cost_models']:
+        STATE['cost_models'][key] = build_cost_model(options)
+    return STATE['cost_models'][key]
+
+
+def get_plan_cache(options: Dict[str, Any]) -> Optional[PlanCache]:
+    key = options.get('plan_cache', None)
+    if key is None:
+        return None
+    if key not in STATE['plan_caches']:
+        STATE['plan_caches'][key] = PlanCache(key)
+    return STATE['plan_caches'][key]
+
+
+def optimize_file(
+    filename: str, options: Optional[Dict[str, Any]] = None
+) -> Tuple[str, str, Spy, Spy]:
+    if options is None:
+        options = STATE['options']
+    name = os.path.basename(filename).rsplit('.', 1)[0]
+    query = utils.parse_file(filename)
+    if options.get('rewrite_filters', True):
+        query = rewrite.rewrite(query)
+    connector = get_connector(options['graph'])
+    cost_model = get_cost_model(options)
+    plan_cache = get_plan_cache(options)
+    estimator = build_estimator(connector, options)
+    optimizer = build_optimizer(estimator, cost_model, options)
+    validator = None
+    if plan_cache is not None:
+        validator = RandomWalksEstimator(
+            connector, num_walks=options.get('revalidation_walks', 100),
+            max_depth=options.get('max_depth', 5),
+            relaxe_stars=options.get('relaxe_stars', True),
+            optimize_walk_plans=options.get('optimize_walk_plans', True))
+    logging.debug(f'optimizing {name} in process {os.getpid()}')
+    join_order, spy1, spy2 = optimize_query(
+        query, optimizer, estimator, cost_model, plan_cache=plan_cache,
+        validator=validator, relaxe_stars=options.get('relaxe_stars', True))
+    return name, join_order.stringify(options['target']), spy1, spy2
+
+
+def optimize_experiments(
+    filename: str, experiments: Dict[str, Dict[str, Any]]
+) -> Dict[str, Tuple[str, str, Spy, Spy]]:
+    return {xp: optimize_file(filename, options) for xp, options in experiments.items()}
@@ -0,0 +1,44 @@
+import utils
+
+from join_order import JoinOrder
+from cost_model import CoutCostModel, FrontierCostModel
+
+
+QUERY = """SELECT * WHERE {
+    ?x <http://p/type> ?t .
+    ?x <http://p/label> ?l .
+    ?x <http://p/partof>+ ?y .
+    FILTER(regex(?l, "^name1"))
+}"""
+
+
+def build_plan(cost_model):
+    query = utils.parse_query(QUERY)
+    patterns = {pattern.predicate: pattern for pattern in query.patterns}
+    label = JoinOrder(None, cost_model=cost_model).extend(patterns['http://p/label'])
+    filter = label.extend(query.filters[0])
+    type = filter.extend(patterns['http://p/type'])
+    partof = type.extend(patterns['http://p/partof'], gearing=1)
+    filter.cardinality = 50.0
+    type.cardinality = 80.0
+    partof.traversal = 500.0
+    return [label, filter, type, partof]
+
+
+def test_cout_cost_matches_baseline():
+    nodes = build_plan(CoutCostModel())
+    expected = 0.0
+    for node in nodes:
+        expected += max(node.previous.cardinality, node.cardinality)
+        assert node.cost == expected
+    assert nodes[-1].cost == 210.0
+
+
+def test_frontier_cost_attributes_filters_and_traversals():
+    nodes = build_plan(FrontierCostModel())
+    features = nodes[-1].cost_model.features(nodes[-1])
+    assert features['scan'] == 500.0
+    assert features['filter'] == 500.0
+    assert features['index_join'] == 80.0
+    assert features['forward_closure'] == 500.0
+    assert nodes[-1].cost == sum(features.values())
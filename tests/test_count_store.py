@@ -0,0 +1,18 @@
+from count_store import CountStore, canonicalize
+
+
+FIRST = 'SELECT * WHERE {\n\t?x <http://p/a> ?y .\n\t?y <http://p/b> <http://e/1> .\n}'
+SECOND = 'SELECT * WHERE {\n\t?b <http://p/b> <http://e/1> .\n\t?z <http://p/a> ?b .\n}'
+OTHER = 'SELECT * WHERE {\n\t?x <http://p/a> ?y .\n\t?x <http://p/b> <http://e/1> .\n}'
+
+
+def test_isomorphic_queries_share_a_key():
+    assert canonicalize(FIRST) == canonicalize(SECOND)
+    assert canonicalize(FIRST) != canonicalize(OTHER)
+
+
+def test_store_hits_renamed_queries(tmp_path):
+    store = CountStore(str(tmp_path / 'counts.db'))
+    store.put('graph', FIRST, 'ok', 42, execution_time=1.5)
+    assert store.get('graph', SECOND) == ('ok', 42, 1.5)
+    assert store.get('graph', OTHER) is None
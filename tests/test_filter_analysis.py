@@ -0,0 +1,91 @@
+import utils
+
+from hdt_connector import HDTConnector
+from filter_analysis import (
+    IdRanges, analyze, difference, intersection, normalize, parse_prefix, prefix_upper_bound)
+
+
+OBJECTS = [
+    '"a"', '"b"', '"b"@en', '"ba"', '"c"', 'http://e/a1', 'http://e/b', 'http://e/b1',
+    'http://e/b2', 'http://e/ba', 'http://e/c']
+
+
+class MemoryDictionary(HDTConnector):
+
+    def __init__(self, objects):
+        self._objects = sorted(objects)
+
+    def get_subject(self, id):
+        return ''
+
+    def get_object(self, id):
+        return self._objects[id - 1] if 1 <= id <= len(self._objects) else ''
+
+    def get_object_id(self, term):
+        return self._objects.index(term) + 1 if term in self._objects else 0
+
+
+def check(text):
+    database = MemoryDictionary(OBJECTS)
+    filter = utils.parse_query(
+        f'SELECT * WHERE {{ ?x <http://p/q> ?o . FILTER({text}) }}').filters[0]
+    ranges = analyze(filter, database)
+    mappings = [{'?o': id} for id in range(1, len(OBJECTS) + 1)]
+    evaluate = filter.compile(database)
+    assert ranges.eval_all(filter, mappings, database) == [evaluate(mu) for mu in mappings]
+    return ranges
+
+
+def test_parse_prefix():
+    assert parse_prefix('^abc') == ('abc', True)
+    assert parse_prefix('^abc.*') == ('abc', True)
+    assert parse_prefix('^abc+') == ('ab', False)
+    assert parse_prefix('^a\\.b') == ('a.b', True)
+    assert parse_prefix('^a\\db') == ('a', False)
+    assert parse_prefix('abc') == (None, False)
+    assert parse_prefix('^a|b') == (None, False)
+    assert parse_prefix('^[ab]') == (None, False)
+
+
+def test_prefix_upper_bound():
+    assert prefix_upper_bound('ab') == 'ac'
+    assert prefix_upper_bound('a' + chr(0x10FFFF)) is None
+
+
+def test_range_operations():
+    assert normalize([(5, 6), (1, 2), (3, 3), (8, 7)]) == [(1, 3), (5, 6)]
+    assert intersection([(1, 5), (8, 10)], [(4, 9)]) == [(4, 5), (8, 9)]
+    assert difference([(1, 10)], [(3, 4), (7, 7)]) == [(1, 2), (5, 6), (8, 10)]
+    ranges = IdRanges('?o', [(1, 3)], [(2, 6)])
+    assert ranges.undecided == [(4, 6)]
+    assert ranges.candidates == [(1, 6)]
+    assert not ranges.exact
+    assert IdRanges.contains(ranges.accepted, 3)
+    assert not IdRanges.contains(ranges.accepted, 4)
+
+
+def test_anchored_regex_is_exact():
+    ranges = check('regex(str(?o), "^http://e/b")')
+    assert ranges.exact
+    assert ranges.accepted == [(7, 10)]
+
+
+def test_unanchored_tail_is_undecided():
+    ranges = check('regex(str(?o), "^http://e/b[0-9]")')
+    assert ranges.accepted == []
+    assert ranges.undecided == [(7, 10)]
+
+
+def test_comparisons_on_iris_are_exact():
+    ranges = check('(?o >= <http://e/b1> && ?o < <http://e/c>) || ?o = <http://e/a1>')
+    assert ranges.exact
+    assert ranges.accepted == [(6, 6), (8, 10)]
+    assert check('<http://e/b> = ?o').accepted == [(7, 7)]
+
+
+def test_comparisons_on_literals_defer_tagged_values():
+    ranges = check('?o < "b"')
+    assert ranges.accepted == [(1, 1)]
+    assert ranges.undecided == [(2, 3)]
+    check('?o != "b"')
+    check('?o = "b" || ?o = "c"')
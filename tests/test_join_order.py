@@ -0,0 +1,29 @@
+import utils
+
+from join_order import JoinOrder
+
+
+QUERY = """SELECT * WHERE {
+    ?x <http://p/type> ?t .
+    ?x <http://p/label> ?l .
+    ?x <http://p/partof>+ ?y .
+    FILTER(regex(?l, "^name1"))
+    VALUES ?t { <http://e/a> <http://e/b> }
+}"""
+
+
+def test_walk_keys_distinguish_filters_multisets_and_gearing():
+    query = utils.parse_query(QUERY)
+    patterns = {pattern.predicate: pattern for pattern in query.patterns}
+    label = JoinOrder(None).extend(patterns['http://p/label'])
+    filtered = label.extend(query.filters[0])
+    assert filtered.k0 == label.k0
+    assert filtered.k3 != label.k3
+    seeded = JoinOrder(None).extend(query.multisets[0]).extend(patterns['http://p/type'])
+    unseeded = JoinOrder(None).extend(patterns['http://p/type'])
+    assert seeded.k0 == unseeded.k0
+    assert seeded.k3 != unseeded.k3
+    forward = label.extend(patterns['http://p/partof'], gearing=1)
+    reverse = label.extend(patterns['http://p/partof'], gearing=2)
+    assert forward.k0 == reverse.k0
+    assert forward.k3 != reverse.k3
@@ -0,0 +1,43 @@
+import utils
+
+from search import FixedSearch
+from local_engine import LocalEngine
+
+
+TRIPLES = [
+    ('http://e/1', 'http://p/partof', 'http://e/2'),
+    ('http://e/2', 'http://p/partof', 'http://e/3'),
+    ('http://e/3', 'http://p/partof', 'http://e/1'),
+    ('http://e/1', 'http://p/type', 'http://e/C'),
+    ('http://e/2', 'http://p/type', 'http://e/C'),
+    ('http://e/3', 'http://p/type', 'http://e/D'),
+    ('http://e/1', 'http://p/label', '"one"'),
+]
+
+
+class MemoryDatabase():
+
+    def search(self, s, p, o):
+        for triple in TRIPLES:
+            if all([term == '' or term == value for term, value in zip((s, p, o), triple)]):
+                yield triple
+
+
+def execute(text, order=None, gearings=None):
+    query = utils.parse_query(text)
+    plan = FixedSearch(None, order=order, gearings=gearings).run(query)
+    engine = LocalEngine(MemoryDatabase())
+    return engine, sorted([tuple(sorted(mu.items())) for mu in engine.execute(plan)])
+
+
+def test_variable_predicates_are_scanned():
+    _, solutions = execute('SELECT * WHERE { <http://e/1> ?p ?o }')
+    assert len(solutions) == 3
+
+
+def test_closure_builds_its_adjacency_once():
+    engine, solutions = execute(
+        'SELECT * WHERE { ?x <http://p/type> ?t . ?y <http://p/partof>+ ?x }',
+        order=[0, 1], gearings=[None, 1])
+    assert len(solutions) == 9
+    assert engine.lookups == 2
@@ -0,0 +1,38 @@
+import utils
+import rewrite
+
+from search import GreedySearch, DPSearch
+from estimators.estimator import CardinalityEstimator
+
+
+class SizeEstimator(CardinalityEstimator):
+
+    def estimate(self, join_order, **kwargs):
+        join_order.cardinality = float(join_order.size)
+
+
+def test_constants_are_pushed_into_patterns():
+    query = rewrite.rewrite(utils.parse_query(
+        'SELECT * WHERE { ?x <http://p/P31> ?y . FILTER(?y = <http://e/Q5>) }'))
+    assert query.bindings == {'?y': 'http://e/Q5'}
+    assert len(query.filters) == 0
+    assert query.patterns[0].object == 'http://e/Q5'
+
+
+def test_constants_that_disconnect_the_query_are_kept_as_filters():
+    query = rewrite.rewrite(utils.parse_query(
+        'SELECT * WHERE { ?x <http://p/P31> ?y . ?x <http://p/P279> ?z . '
+        'FILTER(?x = <http://e/Q5>) }'))
+    assert query.bindings == {}
+    assert len(query.filters) == 1
+    for optimizer in [GreedySearch(SizeEstimator()), DPSearch(SizeEstimator())]:
+        assert optimizer.run(query).size == 2
+
+
+def test_constants_that_empty_a_pattern_are_kept_as_filters():
+    query = rewrite.rewrite(utils.parse_query(
+        'SELECT * WHERE { ?x <http://p/P31> ?y . '
+        'FILTER(?x = <http://e/Q5>) FILTER(?y = <http://e/Q6>) }'))
+    assert len(query.bindings) == 1
+    assert len(query.filters) == 1
+    assert len(query.patterns[0].variables) == 1
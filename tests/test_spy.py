@@ -0,0 +1,18 @@
+import time
+
+from spy import Profiler
+
+
+def test_reentrant_scopes_are_timed_once():
+    profiler = Profiler()
+
+    @profiler.timed('walks')
+    def walks(depth):
+        time.sleep(0.01)
+        if depth > 0:
+            walks(depth - 1)
+
+    with profiler.scope('estimate'):
+        walks(2)
+    assert set(profiler.timers.keys()) == {'estimate', 'estimate.walks'}
+    assert profiler.timers['estimate.walks'] <= profiler.timers['estimate']
@@ -0,0 +1,29 @@
+import utils
+
+from template import QueryTemplate
+
+
+def key(text):
+    return QueryTemplate(utils.parse_query(text)).key
+
+
+def test_filter_constants_share_a_template():
+    first = key('SELECT * WHERE { ?x <http://p/year> ?y . FILTER(?y > 1910) }')
+    second = key('SELECT * WHERE { ?a <http://p/year> ?b . FILTER(?b > 1990) }')
+    assert first == second
+
+
+def test_filter_operators_are_kept():
+    first = key('SELECT * WHERE { ?x <http://p/year> ?y . FILTER(?y > 1910) }')
+    second = key('SELECT * WHERE { ?x <http://p/year> ?y . FILTER(?y < 1910) }')
+    assert first != second
+
+
+def test_filter_iris_and_literals_are_abstracted():
+    first = key(
+        'SELECT * WHERE { ?x <http://p/label> ?l . ?x <http://p/type> ?t . '
+        'FILTER(?t != <http://e/1>) FILTER(regex(?l, "^a")) }')
+    second = key(
+        'SELECT * WHERE { ?x <http://p/label> ?l . ?x <http://p/type> ?t . '
+        'FILTER(?t != <http://e/2>) FILTER(regex(?l, "^b")) }')
+    assert first == second
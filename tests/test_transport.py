@@ -0,0 +1,69 @@
+import json
+import threading
+
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from transport import HTTPTransport
+
+
+BODY = json.dumps({'head': {'vars': ['x']}, 'results': {'bindings': []}}).encode('utf-8')
+
+
+class CloseDelimitedHandler(BaseHTTPRequestHandler):
+
+    protocol_version = 'HTTP/1.0'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/sparql-results+json')
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class KeepAliveHandler(CloseDelimitedHandler):
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers['Content-Length']))
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/sparql-results+json')
+        self.send_header('Content-Length', str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+
+@pytest.fixture
+def serve():
+    servers = []
+
+    def start(handler):
+        server = HTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f'http://127.0.0.1:{server.server_port}/sparql'
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_close_delimited_response_is_read_and_not_pooled(serve):
+    transport = HTTPTransport(serve(CloseDelimitedHandler), max_retries=1)
+    for _ in range(2):
+        assert transport.request({'query': 'ASK {}'}, timeout=5.0) == json.loads(BODY)
+    assert transport._pool.qsize() == 0
+
+
+def test_keep_alive_connection_is_reused(serve):
+    transport = HTTPTransport(serve(KeepAliveHandler), max_retries=1)
+    for _ in range(2):
+        assert transport.request({'query': 'ASK {}'}, timeout=5.0) == json.loads(BODY)
+    assert transport._pool.qsize() == 1
@@ -0,0 +1,34 @@
+import math
+
+import utils
+
+from endpoint import Virtuoso
+from join_order import JoinOrder
+from estimators.virtuoso_cost import VirtuosoCostEstimator
+
+
+QUERY = 'SELECT * WHERE { ?x <http://p/type> ?t . ?x <http://p/label> ?l }'
+
+
+def test_partial_explain_failure_only_affects_failed_plans(monkeypatch):
+    virtuoso = Virtuoso('http://localhost:8890/sparql', 'http://example.com/graph')
+
+    def execute_many(cmds):
+        responses = []
+        for cmd in cmds:
+            if '<http://p/label> ?l .\n\t?x <http://p/type>' in cmd:
+                responses.append('*** Error 37000: [Virtuoso Driver]SQ156: Internal error')
+            else:
+                responses.append('explain\nVARCHAR\n_____\n\n1.5e+03\n')
+        return responses
+
+    monkeypatch.setattr(virtuoso.isql, 'execute_many', execute_many)
+    query = utils.parse_query(QUERY)
+    label, type = sorted(query.patterns, key=lambda pattern: pattern.predicate)
+    root = JoinOrder(None)
+    candidates = [root.extend(type).extend(label), root.extend(label).extend(type)]
+    VirtuosoCostEstimator(virtuoso).estimate_all(candidates)
+    assert candidates[0].cardinality == 1500.0
+    assert candidates[0].support == 1.0
+    assert candidates[1].cardinality == math.inf
+    assert candidates[1].support == 0.0